@@ -36,3 +36,23 @@ RESOURCES = [
         with_index=False,
         with_rdfdump=False),
 ]
+
+_RESOURCES_BY_CLASS = {}
+
+
+def resource_for(obj):
+    """Determine the registered resource type of an object.
+
+    The lookup is memoized per class of the object.
+
+    :return: :class:`Resource` instance or `None`.
+    """
+    cls = obj.__class__
+    rsc = _RESOURCES_BY_CLASS.get(cls)
+    if rsc is None:
+        for _rsc in RESOURCES:
+            if _rsc.interface.providedBy(obj):
+                # Resources registered later cannot take precedence, so we can memoize:
+                rsc = _RESOURCES_BY_CLASS[cls] = _rsc
+                break
+    return rsc
@@ -0,0 +1,283 @@
+"""
+Process-wide caching of data which only changes when the database is reloaded.
+
+Since the data served by a clld app is typically read-only between releases, a lot of
+derived data - like the row counts of DataTables - can be cached in the app process.
+
+Caching is opt-in, i.e. a cache named ``<name>`` is only used if the app settings contain
+``clld.<name>_cache = true``. All caches retrieved via :func:`get_cache` are cleared when
+:func:`invalidate` is called, e.g. after the database has been reloaded.
+
+If ``clld.dataset_cache = true``, the :class:`clld.db.models.common.Dataset` object - used
+on most pages - is retrieved from a process-wide snapshot, see :func:`dataset`.
+
+Caches of rendered responses can be backed by a directory shared between app processes,
+specified as ``clld.<name>_cache_dir`` setting, see :func:`get_response_cache`. Since the
+keys of these caches must include the :func:`dataset_version`, entries become stale
+when the database is reloaded.
+
+A reload of the database - e.g. by running ``clld initdb`` while the app is served - is
+detected by :func:`dataset_version` within :data:`VERSION_TTL` seconds, upon which all
+caches are invalidated.
+"""
+import os
+import pickle
+import time
+import shutil
+import hashlib
+import pathlib
+import tempfile
+import threading
+import collections
+
+from pyramid.settings import asbool
+
+__all__ = [
+    'LRUCache', 'DiskCache', 'TieredCache',
+    'cache_enabled', 'get_cache', 'get_response_cache', 'invalidate', 'dataset_version',
+    'dataset']
+
+_CACHES = {}
+_LOCK = threading.RLock()
+_VERSION = None
+
+#: Number of seconds for which the dataset version is used without checking the database.
+VERSION_TTL = 10
+_DATASET = None
+
+
+class LRUCache(object):
+
+    """A thread-safe mapping, discarding the least recently used items when full.
+
+    By default, each item counts as one towards ``maxsize``. Items may be given a different
+    size when added, e.g. the number of objects in a cached object graph.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.size = 0
+        self._data = collections.OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+                return self._data[key]
+            except KeyError:
+                return default
+
+    def set(self, key, value, size=1):
+        with self._lock:
+            self.size += size - self._sizes.get(key, 0)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._data.move_to_end(key)
+            while self.size > self.maxsize:
+                self.size -= self._sizes.pop(self._data.popitem(last=False)[0])
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            self.size -= self._sizes.pop(key, 0)
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.size = 0
+
+
+class DiskCache(object):
+
+    """A cache storing picklable values in files in a directory.
+
+    Since writes are atomic, the directory can be shared by multiple processes.
+    """
+
+    def __init__(self, directory):
+        self.directory = pathlib.Path(directory)
+
+    def _path(self, key):
+        digest = hashlib.md5(repr(key).encode('utf8')).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def get(self, key, default=None):
+        try:
+            with self._path(key).open('rb') as fp:
+                return pickle.load(fp)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+
+    def set(self, key, value):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent))
+        with os.fdopen(fd, 'wb') as fp:
+            pickle.dump(value, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, str(path))
+        return value
+
+    def clear(self):
+        if self.directory.exists():
+            shutil.rmtree(str(self.directory))
+
+
+class TieredCache(object):
+
+    """An in-process :class:`LRUCache` in front of an optional :class:`DiskCache`."""
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+
+    def __contains__(self, key):
+        return key in self.memory or (self.disk is not None and key in self.disk)
+
+    def get(self, key, default=None):
+        res = self.memory.get(key)
+        if res is None and self.disk is not None:
+            res = self.disk.get(key)
+            if res is not None:
+                self.memory.set(key, res)
+        return default if res is None else res
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        return value
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+def cache_enabled(settings, name):
+    """Check whether the cache ``name`` is switched on in the app settings.
+
+    :param settings: app settings, a registry or object with a ``registry``, e.g. a request.
+    """
+    if hasattr(settings, 'registry'):
+        settings = settings.registry
+    if hasattr(settings, 'settings'):
+        settings = settings.settings
+    return asbool((settings or {}).get('clld.%s_cache' % name, False))
+
+
+def get_cache(name, maxsize=1000):
+    """Retrieve the process-wide cache registered under ``name``, creating it if needed.
+
+    :return: :class:`LRUCache` instance.
+    """
+    with _LOCK:
+        if name not in _CACHES:
+            _CACHES[name] = LRUCache(maxsize=maxsize)
+        return _CACHES[name]
+
+
+def get_response_cache(req, name, maxsize=1000):
+    """Retrieve the cache for rendered responses registered under ``name``.
+
+    :return: :class:`TieredCache` instance or `None`, if the cache is not enabled.
+    """
+    if not cache_enabled(req, name):
+        return
+    settings = req.registry.settings
+    with _LOCK:
+        if name not in _CACHES:
+            directory = settings.get('clld.%s_cache_dir' % name)
+            _CACHES[name] = TieredCache(
+                LRUCache(maxsize=int(settings.get('clld.%s_cache_size' % name, maxsize))),
+                DiskCache(directory) if directory else None)
+        return _CACHES[name]
+
+
+def invalidate():
+    """Clear all caches, e.g. when the database has been reloaded."""
+    global _VERSION
+    with _LOCK:
+        _VERSION = None
+        _clear()
+
+
+def _clear():
+    global _DATASET
+    with _LOCK:
+        _DATASET = None
+        for cache in _CACHES.values():
+            # Shared disk caches are not cleared, since their keys contain the dataset version.
+            getattr(cache, 'memory', cache).clear()
+        # Caches will be re-created - possibly with changed settings - upon next access.
+        _CACHES.clear()
+
+
+def dataset_version():
+    """Compute a stamp identifying the state of the database.
+
+    The stamp is derived from the :class:`clld.db.models.common.Dataset` row - which is
+    re-created when the database is reloaded. It is re-computed at most every
+    :data:`VERSION_TTL` seconds (or after :func:`invalidate` was called); if it changed,
+    all caches are cleared.
+
+    The `Dataset` row is read using a short-lived connection - not the session - because
+    the stamp is also looked up outside of any transaction, e.g. by the page cache tween.
+    """
+    global _VERSION
+    from sqlalchemy import select
+    from clld.db.meta import DBSession
+    from clld.db.models.common import Dataset
+
+    with _LOCK:
+        now = time.monotonic()
+        if _VERSION is None or now - _VERSION[1] > VERSION_TTL:
+            with DBSession.get_bind().connect() as conn:
+                row = conn.execute(select(
+                    Dataset.pk, Dataset.id, Dataset.updated, Dataset.published).limit(1)).first()
+            row = tuple(row) if row else None
+            version = hashlib.md5(repr(row).encode('utf8')).hexdigest()[:12]
+            if _VERSION is not None and _VERSION[0] != version:
+                # The database has been reloaded:
+                _clear()
+            _VERSION = (version, now)
+        return _VERSION[0]
+
+
+def dataset():
+    """Retrieve a snapshot of the :class:`clld.db.models.common.Dataset` object.
+
+    The object is loaded once per process (or after :func:`invalidate` was called) -
+    together with its editors, data and files - and detached from any session. Thus, it is
+    shared between requests and must be treated as read-only.
+    """
+    global _DATASET
+    from sqlalchemy.orm import Session, undefer, selectinload
+    from clld.db.meta import DBSession
+    from clld.db.models.common import Dataset
+
+    with _LOCK:
+        if _DATASET is None:
+            # We use a separate session - sharing the connection of the current one - to
+            # not detach objects loaded in the current session when closing it.
+            session = Session(bind=DBSession.connection())
+            try:
+                _DATASET = session.query(Dataset).options(
+                    undefer('*'),
+                    selectinload(Dataset.data),
+                    selectinload(Dataset._files)).first()
+            finally:
+                session.close()
+        return _DATASET
@@ -15,6 +15,7 @@ from clldutils import clilib
 from clld.db.meta import DBSession, Base
 from clld.db.models import common
 from clld.lib import bibtex
+from clld.web.icon import OFFLINE
 
 __all__ = [
     'AppConfig',
@@ -67,6 +68,8 @@ class BootstrappedAppConfig(AppConfig):
     def __call__(self, parser, namespace, values, option_string=None):
         AppConfig.__call__(self, parser, namespace, values, option_string=option_string)
         namespace.env = bootstrap(values)
+        # Representations rendered by console scripts - e.g. downloads - are used offline:
+        namespace.env['request'].environ[OFFLINE] = True
         try:
             namespace.initializedb = importlib.import_module(
                 '.'.join([namespace.module.__name__, 'scripts', 'initializedb']))
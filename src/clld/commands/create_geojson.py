@@ -0,0 +1,95 @@
+"""
+Precompute the GeoJSON for the layers of the parameter maps of a clld app.
+
+The GeoJSON is rendered by the app - for each layer URL of the map registered for
+parameters - and written, together with precompressed siblings, to the directory
+specified as ``clld.geojson_dir`` setting. Since the files are stored in a subdirectory
+named after the :func:`clld.cache.dataset_version`, files become stale when the database
+is reloaded - and the GeoJSON is rendered live again, until this command is re-run.
+
+The GeoJSON is rendered with host-relative URLs for map marker icons (see
+:func:`clld.web.icon.icon_url`), thus, the files can be served for requests to any host,
+with any URL scheme.
+"""
+import shutil
+import pathlib
+import urllib.parse
+
+from webob import Request
+
+from clld.interfaces import IMap
+from clld.cache import dataset_version
+from clld.db.meta import DBSession
+from clld.db.models.common import Parameter
+from clld.cliutil import BootstrappedAppConfig
+from clld.commands.freeze import write
+from clld.web.adapters.geojson import precomputed_path
+
+
+def register(parser):
+    parser.add_argument(
+        "config_uri", action=BootstrappedAppConfig, help="ini file providing app config")
+    parser.add_argument(
+        'domain',
+        help="domain name under which the app is served. Necessary to create correct URLs.",
+    )
+    parser.add_argument(
+        '--scheme', default='https', help="URL scheme under which the app is served")
+
+
+def layer_urls(req, parameter):
+    """URLs of the GeoJSON layers of the map for a parameter.
+
+    Each URL is yielded as requested by the map - i.e. with the layer ID as parameter
+    ``layer`` - and as linked in the map's legend.
+    """
+    map_ = req.registry.queryUtility(IMap, name='parameter')
+    if map_ is None:  # pragma: no cover
+        return
+    for layer in map_(parameter, req).layers:
+        if isinstance(layer.data, str):
+            url = urllib.parse.urlsplit(layer.data)
+            query = urllib.parse.parse_qsl(url.query)
+            yield urllib.parse.urlunsplit(('', '', url.path, urllib.parse.urlencode(query), ''))
+            query.append(('layer', str(layer.id)))
+            yield urllib.parse.urlunsplit(('', '', url.path, urllib.parse.urlencode(query), ''))
+
+
+def run(args):
+    """
+    Render the GeoJSON of the parameter maps to files.
+    """
+    settings = args.env['registry'].settings
+    if not settings.get('clld.geojson_dir'):
+        args.log.error('clld.geojson_dir must be specified in the app config')
+        return 1
+    directory = pathlib.Path(settings['clld.geojson_dir'])
+    base_url = '{0}://{1}'.format(args.scheme, args.domain)
+    req = args.env['request']
+    req.environ['HTTP_HOST'] = args.domain
+    version = dataset_version()
+
+    # While rendering, outdated files for the current version must not be served:
+    target, tmp = directory / version, directory / ('.' + version)
+    for d in [target, tmp]:
+        if d.exists():
+            shutil.rmtree(str(d))
+
+    n = 0
+    for parameter in DBSession.query(Parameter).order_by(Parameter.pk):
+        for url in layer_urls(req, parameter):
+            sub = Request.blank(url, base_url=base_url)
+            res = sub.get_response(args.env['app'])
+            if res.status_int != 200:  # pragma: no cover
+                args.log.warning('{0} {1}'.format(res.status_int, url))
+                continue
+            write(precomputed_path(tmp.parent, sub, version=tmp.name), res.body)
+            n += 1
+
+    if tmp.exists():
+        tmp.rename(target)
+    # Remove the files for previous versions of the database:
+    for d in directory.iterdir():
+        if d.is_dir() and d.name != version:
+            shutil.rmtree(str(d))
+    args.log.info('{0} GeoJSON files written'.format(n))
@@ -0,0 +1,44 @@
+"""
+Create indexes declared for the clld models which are missing in the database, e.g. the
+index on ``config.key``, in databases created with earlier versions of clld.
+"""
+import transaction
+from zope.sqlalchemy import mark_changed
+from sqlalchemy import inspect
+
+from clld.db.meta import Base
+from clld.cliutil import BootstrappedAppConfig, SessionContext
+
+
+def register(parser):
+    parser.add_argument(
+        "config_uri", action=BootstrappedAppConfig, help="ini file providing app config")
+    parser.add_argument(
+        '-l', '--list', default=False, action='store_true', help='only list missing indexes')
+
+
+def missing_indexes(conn):
+    """The indexes declared for the models, which do not exist in the database."""
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name in tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if index.name not in existing:
+                    yield index
+
+
+def run(args):
+    """
+    Create the indexes declared for the models, which are missing in the database.
+    """
+    with SessionContext(args.settings) as session:
+        with transaction.manager:
+            conn = session.connection()
+            for index in list(missing_indexes(conn)):
+                args.log.info('creating index %s' % index.name)
+                if not args.list:
+                    index.create(conn)
+            # We only executed DDL statements, thus have to tell the transaction manager:
+            mark_changed(session())
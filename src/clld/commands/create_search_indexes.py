@@ -0,0 +1,78 @@
+"""
+Create indexes supporting infix and full-text search on the text columns of the registered
+DataTables.
+"""
+import transaction
+from zope.sqlalchemy import mark_changed
+from sqlalchemy.types import String, Unicode
+
+from clld.db import fts
+from clld.db.trigram import index_name, create_index
+from clld.web.app import RESOURCES
+from clld.web.datatables.base import IdCol
+from clld.web.subscribers import _add_localizer
+from clld.cliutil import BootstrappedAppConfig, SessionContext
+
+
+def register(parser):
+    parser.add_argument(
+        "config_uri", action=BootstrappedAppConfig, help="ini file providing app config")
+    parser.add_argument(
+        '-l', '--list', default=False, action='store_true', help='only list the indexes')
+
+
+def _datatables(req):
+    _add_localizer(req)
+    for rsc in RESOURCES:
+        dt = req.get_datatable(rsc.plural, rsc.model)
+        if dt:
+            yield dt
+
+
+def searchable_columns(req):
+    """Collect the text columns which are searched with infix search in the app's datatables.
+
+    :return: `dict` mapping index names to model attributes.
+    """
+    res = {}
+    for dt in _datatables(req):
+        for col in dt.cols:
+            if isinstance(col.model_col_type, (String, Unicode)) \
+                    and col.js_args.get('bSearchable', True) \
+                    and not getattr(col, 'choices', None) \
+                    and not isinstance(col, IdCol) \
+                    and not dt.is_fulltext_col(col) \
+                    and index_name(col.model_col):
+                res[index_name(col.model_col)] = col.model_col
+    return res
+
+
+def create_fulltext_indexes(req, conn, log=None):
+    """Create the full-text indexes for the columns listed in the `__fulltext__` attribute of
+    the app's datatables.
+    """
+    for dt in _datatables(req):
+        if dt.__fulltext__:
+            if log:
+                log.info('creating full-text index for %s' % dt.db_model().__name__)
+            fts.create_index(dt.db_model(), dt.__fulltext__, conn)
+
+
+def run(args):
+    """
+    Create the search indexes for all text columns of the registered DataTables.
+    """
+    with SessionContext(args.settings) as session:
+        with transaction.manager:
+            conn = session.connection()
+            for name, col in sorted(searchable_columns(args.env['request']).items()):
+                args.log.info('creating index %s' % name)
+                if not args.list:
+                    if not create_index(col, conn):  # pragma: no cover
+                        args.log.warning(
+                            'search indexes are not supported for %s' % conn.dialect.name)
+                        break
+            if not args.list:
+                create_fulltext_indexes(args.env['request'], conn, log=args.log)
+            # We only executed DDL statements, thus have to tell the transaction manager:
+            mark_changed(session())
@@ -0,0 +1,202 @@
+"""
+Render a clld app to a tree of static files - to be served by a web server directly.
+
+The tree contains the home page and the registered pages, the sitemaps, the index pages of
+all resources and the pages of all resource instances - each in all formats for which
+adapters are registered. URL paths of HTML pages are mapped to ``<path>/index.html``, all
+other responses are stored under their URL path. For each file larger than
+:data:`MIN_SIZE` bytes, precompressed siblings with suffix ``.gz`` (and ``.br`` if the
+`brotli` package is installed) are written as well.
+
+Dynamic endpoints - e.g. OLAC - must still be served by the app. Since the files are
+rendered for URLs without query string, requests with query string - e.g. for DataTables
+data (``?sEcho=...``) or for GeoJSON restricted to a bounding box or zoom level - as well as
+XHR requests must be passed to the app, too, e.g. using an nginx configuration like
+
+.. code-block:: nginx
+
+    location / {
+        root <OUTPUT>;
+        gzip_static on;
+        brotli_static on;
+        error_page 418 = @app;
+        if ($args) {
+            return 418;
+        }
+        if ($http_x_requested_with) {
+            return 418;
+        }
+        try_files $uri $uri/index.html @app;
+    }
+
+    location @app {
+        proxy_pass http://<APP>;
+    }
+"""
+import gzip
+import functools
+import multiprocessing
+import urllib.parse
+
+from webob import Request
+from pyramid.paster import bootstrap
+from clldutils.clilib import PathType
+
+from clld import RESOURCES
+from clld.interfaces import IIndex, IRepresentation
+from clld.db.meta import DBSession
+from clld.cliutil import BootstrappedAppConfig
+from clld.web.adapters import get_adapters
+from clld.web.util.helpers import route_table_url
+from clld.web.views.sitemap import LIMIT, _query
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+#: Responses smaller than this number of bytes are not precompressed.
+MIN_SIZE = 256
+#: Number of resource instances rendered in one task of a worker process.
+CHUNK_SIZE = 200
+
+COMPRESSORS = [('.gz', functools.partial(gzip.compress, compresslevel=9, mtime=0))]
+if brotli:  # pragma: no cover
+    COMPRESSORS.append(('.br', brotli.compress))
+
+_ENV = {}
+
+
+def register(parser):
+    parser.add_argument(
+        "config_uri", action=BootstrappedAppConfig, help="ini file providing app config")
+    parser.add_argument(
+        'domain',
+        help="domain name under which the app is served. Necessary to create correct URLs.",
+    )
+    parser.add_argument(
+        'output', type=PathType(type='dir', must_exist=False), help="output directory")
+    parser.add_argument(
+        '--scheme', default='https', help="URL scheme under which the app is served")
+    parser.add_argument(
+        '-j', '--workers',
+        type=int,
+        default=1,
+        help="number of worker processes (1 means rendering in the main process)")
+
+
+def write(path, body):
+    """Write a file - and its precompressed siblings."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    if len(body) >= MIN_SIZE:
+        for suffix, compress in COMPRESSORS:
+            path.parent.joinpath(path.name + suffix).write_bytes(compress(body))
+
+
+def index_paths(req, rsc):
+    """URL paths of the index of a resource, in all available formats."""
+    yield req.route_path(rsc.plural)
+    dt = req.get_datatable(rsc.plural, rsc.model)
+    if dt:
+        for _, adapter in get_adapters(IIndex, dt, req):
+            if adapter.extension:
+                yield req.route_path(rsc.plural + '_alt', ext=adapter.extension)
+
+
+def resource_paths(req, rsc, obj):
+    """URL paths of a resource instance, in all available formats."""
+    yield req.resource_path(obj, rsc=rsc)
+    for _, adapter in get_adapters(IRepresentation, obj, req):
+        if adapter.extension:
+            yield req.resource_path(obj, rsc=rsc, ext=adapter.extension)
+
+
+def tasks(req):
+    """Chunk the URL paths of the app into tasks for worker processes.
+
+    :return: generator of pairs (resource name or `None`, list of ids or URL paths).
+    """
+    paths = ['/', req.route_path('robots'), req.route_path('sitemapindex'), route_table_url(req)]
+    paths.extend(req.route_path(name) for name in req.registry.settings['home_comp'])
+    for rsc in RESOURCES:
+        if rsc.with_index and rsc.name in req.registry.settings.get('clld.sitemaps', []):
+            n, m = divmod(_query(req, rsc).count(), LIMIT)
+            paths.extend(req.route_path('sitemap', rsc=rsc.name, n=i) for i in range(n + bool(m)))
+        if rsc.with_index:
+            paths.extend(index_paths(req, rsc))
+    yield None, paths
+
+    for rsc in RESOURCES:
+        if rsc.name == 'dataset' or not hasattr(rsc.model, '__table__'):
+            # Skip the dataset - served as home page - and resources not backed by a table.
+            continue
+        ids = [r[0] for r in DBSession.query(rsc.model.id).order_by(rsc.model.pk)]
+        for i in range(0, len(ids), CHUNK_SIZE):
+            yield rsc.name, ids[i:i + CHUNK_SIZE]
+
+
+def freeze(env, base_url, output, rsc_name, items):
+    """Render a chunk of URL paths to files below `output`.
+
+    :return: `list` of pairs (URL path, HTTP status code).
+    """
+    req = env['request']
+    if rsc_name:
+        rsc = [r for r in RESOURCES if r.name == rsc_name][0]
+        paths = []
+        for obj in DBSession.query(rsc.model).filter(rsc.model.id.in_(items)):
+            paths.extend(resource_paths(req, rsc, obj))
+    else:
+        paths = items
+
+    res = []
+    for path in paths:
+        response = Request.blank(path, base_url=base_url).get_response(env['app'])
+        if response.status_int == 200:
+            # Web servers look up files by the decoded URL path:
+            target = output.joinpath(*[urllib.parse.unquote(s) for s in path.split('/') if s])
+            if response.content_type == 'text/html' and not path.endswith('.html'):
+                target = target.joinpath('index.html')
+            write(target, response.body)
+        res.append((path, response.status_int))
+    return res
+
+
+def _init_worker(config_uri):  # pragma: no cover
+    # Make sure, we don't use a session inherited from the parent process:
+    DBSession.remove()
+    _ENV.update(bootstrap(config_uri))
+
+
+def _freeze(args):  # pragma: no cover
+    return freeze(_ENV, *args)
+
+
+def run(args):
+    """
+    Render the app to a directory of static files.
+    """
+    base_url = '{0}://{1}'.format(args.scheme, args.domain)
+    req = args.env['request']
+    req.environ['HTTP_HOST'] = args.domain
+    chunks = [
+        (base_url, args.output, rsc_name, items) for rsc_name, items in tasks(req)]
+
+    if args.workers > 1:  # pragma: no cover
+        # Each worker process bootstraps the app, i.e. has its own request and db connection:
+        with multiprocessing.Pool(
+                args.workers, initializer=_init_worker, initargs=(str(args.config_uri),)) as pool:
+            results = pool.imap_unordered(_freeze, chunks)
+            for result in results:
+                _log(args.log, result)
+    else:
+        for chunk in chunks:
+            _log(args.log, freeze(args.env, *chunk))
+
+
+def _log(log, result):
+    for path, status in result:
+        if status != 200:
+            log.warning('{0} {1}'.format(status, path))
+    log.info('{0} paths rendered'.format(len(result)))
@@ -5,9 +5,16 @@ import pathlib
 import contextlib
 
 import transaction
+from zope.sqlalchemy import mark_changed
 from clldutils import db
 from clldutils.clilib import PathType
+from clld import RESOURCES
+from clld.cache import invalidate
+from clld.db.meta import DBSession
+from clld.db.util import store_distinct_values
 from clld.cliutil import SessionContext, BootstrappedAppConfig
+from clld.web.subscribers import _add_localizer
+from clld.commands.create_search_indexes import create_fulltext_indexes
 try:
     from pycldf import Dataset
 except ImportError:  # pragma: no cover
@@ -75,6 +82,35 @@ def run(args):
             with transaction.manager:
                 if args.initializedb:  # pragma: no cover
                     args.initializedb.main(args)
+            # Data cached before - e.g. while loading - is outdated now:
+            invalidate()
         if hasattr(args.initializedb, 'prime_cache'):
             with transaction.manager:  # pragma: no cover
                 args.initializedb.prime_cache(args)
+        # Full-text indexes must be populated after the data has been imported:
+        try:
+            with transaction.manager:
+                create_fulltext_indexes(
+                    args.env['request'], DBSession.connection(), log=args.log)
+                mark_changed(DBSession())
+        except Exception as e:
+            # Failing to create the indexes must not render the loaded data useless:
+            args.log.warning('full-text indexes could not be created: {0}'.format(e))
+        with transaction.manager:
+            # Instantiating the columns of the datatables looks up the distinct values of
+            # columns with choices, which are then stored:
+            req = args.env['request']
+            _add_localizer(req)
+            for rsc in RESOURCES:
+                try:
+                    dt = req.get_datatable(rsc.plural, rsc.model)
+                    if dt:
+                        len(dt.cols)
+                except Exception as e:
+                    # Datatables may require a real request to be instantiated, e.g. with
+                    # particular query parameters:
+                    args.log.warning(
+                        'distinct values for {0} could not be computed: {1}'.format(
+                            rsc.plural, e))
+            store_distinct_values()
+            mark_changed(DBSession())
@@ -1,4 +1,29 @@
-from sqlalchemy import func, Index
+"""
+Full-text search.
+
+Besides helpers to build ad-hoc full-text queries on PostgreSQL, this module provides
+full-text indexes for text columns of a model, created - and populated - after the data
+was imported (see :func:`create_index`):
+
+- On PostgreSQL, a stored, GIN-indexed ``tsvector`` column ``fts`` is added to the table,
+  combining the indexed columns with distinct weights, thus allowing searches restricted
+  to one of the columns.
+- On SQLite, an FTS5 table ``fts_<table>`` is created as external content table.
+
+Since the text columns may contain object language data, no stemming is applied.
+"""
+import re
+
+from sqlalchemy import func, Index, text, select, table, literal_column
+
+from clld.db.meta import DBSession
+from clld.cache import get_cache
+
+__all__ = ['tsvector', 'index', 'search', 'create_index', 'indexed_attributes', 'column_search']
+
+#: PostgreSQL supports four weights for lexemes in a tsvector:
+WEIGHTS = 'ABCD'
+PREFIX = 'fts_'
 
 
 def tsvector(obj):  # pragma: no cover
@@ -13,3 +38,98 @@ def search(col, qs):  # pragma: no cover
     # https://bitbucket.org/zzzeek/sqlalchemy/issues/3160/postgresql-to_tsquery-docs-and
     query = func.plainto_tsquery('english', qs)
     return col.op('@@')(query)
+
+
+def _table(model, attr):
+    """The table holding the column for an attribute, i.e. a base table of custom models."""
+    return getattr(model, attr).property.columns[0].table
+
+
+def create_index(model, attrs, conn):
+    """Create a full-text index for text columns of a model.
+
+    :param model: mapper class.
+    :param attrs: list of names of (at most four) text columns of the same table.
+    :param conn: database connection.
+    :return: `True` if an index was created, `False` if the dialect is not supported.
+    """
+    tname = _table(model, attrs[0]).name
+    assert all(_table(model, attr).name == tname for attr in attrs)
+    if conn.dialect.name == 'postgresql':
+        assert len(attrs) <= len(WEIGHTS)
+        conn.execute(text('ALTER TABLE "{0}" DROP COLUMN IF EXISTS fts'.format(tname)))
+        conn.execute(text(
+            'ALTER TABLE "{0}" ADD COLUMN fts tsvector GENERATED ALWAYS AS ({1}) STORED'.format(
+                tname,
+                ' || '.join(
+                    "setweight(to_tsvector('simple', coalesce(\"{0}\", '')), '{1}')".format(
+                        attr, weight) for attr, weight in zip(attrs, WEIGHTS)))))
+        conn.execute(text('CREATE INDEX "{0}{1}" ON "{1}" USING gin (fts)'.format(PREFIX, tname)))
+        conn.execute(text("COMMENT ON COLUMN \"{0}\".fts IS '{1}'".format(tname, ' '.join(attrs))))
+    elif conn.dialect.name == 'sqlite':
+        conn.execute(text('DROP TABLE IF EXISTS "{0}{1}"'.format(PREFIX, tname)))
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE \"{0}{1}\" USING fts5({2}, content='{1}', "
+            "content_rowid='pk', tokenize='unicode61 remove_diacritics 2')".format(
+                PREFIX, tname, ', '.join('"{0}"'.format(attr) for attr in attrs))))
+        conn.execute(text(
+            "INSERT INTO \"{0}{1}\"(\"{0}{1}\") VALUES ('rebuild')".format(PREFIX, tname)))
+    else:  # pragma: no cover
+        return False
+    get_cache('search_indexes').clear()
+    return True
+
+
+def indexed_attributes(model, attr):
+    """The names of the columns covered by the full-text index on the table holding the
+    column for ``attr`` - looked up once per process.
+
+    :return: `list` of attribute names, empty if there is no index.
+    """
+    bind = DBSession.get_bind()
+    tname = _table(model, attr).name
+    cache = get_cache('search_indexes')
+    key = (str(bind.url), PREFIX + tname)
+    res = cache.get(key)
+    if res is None:
+        if bind.dialect.name == 'postgresql':
+            comment = DBSession.execute(
+                text("SELECT col_description(a.attrelid, a.attnum) FROM pg_attribute AS a "
+                     "WHERE a.attrelid = to_regclass(:t) AND a.attname = 'fts' "
+                     "AND NOT a.attisdropped"),
+                dict(t=tname)).scalar()
+            res = (comment or '').split()
+        elif bind.dialect.name == 'sqlite':
+            res = [r[1] for r in DBSession.execute(
+                text('PRAGMA table_info("{0}{1}")'.format(PREFIX, tname)))]
+        else:  # pragma: no cover
+            res = []
+        cache.set(key, res)
+    return res
+
+
+def column_search(model, attr, qs):
+    """Full-text search condition on one column of a model.
+
+    All words in the search string must be contained in the column - as prefixes of words
+    in the column, to match the substring search semantics of
+    :func:`clld.db.util.icontains`.
+
+    :return: SQL expression or `None`, if the column is not covered by a full-text index \
+    or the search string is anchored with ``^`` or ``$``, which a full-text index cannot \
+    support.
+    """
+    attrs = indexed_attributes(model, attr)
+    words = re.findall(r'\w+', qs)
+    if attr not in attrs or not words or '^' in qs or '$' in qs:
+        return None
+    tname = _table(model, attr).name
+    if DBSession.get_bind().dialect.name == 'postgresql':
+        weight = WEIGHTS[attrs.index(attr)]
+        return literal_column('"{0}".fts'.format(tname)).op('@@')(func.to_tsquery(
+            'simple', ' & '.join('{0}:*{1}'.format(word, weight) for word in words)))
+    return _table(model, attr).c.pk.in_(
+        select(literal_column('rowid'))
+        .select_from(table(PREFIX + tname))
+        .where(literal_column('"{0}{1}"'.format(PREFIX, tname)).op('MATCH')(
+            '{{{0}}} : ({1})'.format(attr, ' AND '.join('"%s"*' % word for word in words)))))
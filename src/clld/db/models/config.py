@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Unicode
+from sqlalchemy import Column, Unicode, not_
 
 from clld.db.meta import Base, DBSession
+from clld.cache import get_cache
 
 __all__ = ('Config',)
 
@@ -12,9 +13,12 @@ class Config(Base):
     This model is also (ab-)used to implement a mechanism linking database
     objects of all types without enforcing referential intagrity, e.g. to model chains
     of superseding objects, where referred objects may become obsolete themselves.
+
+    Replacements can be looked up in a process-wide mapping, see :meth:`Config.replacements`
+    - which is what the app does if ``clld.replacements_cache = true``.
     """
 
-    key = Column(Unicode)
+    key = Column(Unicode, index=True)
     value = Column(Unicode)
 
     gone = '__gone__'
@@ -36,16 +40,39 @@ class Config(Base):
         return '__%s_%s__' % (name, id_)
 
     @classmethod
-    def get_replacement_id(cls, model, id_):
+    def get_replacement_id(cls, model, id_, cache=False):
         """Lookup and retrieve the ID of an object.
 
+        :param cache: flag signaling whether to look up the replacement in the cached mapping.
         :return: id of a resource registered as replacement for the specified resource.
         """
-        res = DBSession.query(cls.value)\
-            .filter(cls.key == cls.replacement_key(model, id_)).first()
+        key = cls.replacement_key(model, id_)
+        if cache:
+            return cls.replacements().get(key)
+        res = DBSession.query(cls.value).filter(cls.key == key).first()
         if res:
             return res[0]
 
+    @classmethod
+    def replacements(cls):
+        """Retrieve all replacement relations.
+
+        The mapping is loaded once per process - and re-loaded after
+        :func:`clld.cache.invalidate` was called.
+
+        :return: `dict` mapping replacement keys to ids.
+        """
+        from clld.db.util import DISTINCT_VALUES_KEY
+
+        cache = get_cache('replacements')
+        res = cache.get('replacements')
+        if res is None:
+            res = cache.set('replacements', dict(
+                DBSession.query(cls.key, cls.value)
+                .filter(cls.key.like('\\_\\_%\\_\\_', escape='\\'))
+                .filter(not_(cls.key.startswith(DISTINCT_VALUES_KEY, autoescape=True)))))
+        return res
+
     @classmethod
     def add_replacement(cls, replaced, replacement, model=None, session=None):
         """Method to register a replacement relation.
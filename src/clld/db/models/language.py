@@ -52,6 +52,7 @@ class Language(Base,
     latitude = Column(
         Float(),
         CheckConstraint('-90 <= latitude and latitude <= 90'),
+        index=True,
         doc='geographical latitude in WGS84')
     longitude = Column(
         Float(),
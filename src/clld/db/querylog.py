@@ -0,0 +1,150 @@
+"""
+Recording the SQL queries executed when serving DataTable data.
+
+Since the queries for DataTables are built dynamically from request parameters, it is
+hard to tell which query is responsible for a slow table page. If the app settings contain
+``clld.query_log = true``, the SQL statements executed for each DataTable XHR request are
+recorded - with bound parameters, number of rows and duration - in a ring buffer of size
+``clld.query_log_size`` (default 100), which can be inspected at ``/_query_log`` - from
+the local host only.
+
+For queries taking longer than ``clld.query_log_threshold`` seconds (default 0.5), the
+query plan - as reported by ``EXPLAIN`` or ``EXPLAIN QUERY PLAN`` on SQLite - is captured
+as well, and a warning is logged.
+"""
+import time
+import logging
+import datetime
+import threading
+import contextlib
+import collections
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from pyramid.settings import asbool
+
+from clld.db.meta import DBSession
+
+__all__ = ['enabled', 'record', 'label', 'explain', 'entries']
+
+log = logging.getLogger(__name__)
+
+_LOG = collections.deque(maxlen=100)
+_LOCK = threading.Lock()
+_STATE = threading.local()
+_LISTENING = []
+
+
+def enabled(req):
+    return asbool(req.registry.settings.get('clld.query_log', False))
+
+
+def entries():
+    """The recorded requests, most recent first.
+
+    :return: `list` of `dict`s.
+    """
+    with _LOCK:
+        return list(reversed(_LOG))
+
+
+def _recording():
+    return getattr(_STATE, 'queries', None) is not None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _recording():
+        conn.info.setdefault('clld_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _recording() and conn.info.get('clld_query_start'):
+        _STATE.queries.append(dict(
+            label=_STATE.label,
+            statement=statement,
+            parameters=parameters,
+            rows=None,
+            duration=time.perf_counter() - conn.info['clld_query_start'].pop(),
+            explain=None))
+
+
+def _listen():
+    with _LOCK:
+        if not _LISTENING:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _LISTENING.append(True)
+
+
+@contextlib.contextmanager
+def label(name):
+    """Label the queries executed within the context.
+
+    The context value is a `dict`; if a key ``rows`` is set in it, the value is stored as
+    number of rows for the first query executed within the context.
+    """
+    info = {}
+    if not _recording():
+        yield info
+        return
+    previous, start = _STATE.label, len(_STATE.queries)
+    _STATE.label = name
+    try:
+        yield info
+    finally:
+        _STATE.label = previous
+        if len(_STATE.queries) > start:
+            _STATE.queries[start]['rows'] = info.get('rows')
+
+
+def explain(statement, parameters):
+    """Retrieve the query plan for a statement.
+
+    :return: `list` of lines of the query plan.
+    """
+    conn = DBSession.connection()
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    return [
+        ' '.join('{0}'.format(v) for v in row)
+        for row in conn.exec_driver_sql(prefix + statement, parameters)]
+
+
+@contextlib.contextmanager
+def record(req):
+    """Record the queries executed within the context, if the query log is enabled."""
+    if not enabled(req) or _recording():
+        yield
+        return
+    _listen()
+    _STATE.queries, _STATE.label = [], None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        queries, _STATE.queries = _STATE.queries, None
+        settings = req.registry.settings
+        threshold = float(settings.get('clld.query_log_threshold', 0.5))
+        for query in queries:
+            if query['duration'] >= threshold:
+                try:
+                    query['explain'] = explain(query['statement'], query['parameters'])
+                except Exception as e:  # pragma: no cover
+                    query['explain'] = ['{0}: {1}'.format(e.__class__.__name__, e)]
+                log.warning(
+                    'slow query (%.3fs) for %s\n%s\n%s',
+                    query['duration'], req.url, query['statement'], '\n'.join(query['explain']))
+        _append(
+            dict(
+                url=req.url,
+                timestamp=datetime.datetime.now().isoformat(),
+                duration=time.perf_counter() - start,
+                queries=queries),
+            int(settings.get('clld.query_log_size', 100)))
+
+
+def _append(entry, size):
+    global _LOG
+    with _LOCK:
+        if _LOG.maxlen != size:
+            _LOG = collections.deque(_LOG, maxlen=size)
+        _LOG.append(entry)
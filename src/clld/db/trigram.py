@@ -0,0 +1,119 @@
+"""
+Indexes supporting infix search on text columns, i.e. filters using
+:func:`clld.db.util.icontains`, which cannot use regular indexes.
+
+- On PostgreSQL, a GIN index using the ``gin_trgm_ops`` operator class of the ``pg_trgm``
+  extension is used by the query planner for ``ILIKE`` conditions directly.
+- On SQLite (>= 3.34), an FTS5 table with ``trigram`` tokenizer is created as shadow table
+  of the column's table. Since ``LIKE`` conditions on this table can use the index,
+  :func:`icontains` selects matching rows by ``rowid`` from the shadow table - if it exists.
+
+Only plain table columns of mapped classes can be indexed; conditions for attributes of
+aliased classes or SQL expressions - e.g. ``column_property`` labels - fall back to
+:func:`clld.db.util.icontains`.
+
+.. note::
+
+    The SQLite shadow tables are not updated automatically, i.e. indexes must be re-created
+    - e.g. running ``clld create_search_indexes`` - after the data was changed.
+"""
+from sqlalchemy import Column, Table, Integer, select, table, column, literal_column, text
+from sqlalchemy.exc import OperationalError
+
+from clld.db.meta import DBSession
+from clld.db import util
+from clld.cache import get_cache
+
+__all__ = ['index_name', 'create_index', 'icontains']
+
+PREFIX = 'trgm_'
+
+
+def _column(col):
+    """Lookup the table column for a model attribute.
+
+    :return: `Column` instance or `None`, if the attribute does not map a table column.
+    """
+    if getattr(getattr(col, 'parent', None), 'is_aliased_class', False):
+        # Conditions on the table column would not refer to the alias.
+        return None
+    res = getattr(col, 'property', None) is not None \
+        and getattr(col.property, 'columns', None) and col.property.columns[0]
+    if isinstance(res, Column) and isinstance(res.table, Table):
+        return res
+
+
+def index_name(col):
+    """
+    :return: Name of the index for a model attribute, or `None` if it cannot be indexed.
+    """
+    col = _column(col)
+    if col is not None:
+        return '{0}{1}_{2}'.format(PREFIX, col.table.name, col.name)
+
+
+def _rowid(col):
+    pks = list(_column(col).table.primary_key.columns)
+    if len(pks) == 1 and isinstance(pks[0].type, Integer):
+        return pks[0]
+
+
+def create_index(col, conn):
+    """Create an index supporting infix search on a column.
+
+    :param col: model attribute, e.g. ``common.Language.name``.
+    :param conn: database connection.
+    :return: `True` if an index was created, `False` if the dialect - or the SQLite version \
+    - is not supported.
+    """
+    name, tcol = index_name(col), _column(col)
+    if tcol is None:
+        return False
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        conn.execute(text('CREATE INDEX IF NOT EXISTS "{0}" ON "{1}" USING gin ("{2}" gin_trgm_ops)'
+                          .format(name, tcol.table.name, tcol.name)))
+        return True
+    if conn.dialect.name == 'sqlite' and _rowid(col) is not None:
+        conn.execute(text('DROP TABLE IF EXISTS "{0}"'.format(name)))
+        try:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE \"{0}\" USING fts5(\"{1}\", content='{2}', "
+                "content_rowid='{3}', tokenize='trigram')".format(
+                    name, tcol.name, tcol.table.name, _rowid(col).name)))
+        except OperationalError:
+            # SQLite < 3.34 does not provide the trigram tokenizer.
+            return False
+        conn.execute(text("INSERT INTO \"{0}\"(\"{0}\") VALUES ('rebuild')".format(name)))
+        get_cache('search_indexes').clear()
+        return True
+    return False
+
+
+def _shadow_tables(bind):
+    """The names of the FTS5 shadow tables in a SQLite database - looked up once per process."""
+    cache = get_cache('search_indexes')
+    res = cache.get(str(bind.url))
+    if res is None:
+        res = cache.set(str(bind.url), {
+            r[0] for r in DBSession.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :p"),
+                dict(p=PREFIX + '%'))})
+    return res
+
+
+def icontains(col, qs):
+    """Infix search condition using a trigram index on SQLite, if available.
+
+    .. seealso:: :func:`clld.db.util.icontains`
+    """
+    bind = DBSession.get_bind()
+    if bind.dialect.name == 'sqlite' and _column(col) is not None \
+            and _rowid(col) is not None and index_name(col) in _shadow_tables(bind):
+        name = _column(col).name
+        shadow = table(index_name(col), column(name))
+        return _rowid(col).in_(
+            select(literal_column('rowid'))
+            .select_from(shadow)
+            .where(shadow.c[name].like(util.like_pattern(qs))))
+    return util.icontains(col, qs)
@@ -1,19 +1,27 @@
 """Database utilities."""
 import re
+import json
 import time
 import functools
+import contextlib
 
 from sqlalchemy import Integer
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, Session
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 from sqlalchemy.sql.expression import cast
 import transaction
 
 from clld.db.meta import DBSession
 from clld.db.models import common
+from clld.cache import get_cache
 
 __all__ = [
-    'as_int', 'contains', 'icontains', 'compute_language_sources', 'compute_number_of_values',
-    'get_distinct_values', 'page_query']
+    'as_int', 'contains', 'icontains', 'like_pattern', 'compute_language_sources',
+    'compute_number_of_values', 'get_distinct_values', 'store_distinct_values', 'page_query',
+    'estimate_count', 'streaming_session']
+
+#: Number of rows up to which rows are counted exactly when estimating counts.
+COUNT_CAP = 10000
 
 
 def as_int(col):
@@ -30,6 +38,14 @@ def _contains(method, col, qs):
 
     .. seealso:: https://www.postgresql.org/docs/9.1/static/functions-matching.html
     """
+    return getattr(col, method)(like_pattern(qs))
+
+
+def like_pattern(qs):
+    """Translate a search string into a pattern for the ``LIKE`` operator.
+
+    .. seealso:: :func:`clld.db.util.icontains`
+    """
     spattern = re.compile(r'^(\^|\\b)')
     epattern = re.compile(r'(\$|\\b)$')
 
@@ -43,7 +59,7 @@ def _contains(method, col, qs):
     # Prevent invalid LIKE patterns:
     if qs.endswith('\\') and not qs.endswith('\\\\'):
         qs += '\\'
-    return getattr(col, method)(prefix + qs + suffix)
+    return prefix + qs + suffix
 
 
 icontains = functools.partial(_contains, 'ilike')
@@ -80,8 +96,102 @@ def compute_number_of_values():
         valueset.update_jsondata(_number_of_values=len(valueset.values))
 
 
-def get_distinct_values(col, key=None):
-    return sorted((c for c, in DBSession.query(col).distinct() if c), key=key)
+#: Prefix of the keys of Config rows holding precomputed distinct values of a column.
+DISTINCT_VALUES_KEY = '__distinct_values_'
+#: Columns for which distinct values have been looked up in this process.
+DISTINCT_VALUES_COLUMNS = {}
+
+
+def _distinct_values_key(col, criterion=None):
+    if criterion is None:
+        return str(col)
+    try:
+        return '%s:%s' % (col, criterion.compile(compile_kwargs={'literal_binds': True}))
+    except Exception:  # pragma: no cover
+        compiled = criterion.compile()
+        return '%s:%s:%s' % (col, compiled, sorted(compiled.params.items()))
+
+
+def _query_distinct_values(col, criterion=None):
+    query = DBSession.query(col).distinct()
+    if criterion is not None:
+        query = query.filter(criterion)
+    return sorted(c for c, in query if c)
+
+
+def get_distinct_values(col, key=None, criterion=None, cache=False):
+    """Retrieve the sorted, distinct, non-empty values of a column.
+
+    If ``cache`` is true - e.g. because ``clld.distinct_values_cache`` is switched on in the
+    app settings - values are cached per process - and initialized from the values stored by
+    :func:`store_distinct_values`.
+
+    :param col: model attribute, e.g. ``common.Sentence.type``.
+    :param key: sort key function.
+    :param criterion: SQL expression to filter the rows by.
+    :param cache: flag signaling whether to use the cache.
+    :return: `list` of values.
+    """
+    ckey = _distinct_values_key(col, criterion)
+    if criterion is None:
+        DISTINCT_VALUES_COLUMNS.setdefault(ckey, col)
+    if not cache:
+        return sorted(_query_distinct_values(col, criterion), key=key)
+
+    cache = get_cache('distinct_values')
+    if DISTINCT_VALUES_KEY not in cache:
+        # Initialize the cache with the precomputed values:
+        for k, v in DBSession.query(common.Config.key, common.Config.value)\
+                .filter(common.Config.key.startswith(DISTINCT_VALUES_KEY)):
+            cache.set(k[len(DISTINCT_VALUES_KEY):-2], json.loads(v))
+        cache.set(DISTINCT_VALUES_KEY, True)
+    values = cache.get(ckey)
+    if values is None:
+        values = cache.set(ckey, _query_distinct_values(col, criterion))
+    return sorted(values, key=key)
+
+
+def store_distinct_values(*cols):
+    """Precompute the distinct values of columns, e.g. when priming the cache.
+
+    The values are stored as JSON in the Config table, thus only values of columns holding
+    strings or numbers are stored.
+
+    :param cols: model attributes - defaults to the columns for which distinct values have \
+    been looked up in the current process.
+    """
+    cols = cols or list(DISTINCT_VALUES_COLUMNS.values())
+    for col in cols:
+        ckey = _distinct_values_key(col)
+        values = _query_distinct_values(col)
+        if all(isinstance(v, (str, int, float)) for v in values):
+            key = '%s%s__' % (DISTINCT_VALUES_KEY, ckey)
+            DBSession.query(common.Config).filter(common.Config.key == key).delete()
+            DBSession.add(common.Config(key=key, value=json.dumps(values)))
+    DBSession.flush()
+    get_cache('distinct_values').clear()
+
+
+def estimate_count(query, cap=COUNT_CAP):
+    """Estimate the number of rows a query will return.
+
+    On PostgreSQL the row estimate of the query planner is used. Otherwise rows are counted
+    up to ``cap``, i.e. the result is exact for small results.
+
+    :param query: ``sqlalchemy.orm.query.Query`` instance.
+    :return: ``int``
+    """
+    conn = DBSession.connection()
+    if conn.dialect.name == 'postgresql':
+        # Expanding parameters - e.g. of IN clauses - must be rendered as individual ones:
+        compiled = query.statement.compile(
+            dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+        plan = conn.exec_driver_sql(
+            'EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return query.limit(cap).count()
 
 
 def page_query(q, n=1000, verbose=False, commit=False):
@@ -106,3 +216,26 @@ def page_query(q, n=1000, verbose=False, commit=False):
         s = e
         if not r:
             break
+
+
+@contextlib.contextmanager
+def streaming_session():
+    """Session to run queries in while a response body is served.
+
+    Response bodies served by generators are consumed after the view returned, i.e. outside
+    of the request's transaction. Thus, queries are run in a transaction on a connection
+    of their own - which is released when the context is left.
+
+    .. note:: If all connections of a thread share one DBAPI connection - e.g. for \
+    in-memory SQLite databases - there is no separate transaction, and `DBSession` is used.
+    """
+    bind = DBSession.get_bind()
+    if isinstance(bind.pool, (SingletonThreadPool, StaticPool)):
+        yield DBSession
+        return
+    with bind.connect() as conn, conn.begin():
+        session = Session(bind=conn)
+        try:
+            yield session
+        finally:
+            session.close()
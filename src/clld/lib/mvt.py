@@ -0,0 +1,112 @@
+"""
+Minimal encoder for `Mapbox Vector Tiles <https://github.com/mapbox/vector-tile-spec>`_.
+
+Since clld maps display point features only, just enough of the spec (version 2.1) is
+implemented to encode GeoJSON point features - with flat properties - as one layer of a
+tile in the web mercator tiling scheme used by Leaflet.
+"""
+import math
+import struct
+
+__all__ = ['EXTENT', 'project', 'encode']
+
+#: Size of the coordinate space of a tile.
+EXTENT = 4096
+#: Maximal latitude representable in web mercator.
+MAX_LATITUDE = 85.0511287798
+
+POINT = 1
+MOVE_TO = 1
+
+
+def _varint(n):
+    res = bytearray()
+    while True:
+        byte, n = n & 0x7f, n >> 7
+        if n:
+            res.append(byte | 0x80)
+        else:
+            res.append(byte)
+            return bytes(res)
+
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _field(number, value):
+    """Encode a field of a protobuf message.
+
+    :param value: `int` (encoded as varint) or `bytes` (encoded as length-delimited).
+    """
+    if isinstance(value, int):
+        return _varint(number << 3) + _varint(value)
+    return _varint(number << 3 | 2) + _varint(len(value)) + value
+
+
+def _packed(number, values):
+    return _field(number, b''.join(_varint(v) for v in values))
+
+
+def _value(value):
+    if isinstance(value, bool):
+        return _field(7, int(value))
+    if isinstance(value, int):
+        return _field(5, value) if value >= 0 else _field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _varint(3 << 3 | 1) + struct.pack('<d', value)
+    return _field(1, '{0}'.format(value).encode('utf8'))
+
+
+def project(lonlat, z, x, y, extent=EXTENT):
+    """Compute the coordinates of a point within a tile.
+
+    Tile column `x` is not wrapped, i.e. a tile with ``x >= 2 ** z`` covers longitudes
+    greater than 180 - as used for pacific centered maps.
+
+    :return: pair of `int`s; coordinates in ``[0, extent)`` are within the tile.
+    """
+    lon, lat = lonlat
+    n = 2 ** z
+    lat = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, lat)))
+    wx = (lon + 180) / 360 * n
+    wy = (1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2 * n
+    return int(math.floor((wx - x) * extent)), int(math.floor((wy - y) * extent))
+
+
+def encode(features, z, x, y, name='features', extent=EXTENT):
+    """Encode the GeoJSON point features located in a tile as vector tile.
+
+    Features outside the tile are skipped; properties with values which are not scalar
+    are dropped.
+
+    :param features: iterable of GeoJSON features as `dict`s.
+    :return: `bytes`.
+    """
+    keys, values, encoded = {}, {}, []
+
+    def index(d, key):
+        return d.setdefault(key, len(d))
+
+    for feature in features:
+        px, py = project(feature['geometry']['coordinates'], z, x, y, extent=extent)
+        if not (0 <= px < extent and 0 <= py < extent):
+            continue
+        tags = []
+        for key, value in sorted(feature.get('properties', {}).items()):
+            if isinstance(value, (str, int, float)):
+                tags.extend([
+                    index(keys, key), index(values, (type(value).__name__, value))])
+        encoded.append(_field(2, b''.join([
+            _packed(2, tags),
+            _field(3, POINT),
+            _packed(4, [MOVE_TO | 1 << 3, _zigzag(px), _zigzag(py)])])))
+
+    if not encoded:
+        return b''
+    layer = [_field(15, 2), _field(1, name.encode('utf8'))]
+    layer.extend(encoded)
+    layer.extend(_field(3, key.encode('utf8')) for key in keys)
+    layer.extend(_field(4, _value(value)) for _, value in values)
+    layer.append(_field(5, extent))
+    return _field(3, b''.join(layer))
@@ -1,15 +1,19 @@
 """Adapter registry to be included by pyramid configurator."""
 import os
+import collections
 
+from zope.interface import implementedBy, providedBy
 from pyramid.path import AssetResolver
 
 from clld import interfaces
+from clld.cache import LRUCache
 from clld.web.adapters.base import Index, Representation, Json
 from clld.web.adapters.geojson import (
     GeoJson, GeoJsonLanguages, GeoJsonParameter, GeoJsonParameterFlatProperties,
 )
 from clld.web.adapters.md import BibTex, TxtCitation
 from clld.web.adapters.rdf import Rdf, RdfIndex
+from clld.web.adapters.table import CsvIndex, TsvIndex, JsonLinesIndex
 from clld.web.adapters import biblio
 from clld.lib.rdf import FORMATS as RDF_NOTATIONS
 
@@ -37,6 +41,9 @@ def register_resource_adapters(config, rsc):
         if template_exists(config, name + '/index_html.mako'):
             # ... as html index
             specs.append((Index, 'text/html', 'html', name + '/index_html.mako', {}))
+        # ... as tabular data streamed from the DataTable
+        for cls in [CsvIndex, TsvIndex, JsonLinesIndex]:
+            config.register_adapter(cls, interface, name=cls.mimetype)
 
     # ... as RDF in various notations
     rdf_resource_template = name + '/rdf.mako'
@@ -121,19 +128,81 @@ def includeme(config):
     config.include(biblio)
 
 
-def get_adapters(interface, ctx, req):
+def _resource(ctx):
     # ctx can be a DataTable instance. In this case we create a resource by instantiating
     # the model class associated with the DataTable
-    resource = ctx.model() if hasattr(ctx, 'model') else ctx
-    return req.registry.getAdapters([resource], interface)
+    return ctx.model() if hasattr(ctx, 'model') else ctx
+
+
+def _adapter_table(interface, ctx, req):
+    """Lookup the adapter factories registered for a resource.
+
+    Since adapters are registered for interfaces implemented by model classes, lookups are
+    memoized per class - and state of the adapter registry.
+
+    :return: pair (`OrderedDict` mapping names to factories, `dict` mapping extensions to \
+    names) or `None`, if the resource provides interfaces not implemented by its class.
+    """
+    spec = implementedBy(ctx.model if hasattr(ctx, 'model') else ctx.__class__)
+    if not hasattr(ctx, 'model') and providedBy(ctx) is not spec:
+        return None
+    registry = req.registry
+    tables = registry.__dict__.setdefault('clld_adapter_tables', {})
+    key = (interface, spec, getattr(registry.adapters, '_generation', None))
+    if key not in tables:
+        factories = collections.OrderedDict(registry.adapters.lookupAll((spec,), interface))
+        extensions = {}
+        for name, factory in factories.items():
+            extensions.setdefault(getattr(factory, 'extension', None), name)
+        tables[key] = (factories, extensions)
+    return tables[key]
+
+
+def get_adapters(interface, ctx, req):
+    table = _adapter_table(interface, ctx, req)
+    if table is None:
+        return list(req.registry.getAdapters([_resource(ctx)], interface))
+    resource = _resource(ctx)
+    adapters = [(name, factory(resource)) for name, factory in table[0].items()]
+    return [(name, adapter) for name, adapter in adapters if adapter is not None]
+
+
+def _negotiate(req, names):
+    """Select the name of the adapter to use by content negotiation.
+
+    The results are cached per accept header and set of adapter names.
+    """
+    cache = req.registry.__dict__.setdefault('clld_negotiation', LRUCache(maxsize=1000))
+    key = (str(req.accept), tuple(names))
+    if key not in cache:
+        if not hasattr(req.accept, 'acceptable_offers'):  # pragma: no cover
+            # pre WebOb 1.8 (should be dropped once pyramid requires WebOb>=1.8):
+            res = req.accept.best_match(names)
+        else:
+            offers = req.accept.acceptable_offers(names)
+            res = offers[0][0] if offers else None
+        cache.set(key, res)
+    return cache.get(key)
 
 
 def get_adapter(interface, ctx, req, ext=None, name=None, getall=False):
     """Retrieve matching adapter.
 
+    Only the matching adapter is instantiated, unless all adapters are requested.
+
     :param interface: Interface class to lookup adapter for.
+    :param getall: If True, the list of all adapters for ``ctx`` is returned as well.
     """
-    adapters = dict(get_adapters(interface, ctx, req))
+    table = _adapter_table(interface, ctx, req)
+    adapters = None
+    if table is None or getall:
+        adapters = collections.OrderedDict(get_adapters(interface, ctx, req))
+        extensions = {}
+        for n, adapter in adapters.items():
+            extensions.setdefault(adapter.extension, n)
+        names = list(adapters.keys())
+    else:
+        extensions, names = table[1], list(table[0].keys())
 
     if not ext and not name and (
         not req.accept or ('*/*' in str(req.accept) and 'q=' not in str(req.accept))
@@ -145,27 +214,14 @@ def get_adapter(interface, ctx, req, ext=None, name=None, getall=False):
 
     if ext:
         # find adapter by requested file extension
-        adapter = [r for r in adapters.values() if r.extension == ext]
-    elif name:
-        # or by mime type
-        adapter = adapters.get(name)
-    else:
+        name = extensions.get(ext)
+    elif not name:
         # or by content negotiation
-        if not hasattr(req.accept, 'acceptable_offers'):  # pragma: no cover
-            # pre WebOb 1.8 (should be dropped once pyramid requires WebOb>=1.8):
-            adapter = adapters.get(req.accept.best_match(adapters.keys()))
-        else:
-            try:
-                adapter = adapters.get(req.accept.acceptable_offers(list(adapters.keys()))[0][0])
-            except IndexError:
-                adapter = None
+        name = _negotiate(req, names)
 
     res = None
-    if isinstance(adapter, list):
-        if adapter:
-            res = adapter[0]
-    else:
-        res = adapter
+    if name in names:
+        res = adapters[name] if adapters is not None else table[0][name](_resource(ctx))
     if getall:
-        res = (res, adapters.values())
+        res = (res, list(adapters.values()))
     return res
@@ -1,21 +1,66 @@
 """
 Functionality to serialize clld objects as GeoJSON.
 
+All GeoJSON adapters support restricting the features to a viewport, passing the
+parameters
+
+- ``bbox``: bounding box ``west,south,east,north`` in degrees (as returned by Leaflet's
+  ``LatLngBounds.toBBoxString``), and
+- ``z``: the zoom level of the map; at zoom levels below :data:`CLUSTER_MAX_ZOOM`, features
+  close to each other are merged into cluster features, which have the properties
+  ``cluster`` (`True`), ``point_count`` and ``label``.
+
+If any of these is given, the GeoJSON for an index of languages is no longer truncated.
+
+The features are also served as vector tiles, see :func:`clld.web.views.tiles`.
+
+If the setting ``clld.geojson_dir`` is specified, the GeoJSON for parameters is served
+from files precomputed by the ``clld create_geojson`` command - if available for the
+requested URL and the current :func:`clld.cache.dataset_version`. Behind nginx, the
+files can be served by nginx - setting ``clld.geojson_accel_redirect`` to the URL prefix
+of an internal location like
+
+.. code-block:: nginx
+
+    location /_geojson/ {
+        internal;
+        alias <clld.geojson_dir>/;
+        gzip_static on;
+    }
+
 .. seealso:: http://geojson.org/
 """
 import json
+import hashlib
+import pathlib
 import itertools
+import collections
 
 from zope.interface import implementer
+from pyramid.response import Response, FileResponse
 from pyramid.renderers import render as pyramid_render
+from pyramid.settings import asbool
+from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 from clldutils.misc import nfilter
 
 from clld.web.adapters.base import Renderable
-from clld.web.icon import Icon
+from clld.web.icon import Icon, MapMarker
 from clld import interfaces
+from clld.cache import dataset_version
 from clld.db.meta import DBSession
-from clld.db.models.common import ValueSet, Value, Language
+from clld.db.util import streaming_session
+from clld.db.models.common import ValueSet, Value, Language, DomainElement
+from clld.lib import mvt
+
+#: Number of features serialized - and written to the response - at once, when streaming.
+BATCH_SIZE = 500
+#: Number of languages in the GeoJSON for an index of languages, if no viewport is given.
+LIMIT = 5000
+#: Features are clustered at zoom levels below this.
+CLUSTER_MAX_ZOOM = 8
+#: Size in pixels of the cells of the grid used for clustering.
+CLUSTER_RADIUS = 40
 
 
 _PACIFIC_CENTERED = False
@@ -75,6 +120,128 @@ def get_lonlat(obj):
     return longitude, latitude
 
 
+def get_bbox(req):
+    """The bounding box passed as request parameter ``bbox``.
+
+    :return: tuple (west, south, east, north) or `None`.
+    """
+    try:
+        west, south, east, north = [float(n) for n in req.params['bbox'].split(',')]
+    except (KeyError, ValueError):
+        return None
+    return west, south, east, north
+
+
+def get_zoom(req):
+    """The zoom level passed as request parameter ``z`` - or as part of a vector tile URL.
+
+    :return: `int` or `None`.
+    """
+    z = req.params.get('z', (getattr(req, 'matchdict', None) or {}).get('z'))
+    try:
+        return max(0, int(z))
+    except (TypeError, ValueError):
+        return None
+
+
+def in_bbox(lonlat, bbox):
+    if not bbox:
+        return True
+    west, south, east, north = bbox
+    return west <= lonlat[0] <= east and south <= lonlat[1] <= north
+
+
+def cluster(features, zoom, radius=CLUSTER_RADIUS):
+    """Merge point features which are close to each other at a zoom level.
+
+    The features are assigned to the cells of a grid with cells of `radius` pixels at zoom
+    level `zoom` - in web mercator projection, as displayed by the map; features with the
+    same icon sharing a cell with others are replaced by one cluster feature - with this
+    icon - located at their center.
+
+    :return: `list` of features.
+    """
+    if zoom is None or zoom >= CLUSTER_MAX_ZOOM:
+        return list(features)
+    cells, icons = collections.OrderedDict(), {}
+    for feature in features:
+        icon = feature['properties'].get('icon')
+        x, y = mvt.project(feature['geometry']['coordinates'], zoom, 0, 0, extent=256)
+        cells.setdefault(
+            (x // radius, y // radius, icons.setdefault(icon, len(icons)), icon), []
+        ).append(feature)
+
+    res = []
+    for (x, y, i, icon), items in cells.items():
+        if len(items) == 1:
+            res.append(items[0])
+            continue
+        properties = {
+            'cluster': True,
+            'point_count': len(items),
+            'label': '{0} languages'.format(len(items)),
+        }
+        if icon:
+            properties['icon'] = icon
+        res.append({
+            'type': 'Feature',
+            'id': 'cluster-{0}-{1}-{2}-{3}'.format(zoom, x, y, i),
+            'properties': properties,
+            'geometry': {'type': 'Point', 'coordinates': [
+                sum(f['geometry']['coordinates'][i] for f in items) / len(items)
+                for i in range(2)]}})
+    return res
+
+
+def precomputed_path(directory, req, version=None):
+    """Path of the file with the precomputed GeoJSON for a request URL.
+
+    Since URLs in the precomputed GeoJSON are host-relative, the path depends on path and
+    query string of the URL only.
+
+    :param directory: the directory specified as ``clld.geojson_dir``.
+    :param req: webob request.
+    :param version: dataset version, defaults to :func:`clld.cache.dataset_version`.
+    """
+    key = json.dumps([req.path, sorted(req.GET.items())])
+    return pathlib.Path(directory).joinpath(
+        version or dataset_version(), hashlib.md5(key.encode('utf8')).hexdigest() + '.geojson')
+
+
+def precomputed_response(req, mimetype):
+    """Response serving precomputed GeoJSON, if available.
+
+    Precompressed variants of the file are served, if acceptable for the client.
+
+    :return: `Response` instance or `None`.
+    """
+    settings = req.registry.settings
+    if not settings.get('clld.geojson_dir'):
+        return None
+    path = precomputed_path(settings['clld.geojson_dir'], req)
+    if not path.exists():
+        return None
+
+    content_type = '{0}; charset=utf-8'.format(mimetype)
+    if settings.get('clld.geojson_accel_redirect'):
+        res = Response(content_type=content_type)
+        res.headers['X-Accel-Redirect'] = '{0}/{1}/{2}'.format(
+            settings['clld.geojson_accel_redirect'].rstrip('/'), path.parent.name, path.name)
+        return res
+
+    encodings = []
+    if 'Accept-Encoding' in req.headers:
+        encodings = [e for e, _ in req.accept_encoding.acceptable_offers(['br', 'gzip'])]
+    for encoding, suffix in [('br', '.br'), ('gzip', '.gz'), (None, '')]:
+        if encoding is None or encoding in encodings:
+            fname = path.parent.joinpath(path.name + suffix)
+            if fname.exists():
+                res = FileResponse(
+                    str(fname), request=req, content_type=content_type, content_encoding=encoding)
+                res.vary = ('Accept', 'Accept-Encoding')
+                return res
+
+
 def get_feature(obj, lonlat=None, **properties):
     res = {
         'type': 'Feature',
@@ -126,7 +293,14 @@ class GeoJson(Renderable):
         :return: generator object.
         """
         if interfaces.IDataTable.providedBy(ctx) and ctx.model == Language:
-            return ctx.get_query(limit=5000)
+            bbox = get_bbox(req)
+            if bbox is None and get_zoom(req) is None:
+                return ctx.get_query(limit=LIMIT)
+            # The viewport limits the number of features, thus we return all languages:
+            query = ctx.get_query(limit=None)
+            if bbox:
+                query = query.filter(Language.latitude.between(bbox[1], bbox[3]))
+            return query
         if hasattr(ctx, 'languages'):
             return ctx.languages
         if interfaces.ILanguage.providedBy(ctx):
@@ -143,11 +317,12 @@ class GeoJson(Renderable):
 
     def get_features(self, ctx, req):
         map_marker = req.registry.getUtility(interfaces.IMapMarker)
+        bbox = get_bbox(req)
 
         for feature in self.feature_iterator(ctx, req):
             language = self.get_language(ctx, req, feature)
             lonlat = get_lonlat(language)
-            if lonlat:
+            if lonlat and in_bbox(lonlat, bbox):
                 properties = self.feature_properties(ctx, req, feature) or {}
                 properties.setdefault('icon', map_marker(feature, req))
                 properties.setdefault('language', language)
@@ -157,13 +332,53 @@ class GeoJson(Renderable):
         res = {
             'type': 'FeatureCollection',
             'properties': self._featurecollection_properties(ctx, req),
-            'features': list(self.get_features(ctx, req))}
+            'features': cluster(self.get_features(ctx, req), get_zoom(req))}
         return pyramid_render('json', res, request=req) if dump else res
 
 
 class GeoJsonParameter(GeoJson):
 
-    """Render a parameter's values as geojson feature collection."""
+    """Render a parameter's values as geojson feature collection.
+
+    If the app settings contain ``clld.geojson_streaming = true`` - and unless subclasses
+    override one of the methods determining the features (or the registered map marker
+    cannot compute icons from plain data, see :meth:`clld.web.icon.MapMarker.get_row_icon`) -
+    the data is selected with one SQL query for the required columns only - see
+    :meth:`get_rows` - and the FeatureCollection is streamed. Feature properties can then be
+    amended by overriding :meth:`row_properties`. Setting `__streaming__` to `True` or
+    `False` overrides the setting and the automatic detection.
+
+    .. note:: Streamed features carry a reduced set of properties: The objects for values
+        and language only have the attributes selected by :meth:`get_rows` - i.e. not the
+        full serialization provided by their ``__json__`` methods.
+    """
+
+    __streaming__ = None
+
+    def streaming(self, req):
+        """Whether to render the features from plain rows."""
+        if self.__streaming__ is not None:
+            return self.__streaming__
+        if not asbool(req.registry.settings.get('clld.geojson_streaming')):
+            return False
+        cls = type(self)
+        if any(getattr(cls, name) is not getattr(GeoJsonParameter, name) for name in [
+            'get_query',
+            'feature_iterator',
+            'get_language',
+            'feature_properties',
+            'get_features',
+            'render',
+        ]):
+            return False
+        marker = req.registry.getUtility(interfaces.IMapMarker)
+        if not isinstance(marker, MapMarker):
+            return False
+        if type(marker).get_row_icon is not MapMarker.get_row_icon:
+            return True
+        # Without explicit support, only markers computing icons as MapMarker does qualify:
+        return type(marker).__call__ is MapMarker.__call__ \
+            and type(marker).get_icon is MapMarker.get_icon
 
     def featurecollection_properties(self, ctx, req):
         marker = req.registry.getUtility(interfaces.IMapMarker)
@@ -179,6 +394,154 @@ class GeoJsonParameter(GeoJson):
             .filter(ValueSet.parameter_pk == ctx.pk)\
             .options(joinedload(ValueSet.values), joinedload(ValueSet.language))
 
+    def get_rows(self, ctx, req):
+        """The SQL query selecting the data for the features.
+
+        :return: select statement, yielding one row per value - ordered by valueset.
+        """
+        vs, lang, val, de = [
+            m.__table__ for m in [ValueSet, Language, Value, DomainElement]]
+        stmt = select(
+            vs.c.pk.label('valueset_pk'),
+            lang.c.id.label('language_id'),
+            lang.c.name.label('language_name'),
+            lang.c.latitude,
+            lang.c.longitude,
+            val.c.id.label('value_id'),
+            val.c.name.label('value_name'),
+            de.c.id.label('domainelement_id'),
+            de.c.name.label('domainelement_name'),
+            de.c.number.label('domainelement_number'),
+        ).select_from(
+            vs.join(lang, vs.c.language_pk == lang.c.pk)
+            .join(val, val.c.valueset_pk == vs.c.pk)
+            .outerjoin(de, val.c.domainelement_pk == de.c.pk)
+        ).where(
+            vs.c.parameter_pk == ctx.pk,
+            lang.c.latitude.isnot(None),
+            lang.c.longitude.isnot(None),
+        ).order_by(vs.c.pk, val.c.frequency.desc(), val.c.confidence, val.c.pk)
+        bbox = get_bbox(req)
+        if bbox:
+            stmt = stmt.where(lang.c.latitude.between(bbox[1], bbox[3]))
+        if req.params.get('domainelement'):
+            stmt = stmt.where(vs.c.pk.in_(
+                select(val.c.valueset_pk)
+                .select_from(val.join(de, val.c.domainelement_pk == de.c.pk))
+                .where(de.c.id == req.params['domainelement'])))
+        return stmt
+
+    def row_properties(self, ctx, req, rows):
+        """override to add properties to features rendered from rows.
+
+        :param rows: list of rows for the values of one valueset.
+        """
+        return {}
+
+    def iter_row_features(self, ctx, req, stmt, session=None):
+        """
+        :param session: session to execute the statement in - defaults to `DBSession`.
+        """
+        marker = req.registry.getUtility(interfaces.IMapMarker)
+        bbox = get_bbox(req)
+        icons = {}
+
+        def icon_url(name):
+            if name not in icons:
+                icon = req.registry.queryUtility(interfaces.IIcon, name) or Icon(name)
+                icons[name] = icon.url(req)
+            return icons[name]
+
+        for _, rows in itertools.groupby(
+                (session or DBSession).execute(stmt.execution_options(stream_results=True)),
+                lambda r: r.valueset_pk):
+            rows = list(rows)
+            language = rows[0]
+            lonlat = get_lonlat((language.longitude, language.latitude))
+            if not in_bbox(lonlat, bbox):
+                continue
+            properties = {
+                'values': [{
+                    'id': row.value_id,
+                    'name': row.value_name,
+                    'domainelement': {
+                        'id': row.domainelement_id,
+                        'name': row.domainelement_name,
+                        'number': row.domainelement_number,
+                    } if row.domainelement_id else None} for row in rows],
+                'label': ', '.join(nfilter(row.value_name for row in rows))
+                or language.language_name,
+                'icon': icon_url(marker.get_row_icon(rows, req)),
+                'language': {
+                    'id': language.language_id,
+                    'name': language.language_name,
+                    'latitude': language.latitude,
+                    'longitude': language.longitude},
+                'name': language.language_name,
+            }
+            properties.update(self.row_properties(ctx, req, rows))
+            yield {
+                'type': 'Feature',
+                'id': language.language_id,
+                'properties': properties,
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': lonlat}}
+
+    def iter_chunks(self, ctx, req):
+        """Serialize the FeatureCollection incrementally.
+
+        The featurecollection properties and the query are determined right away, the
+        features are selected and serialized when the generator is consumed.
+        """
+        head = '{"type": "FeatureCollection", "properties": %s, "features": [' % (
+            pyramid_render('json', self._featurecollection_properties(ctx, req), request=req))
+        stmt = self.get_rows(ctx, req)
+
+        zoom = get_zoom(req)
+
+        def chunks():
+            # The generator may be consumed after the view returned:
+            with streaming_session() as session:
+                batch = [head]
+                features = self.iter_row_features(ctx, req, stmt, session=session)
+                if zoom is not None:
+                    # Clustering requires all features:
+                    features = cluster(features, zoom)
+                for i, feature in enumerate(features):
+                    batch.append((', ' if i else '') + json.dumps(feature))
+                    if len(batch) >= BATCH_SIZE:
+                        yield ''.join(batch)
+                        batch = []
+                batch.append(']}')
+                yield ''.join(batch)
+
+        return chunks()
+
+    def render_to_response(self, ctx, req):
+        res = precomputed_response(req, str(self.send_mimetype or self.mimetype))
+        if res is not None:
+            return res
+        if not self.streaming(req):
+            return GeoJson.render_to_response(self, ctx, req)
+        res = Response(
+            app_iter=(chunk.encode('utf8') for chunk in self.iter_chunks(ctx, req)),
+            content_type=str(self.send_mimetype or self.mimetype),
+            charset='utf-8')
+        res.vary = str('Accept')
+        return res
+
+    def render(self, ctx, req, dump=True):
+        if not self.streaming(req):
+            return GeoJson.render(self, ctx, req, dump=dump)
+        if dump:
+            return ''.join(self.iter_chunks(ctx, req))
+        return {
+            'type': 'FeatureCollection',
+            'properties': self._featurecollection_properties(ctx, req),
+            'features': cluster(
+                self.iter_row_features(ctx, req, self.get_rows(ctx, req)), get_zoom(req))}
+
     def feature_iterator(self, ctx, req):
         de = req.params.get('domainelement')
         if de:
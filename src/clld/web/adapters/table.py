@@ -0,0 +1,119 @@
+"""Streaming exports of the items of a DataTable as tabular data.
+
+The exports contain all items matching the filters of the current table view - sorted as
+requested - i.e. they are not restricted to one page or to
+:data:`clld.web.datatables.base.DISPLAY_LIMIT` items. Rows are fetched from the database
+in batches and written to the response incrementally, thus memory use does not depend on
+the number of rows.
+"""
+import io
+import csv
+import json
+
+from markupsafe import Markup
+from pyramid.response import Response
+
+from clld.db.util import streaming_session
+from clld.web.adapters.base import Index
+
+__all__ = ['TableIndex', 'CsvIndex', 'TsvIndex', 'JsonLinesIndex']
+
+#: Number of rows fetched from the database - and written to the response - at once.
+BATCH_SIZE = 500
+
+
+def text(value):
+    """Plain text for the - possibly HTML - value of a column."""
+    if value is None:
+        return ''
+    if hasattr(value, '__html__'):
+        return Markup(value).striptags()
+    return '{0}'.format(value)
+
+
+class TableIndex(Index):
+
+    """Base class for adapters streaming the rows of a DataTable.
+
+    Subclasses must implement `writer`.
+    """
+
+    header = True
+
+    def writer(self, fp, titles):
+        """
+        :param fp: file-like object to write to.
+        :param titles: list of column titles.
+        :return: callable accepting a list of values for one row.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    def render_to_response(self, ctx, req):
+        cols = [col for col in ctx.cols if col.exportable]
+        # The query is created - and the filters are checked - within the request:
+        query = ctx.get_query(limit=None).options(*ctx.load_only_options())
+        res = Response(
+            app_iter=self.iter_chunks(query, cols),
+            content_type=str(self.send_mimetype or self.mimetype),
+            charset='utf-8')
+        res.vary = str('Accept')
+        res.content_disposition = 'attachment; filename="{0}.{1}"'.format(
+            ctx.eid, self.extension)
+        return res
+
+    def iter_chunks(self, query, cols):
+        # The rows are fetched when the response body is served, i.e. after the view
+        # returned:
+        with streaming_session() as session:
+            fp = io.StringIO()
+            titles = [text(col.js_args['sTitle']) for col in cols]
+            write = self.writer(fp, titles)
+            if self.header:
+                write(titles)
+            for i, item in enumerate(
+                    query.with_session(session).yield_per(BATCH_SIZE), start=1):
+                write([text(col.format(item)) for col in cols])
+                if i % BATCH_SIZE == 0:
+                    yield fp.getvalue().encode('utf8')
+                    fp.seek(0)
+                    fp.truncate()
+            yield fp.getvalue().encode('utf8')
+
+
+class CsvIndex(TableIndex):
+
+    """Comma-separated values."""
+
+    name = 'CSV'
+    mimetype = 'text/csv'
+    extension = 'csv'
+    delimiter = ','
+
+    def writer(self, fp, titles):
+        return csv.writer(fp, delimiter=self.delimiter).writerow
+
+
+class TsvIndex(CsvIndex):
+
+    """Tab-separated values."""
+
+    name = 'TSV'
+    mimetype = 'text/tab-separated-values'
+    extension = 'tsv'
+    delimiter = '\t'
+
+
+class JsonLinesIndex(TableIndex):
+
+    """JSON Lines, i.e. one JSON object per row, mapping column titles to values."""
+
+    name = 'JSON Lines'
+    mimetype = 'application/x-ndjson'
+    extension = 'jsonl'
+    header = False
+
+    def writer(self, fp, titles):
+        def write(values):
+            fp.write(json.dumps(dict(zip(titles, values)), ensure_ascii=False))
+            fp.write('\n')
+        return write
@@ -9,7 +9,7 @@ import collections
 import urllib.parse
 
 from sqlalchemy import engine_from_config
-from sqlalchemy.orm import joinedload, undefer
+from sqlalchemy.orm import joinedload, undefer, Session
 from sqlalchemy.exc import NoResultFound
 
 from webob.request import Request as WebobRequest
@@ -18,23 +18,28 @@ from pyramid.httpexceptions import HTTPNotFound, HTTPMovedPermanently, HTTPGone
 from pyramid import events
 from pyramid.request import Request, reify
 from pyramid.interfaces import IRoutesMapper
+from pyramid.tweens import INGRESS
+from pyramid.config import PHASE1_CONFIG
 from pyramid.asset import abspath_from_asset_spec
 from pyramid.renderers import JSON, JSONP
 from pyramid.settings import asbool
+from pyramid.traversal import PATH_SAFE, quote_path_segment
+from pyramid.encode import urlencode
 from clldutils.path import md5, git_describe
 
 import clld
 from clld.config import get_config
+from clld.cache import cache_enabled, get_cache, dataset as dataset_snapshot
 from clld.db.meta import DBSession, Base
 from clld.db.models import common
-from clld import Resource, RESOURCES
+from clld import Resource, RESOURCES, resource_for
 from clld import interfaces
 from clld.web.adapters import get_adapters
 from clld.web.adapters import geojson, register_resource_adapters
 from clld.web.adapters.base import adapter_factory
 from clld.web.views import (
-    index_view, resource_view, _raise, _ping, js, unapi, xpartial, redirect, gone,
-    select_combination,
+    index_view, resource_view, _raise, _ping, _query_log, js, routes, icon, unapi, xpartial,
+    redirect, gone, select_combination, tiles,
 )
 from clld.web.views.olac import olac, OlacConfig
 from clld.web.views.sitemap import robots, sitemapindex, sitemap, resourcemap
@@ -48,6 +53,35 @@ from clld.web import assets
 assert clld
 assert assets
 
+#: Pattern of the routes for vector tiles, appended to the patterns of resources and indexes.
+TILES_PATTERN = r'/tiles/{z:\d+}/{x:-?\d+}/{y:\d+}.mvt'
+
+ROUTE_PARAMETER = re.compile(r'{(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)(:[^{}]+)?}')
+
+
+def compile_route_pattern(pattern):
+    """Compile a route pattern into a function generating (quoted) paths by string
+    substitution.
+
+    :return: callable accepting a `dict` of replacement values, or `None` if the pattern is \
+    not simple enough, i.e. contains a remainder or nested braces.
+    """
+    if not pattern.startswith('/'):
+        pattern = '/' + pattern
+    literals = ROUTE_PARAMETER.split(pattern)[::3]
+    names = [m.group('name') for m in ROUTE_PARAMETER.finditer(pattern)]
+    if '*' in pattern or any('{' in s or '}' in s for s in literals):
+        return None
+    literals = [quote_path_segment(s, safe='/') for s in literals]
+
+    def generate(kw):
+        res = [literals[0]]
+        for name, literal in zip(names, literals[1:]):
+            res.append(quote_path_segment('{0}'.format(kw[name]), safe=PATH_SAFE))
+            res.append(literal)
+        return ''.join(res)
+    return generate
+
 
 class ClldRequest(Request):
 
@@ -78,7 +112,12 @@ class ClldRequest(Request):
         Properties of the :py:class:`clld.db.models.common.Dataset` object an
         application serves are used in various places, so we want to have a reference to
         it.
+
+        If the ``dataset`` cache is enabled, a process-wide snapshot of the object is
+        returned, see :func:`clld.cache.dataset`.
         """
+        if cache_enabled(self, 'dataset'):
+            return dataset_snapshot()
         return self.db.query(common.Dataset).options(undefer('updated')).first()
 
     @property
@@ -125,10 +164,7 @@ class ClldRequest(Request):
             pair (route_name, kw) suitable as arguments for the Request.route_url method.
         """
         if rsc is None:
-            for _rsc in RESOURCES:
-                if _rsc.interface.providedBy(obj):
-                    rsc = _rsc
-                    break
+            rsc = resource_for(obj)
             assert rsc
 
         route = rsc.name
@@ -174,7 +210,30 @@ class ClldRequest(Request):
         :return: URL
         """
         route, kw = self._route(obj, rsc, **kw)
-        return self.route_url(route, **kw)
+        return self._generate(route, kw) or self.route_url(route, **kw)
+
+    def _generate(self, route, kw, path_only=False):
+        """Generate the URL (or path) for a route using a compiled route pattern.
+
+        Since resource URLs are created in big numbers, e.g. for each row of a DataTable,
+        we bypass pyramid's generic URL generation for simple cases.
+
+        :return: URL or `None`, if the URL must be generated by pyramid.
+        """
+        if any(k.startswith('_') for k in kw):
+            return
+        generators = self.registry.__dict__.setdefault('clld_route_generators', {})
+        if route not in generators:
+            _route = self.registry.getUtility(IRoutesMapper).get_route(route)
+            generators[route] = compile_route_pattern(_route.pattern) \
+                if _route is not None and _route.pregenerator is None else None
+        if generators[route] is None:
+            return
+        res = (self.script_name if path_only else self.application_url) \
+            + generators[route](kw)
+        if '__locale__' in self.params:
+            res += '?' + urlencode({'__locale__': self.params['__locale__']})
+        return res
 
     def route_url(self, route, *args, **kw):
         """Facade for Request.route_url."""
@@ -187,7 +246,7 @@ class ClldRequest(Request):
     def resource_path(self, obj, rsc=None, **kw):
         """Determine the path component of a Resource's URL."""
         route, kw = self._route(obj, rsc, **kw)
-        return self.route_path(route, **kw)
+        return self._generate(route, kw, path_only=True) or self.route_path(route, **kw)
 
     def file_ospath(self, file_):
         if 'clld.files' in self.registry.settings:
@@ -268,12 +327,50 @@ class CtxFactoryQuery(object):
         return query.one()
 
 
-def ctx_factory(model, type_, req):
+def ctx_cache_enabled(req):
+    """Check whether resource contexts are cached.
+
+    The ``ctx`` cache is never used if templates are reloaded, i.e. in development.
+    """
+    return cache_enabled(req, 'ctx') \
+        and not asbool(req.registry.settings.get('pyramid.reload_templates'))
+
+
+def query_ctx(model, req):
+    """Retrieve the resource requested, using the ICtxFactoryQuery utility.
+
+    If the ``ctx`` cache is enabled, fully loaded resources are cached as detached object
+    graphs, which are merged into the session of subsequent requests without querying the
+    database. The cache is bounded by the total number of objects in the cached graphs,
+    configurable as ``clld.ctx_cache_size`` setting.
+    """
+    ctx_query = req.registry.getUtility(interfaces.ICtxFactoryQuery)
+    if not ctx_cache_enabled(req):
+        return ctx_query(model, req)
+
+    cache = get_cache(
+        'ctx', maxsize=int(req.registry.settings.get('clld.ctx_cache_size', 100000)))
+    key = (model.__module__, model.__name__, req.matchdict['id'])
+    cached = cache.get(key)
+    if cached is None:
+        ctx = ctx_query(model, req)
+        # We copy the loaded object graph into a separate session, to detach it:
+        session = Session()
+        cached = session.merge(ctx, load=False)
+        cache.set(key, cached, size=len(session.identity_map))
+        session.close()
+        return ctx
+    return req.db.merge(cached, load=False)
+
+
+def ctx_factory(model, type_, req, name=None):
     """Factory function for request contexts.
 
     The context of a request is either a single model instance or an instance of
     DataTable incorporating all information to retrieve an appropriately filtered list
     of model instances.
+
+    :param name: Name of the DataTable, if it differs from the name of the matched route.
     """
     def replacement(id_):
         raise HTTPMovedPermanently(
@@ -281,7 +378,7 @@ def ctx_factory(model, type_, req):
 
     if type_ == 'index':
         datatable = req.registry.getUtility(
-            interfaces.IDataTable, name=req.matched_route.name)
+            interfaces.IDataTable, name=name or req.matched_route.name)
         return datatable(req, model)
 
     try:
@@ -290,14 +387,15 @@ def ctx_factory(model, type_, req):
         elif model == common.Combination:
             ctx = common.Combination.get(req.matchdict['id'])
         else:
-            ctx = req.registry.getUtility(interfaces.ICtxFactoryQuery)(model, req)
+            ctx = query_ctx(model, req)
             if ctx.replacement_id:
                 return replacement(ctx.replacement_id)
         ctx.metadata = get_adapters(interfaces.IMetadata, ctx, req)
         return ctx
     except NoResultFound:
         if req.matchdict.get('id'):
-            replacement_id = common.Config.get_replacement_id(model, req.matchdict['id'])
+            replacement_id = common.Config.get_replacement_id(
+                model, req.matchdict['id'], cache=cache_enabled(req, 'replacements'))
             if replacement_id:
                 if replacement_id == common.Config.gone:
                     raise HTTPGone()
@@ -390,6 +488,26 @@ def add_route_and_view(config, route_name, route_pattern, view, **kw):
     config.add_view(view, route_name=route_name + '_alt', **kw)
 
 
+def add_tiles_route(config, route_name, route_pattern, interface, to_, factory):
+    """Add a route serving vector tiles below the (effective) pattern of another route.
+
+    Since GeoJSON adapters may be registered after the resource, the route is only added
+    when the configuration is committed - and only if such an adapter exists.
+    """
+    route_patterns = config.registry.settings.get('route_patterns', {})
+    route_pattern = route_patterns.get(route_name, route_pattern)
+
+    def register():
+        if any(getattr(adapter, 'extension', None) == geojson.GeoJson.extension
+               for _, adapter in config.registry.adapters.lookupAll((interface,), to_)):
+            config.add_route(
+                route_name + '_tiles', route_pattern + TILES_PATTERN, factory=factory)
+            config.add_view(tiles, route_name=route_name + '_tiles')
+
+    # Actions added by `register` must not be ordered before it:
+    config.action(None, register, order=PHASE1_CONFIG)
+
+
 def register_resource_routes_and_views(config, rsc):
     kw = dict(factory=functools.partial(ctx_factory, rsc.model, 'rsc'))
     if rsc.model == common.Dataset:
@@ -399,12 +517,22 @@ def register_resource_routes_and_views(config, rsc):
         pattern = r'/%s/{id:[^/\.]+}' % rsc.plural
 
     config.add_route_and_view(rsc.name, pattern, resource_view, **kw)
+    if rsc.model != common.Dataset:
+        add_tiles_route(
+            config, rsc.name, pattern, rsc.interface, interfaces.IRepresentation, kw['factory'])
     if rsc.with_index:
         config.add_route_and_view(
             rsc.plural,
             '/%s' % rsc.plural,
             index_view,
             factory=functools.partial(ctx_factory, rsc.model, 'index'))
+        add_tiles_route(
+            config,
+            rsc.plural,
+            '/%s' % rsc.plural,
+            rsc.interface,
+            interfaces.IIndex,
+            functools.partial(ctx_factory, rsc.model, 'index', name=rsc.plural))
 
 
 def register_resource(config, name, model, interface, with_index=False, **kw):
@@ -563,6 +691,11 @@ def includeme(config):
     config.add_static_view('static', '%s:static' % root_package)
 
     config.add_route_and_view('_js', '/_js', js, http_cache=3600)
+    config.add_route_and_view('_routes', '/_routes.{fingerprint}.js', routes)
+    config.add_route_and_view('_icon', '/_icon/{spec}.svg', icon)
+
+    # The page cache must be consulted before the request context is looked up:
+    config.add_tween('clld.web.tweens.page_cache_tween_factory', under=INGRESS)
 
     # add some maintenance hatches
     config.add_route_and_view('_raise', '/_raise', _raise)
@@ -598,8 +731,8 @@ def includeme(config):
 
     config.include('clld.web.adapters')
 
-    for icon in ICONS:
-        config.registry.registerUtility(icon, interfaces.IIcon, name=icon.name)
+    for icon_ in ICONS:
+        config.registry.registerUtility(icon_, interfaces.IIcon, name=icon_.name)
     config.registry.registerUtility(MapMarker(), interfaces.IMapMarker)
 
     #
@@ -653,6 +786,9 @@ def includeme(config):
         config.add_settings(
             {'clld.publisher_logo': '%s:static/publisher_logo.png' % root_package})
 
+    if asbool(config.registry.settings.get('clld.query_log')):
+        config.add_route_and_view('_query_log', '/_query_log', _query_log)
+
     if asbool(config.registry.settings.get('clld.pacific_centered_maps')):
         geojson.pacific_centered()
 
@@ -6,18 +6,30 @@ nature: On the client they provide the information to instantiate a jquery DataT
 object. Server side they know how to provide the data to the client-side table.
 """
 import re
+import json
+import copy
+import base64
 import typing
+import hashlib
+import itertools
 import functools
 
 from markupsafe import Markup
-from sqlalchemy.orm import undefer
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import undefer, joinedload, selectinload, Load, class_mapper
+from sqlalchemy.orm.attributes import QueryableAttribute
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.expression import UnaryExpression
 from sqlalchemy.types import String, Unicode, Float, Integer, Boolean
 from zope.interface import implementer, implementedBy
 from clldutils.misc import nfilter
 from pyramid.request import Request
 
 from clld.db.meta import DBSession, Base
-from clld.db.util import icontains, as_int
+from clld.db.util import as_int, estimate_count
+from clld.db.trigram import icontains
+from clld.db import fts, querylog
+from clld.cache import cache_enabled, get_cache, dataset_version
 from clld.web.util.htmllib import HTML, literal
 from clld.web.util.helpers import (
     link, button, icon, JS_CLLD, external_link, linked_references, JSDataTable,
@@ -80,6 +92,114 @@ def filter_number(col, qs, type_=None, qs_weight=1):
         return
 
 
+def order_spec(clause, desc=False):
+    """Split an order by clause into expression and direction.
+
+    :return: pair (expression, descending).
+    """
+    if isinstance(clause, UnaryExpression) \
+            and clause.modifier in (operators.desc_op, operators.asc_op):
+        return clause.element, (clause.modifier is operators.desc_op) != desc
+    return clause, desc
+
+
+def _nullable(expr):
+    return getattr(getattr(expr, 'expression', expr), 'nullable', True)
+
+
+def _encode_keyset_value(value):
+    """Encode a value of a sort expression, such that it survives a JSON round-trip.
+
+    Values which are not JSON types are encoded as pair of type name and string.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return [type(value).__name__, value.isoformat() if hasattr(value, 'isoformat') else str(value)]
+
+
+def _decode_keyset_value(expr, value):
+    """Decode a value encoded with `_encode_keyset_value` as value of the column's type."""
+    if not isinstance(value, list):
+        return value
+    name, value = value
+    python_type = expr.type.python_type
+    if python_type.__name__ != name:
+        raise ValueError(name)
+    if hasattr(python_type, 'fromisoformat'):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def keyset_predicate(order_by, values, before=False):
+    """Filter criterion selecting the rows after (or before) a row in a sort order.
+
+    .. note::
+
+        NULLs are assumed to sort after all other values in either direction, i.e. the
+        sort order must be specified with ``NULLS LAST``.
+
+    :param order_by: list of (expression, descending) pairs specifying the sort order.
+    :param values: list of values of the sort expressions for the reference row.
+    :param before: flag signaling whether to select rows preceding the reference row.
+    :return: sqlalchemy filter expression.
+    """
+    directions = {desc for _, desc in order_by}
+    if len(directions) == 1 and not any(_nullable(e) for e, _ in order_by):
+        # Uniform sort direction: A row value comparison can be answered from an index.
+        lhs, rhs = tuple_(*[e for e, _ in order_by]), tuple_(*values)
+        return lhs < rhs if directions.pop() != before else lhs > rhs
+
+    clauses = []
+    for i, ((expr, desc), value) in enumerate(zip(order_by, values)):
+        equal = [e.is_(None) if v is None else e == v
+                 for (e, _), v in zip(order_by[:i], values[:i])]
+        if value is None:
+            if not before:
+                continue  # Nothing sorts after NULL.
+            clause = expr.isnot(None)
+        else:
+            clause = expr < value if desc != before else expr > value
+            if not before and _nullable(expr):
+                clause = or_(clause, expr.is_(None))
+        clauses.append(and_(*equal, clause))
+    return or_(*clauses)
+
+
+def relationship_path(model, path):
+    """Resolve a relationship path.
+
+    :param model: Mapper class the path starts at.
+    :param path: dotted string of relationship names, a relationship attribute or a list \
+    of relationship attributes.
+    :return: tuple of relationship attributes.
+    """
+    if isinstance(path, str):
+        res = []
+        for name in path.split('.'):
+            attr = getattr(model, name)
+            res.append(attr)
+            model = attr.property.mapper.class_
+        return tuple(res)
+    return tuple(path) if isinstance(path, (tuple, list)) else (path,)
+
+
+def loader_option(path):
+    """Create a loader option to eagerly load the relationships along a path.
+
+    Collections are loaded in batches using ``SELECT ... IN``, scalar relationships are
+    joined. Thus, eager loading does not multiply the rows of a (paginated) query.
+
+    :param path: list of relationship attributes.
+    :return: loader option to be passed into ``sqlalchemy.orm.query.Query.options``.
+    """
+    option = None
+    for attr in path:
+        loader = selectinload if attr.property.uselist else joinedload
+        option = loader(attr) if option is None \
+            else getattr(option, loader.__name__)(attr)
+    return option
+
+
 class Col(object):
 
     """DataTables are basically a list of column specifications.
@@ -87,6 +207,19 @@ class Col(object):
     A column in a DataTable typically corresponds to a column of an sqlalchemy model.
     This column can either be supplied directly via a model_col keyword argument, or we
     try to look it up as attribute with name "name" on self.dt.model.
+
+    Relationships which are accessed when formatting a column can be declared as
+    `relationships` - a list of relationship paths starting at the model of the DataTable,
+    e.g. ``['valueset.language']`` for a column of a table of values. These will be eager
+    loaded, see :meth:`clld.web.datatables.base.DataTable.loader_options`.
+
+    Attributes of the DataTable's model which are accessed when formatting a column - in
+    addition to the `model_col` - can be declared as `attributes`, e.g. ``['description']``.
+    Only these attributes will be loaded for the rows of the table, see
+    :meth:`clld.web.datatables.base.DataTable.load_only_options`.
+
+    Columns which do not render data - e.g. buttons - should set `exportable` to `False`,
+    to be left out of exports of the table, see :mod:`clld.web.adapters.table`.
     """
 
     dt_name_pattern = re.compile('[a-z]+[A-Z]+[a-z]+')
@@ -94,6 +227,10 @@ class Col(object):
     # convenient way to provide defaults for some kw arguments of __init__:
     __kw__ = {}
 
+    relationships = ()
+    attributes = None
+    exportable = True
+
     def __init__(self, dt, name, get_object=None, model_col=None, format=None, **kw):
         """
         :param kw: Camel-cased keywords with type prefix are made available to JS. Recognized \
@@ -197,6 +334,28 @@ class Col(object):
             return self._format(item)
         return self.format_value(self.get_value(item))
 
+    def load_attributes(self):
+        """Called when collecting the attributes to load for the rows of a datatable.
+
+        :return: list of attribute names or `None`, if these cannot be determined, i.e. for \
+        columns with custom format function or of a class defined outside of clld, which do \
+        not declare `attributes`.
+        """
+        model = self.dt.db_model()
+        if self.attributes is None:
+            if self._format or not type(self).__module__.startswith('clld.'):
+                return None
+            if self.model_col is None and self._get_object is None \
+                    and type(self).format is Col.format \
+                    and not isinstance(getattr(model, self.name, None), QueryableAttribute):
+                # The value is read from a plain Python property of the item.
+                return None
+        res = list(self.attributes or [])
+        cls = getattr(self.model_col, 'class_', None)
+        if isinstance(cls, type) and issubclass(model, cls):
+            res.append(self.model_col.key)
+        return res
+
 
 class ExternalLinkCol(Col):
 
@@ -204,6 +363,8 @@ class ExternalLinkCol(Col):
 
     __kw__ = {'bSearchable': False, 'bSortable': False}
 
+    attributes = ['url']
+
     def get_attrs(self, item):
         return {}
 
@@ -227,6 +388,8 @@ class LinkCol(Col):
 
     """Column which renders a link."""
 
+    attributes = ['id', 'name']
+
     def get_attrs(self, item):
         return {}
 
@@ -272,6 +435,9 @@ class LinkToMapCol(Col):
 
     __kw__ = {'bSearchable': False, 'bSortable': False, 'sTitle': '', 'map_id': 'map'}
 
+    attributes = ['id', 'name', 'latitude', 'longitude']
+    exportable = False
+
     def format(self, item):
         obj = self.get_obj(item)
         if not obj or getattr(obj, 'latitude', None) is None:
@@ -301,6 +467,9 @@ class DetailsRowLinkCol(Col):
         'button_text': 'more',
     }
 
+    attributes = ['id']
+    exportable = False
+
     def format(self, item):
         return button(
             self.button_text,
@@ -316,6 +485,8 @@ class RefsCol(Col):
 
     __kw__ = dict(bSearchable=False, bSortable=False)
 
+    attributes = ['source']
+
     def format(self, item):
         vs = self.get_obj(item)
         return ', '.join(
@@ -388,6 +559,37 @@ class Toolbar(Component):
         return HTML.div(res, self.js())  # pragma: no cover
 
 
+def language_options(req):
+    """The localized texts of the DataTables UI.
+
+    Since the translation function of a request is shared by all requests for the same
+    locale, the options are computed once per locale.
+    """
+    cache = get_cache('datatable_language')
+    res = cache.get(req.translate)
+    if res is None:
+        translate = req.translate
+        res = {
+            "paginate": {
+                "next": translate("Next"),
+                "previous": translate("Previous"),
+                "first": translate("First"),
+                "last": translate("Last"),
+            },
+            "emptyTable": translate("No data available in table"),
+            "info": translate("Showing _START_ to _END_ of _TOTAL_ entries"),
+            "infoEmpty": translate("Showing 0 to 0 of 0 entries"),
+            "infoFiltered": translate("(filtered from _MAX_ total entries)"),
+            "lengthMenu": translate("Show _MENU_ entries"),
+            "loadingRecords": translate("Loading..."),
+            "processing": translate("Processing..."),
+            "search": translate("Search:"),
+            "zeroRecords": translate("No matching records found"),
+        }
+        cache.set(req.translate, res)
+    return copy.deepcopy(res)
+
+
 @implementer(IDataTable)
 class DataTable(Component):
 
@@ -413,12 +615,46 @@ class DataTable(Component):
     adapter for the model class, DataTables can provide access to the currently filtered items
     in this custom format through a download button. This can be configured by adding a key
     `dl_formats` to :attr:`clld.web.datatables.base.DataTable.__toolbar_kw__` specifying a `dict`
-    mapping registered `extension` strings to labels for the download button.
+    mapping registered `extension` strings to labels for the download button. All items
+    matching the current filters can be exported as tabular data - e.g. specifying
+    ``dl_formats=dict(csv='CSV')`` - using the adapters in :mod:`clld.web.adapters.table`.
+
+    Paging through big tables using ``LIMIT ... OFFSET`` gets slower the deeper the
+    page. Setting :attr:`clld.web.datatables.base.DataTable.__keyset_pagination__` to
+    `True` makes the table hand out an opaque cursor with each page of data, which is
+    used to seek to the next or previous page via a filter on the effective sort order
+    (i.e. the requested sort columns followed by the default order).
+
+    Counting the rows of big tables may be more expensive than retrieving a page of data.
+    Thus, if ``clld.count_cache`` is switched on in the app settings, row counts are cached
+    per table class, constraints and filters. Setting
+    :attr:`clld.web.datatables.base.DataTable.__count_strategy__` to `"estimate"` makes the
+    total number of rows an estimate, see :func:`clld.db.util.estimate_count`; the number of
+    rows matching the filters - used for paging - is always counted exactly.
+
+    Relationships listed in :attr:`clld.web.datatables.base.DataTable.__relationships__`
+    are always eager loaded - in addition to the ones declared by the table's columns - so
+    that columns of subclasses which do not declare relationships still find them loaded.
+
+    When serving the data of a table page, only the attributes needed to format the
+    table's columns are loaded for the rows, see
+    :meth:`clld.web.datatables.base.DataTable.load_only_options`. This can be switched off
+    by setting :attr:`clld.web.datatables.base.DataTable.__load_only__` to `False`.
+
+    Text columns listed by name in :attr:`clld.web.datatables.base.DataTable.__fulltext__`
+    are searched using a full-text index, if one was created, see
+    :func:`clld.db.fts.create_index`. Since full-text search matches words starting with
+    the words of the search string - rather than arbitrary substrings - this is opt-in.
     """
 
     __template__ = 'clld:web/templates/datatable.mako'
     __constraints__ = []
     __toolbar_kw__ = {}
+    __keyset_pagination__ = False
+    __count_strategy__ = 'exact'
+    __load_only__ = True
+    __fulltext__ = []
+    __relationships__ = []
 
     def __init__(
             self, req: Request, model: typing.Type[Base], eid: typing.Optional[str] = None, **kw):
@@ -433,6 +669,8 @@ class DataTable(Component):
         self.count_all = None
         self.count_filtered = None
         self.filters = []
+        self.order_by = []
+        self._page = None
         self._toolbar = Toolbar(
             req,
             self,
@@ -496,23 +734,7 @@ class DataTable(Component):
             data_url = self.req.route_url(
                 '%ss' % interface.__name__.lower()[1:], _query=query_params)
         return {
-            "language": {
-                "paginate": {
-                    "next": self.req.translate("Next"),
-                    "previous": self.req.translate("Previous"),
-                    "first": self.req.translate("First"),
-                    "last": self.req.translate("Last"),
-                },
-                "emptyTable": self.req.translate("No data available in table"),
-                "info": self.req.translate("Showing _START_ to _END_ of _TOTAL_ entries"),
-                "infoEmpty": self.req.translate("Showing 0 to 0 of 0 entries"),
-                "infoFiltered": self.req.translate("(filtered from _MAX_ total entries)"),
-                "lengthMenu": self.req.translate("Show _MENU_ entries"),
-                "loadingRecords": self.req.translate("Loading..."),
-                "processing": self.req.translate("Processing..."),
-                "search": self.req.translate("Search:"),
-                "zeroRecords": self.req.translate("No matching records found"),
-            },
+            "language": language_options(self.req),
             'bServerSide': True,
             'bProcessing': True,
             "sDom": "<'dt-before-table row-fluid'<'span4'i><'span6'p><'span2'f<'"
@@ -523,6 +745,7 @@ class DataTable(Component):
             "iDisplayLength": DISPLAY_LENGTH,
             "aLengthMenu": [[50, 100, 200], [50, 100, 200]],
             'sAjaxSource': data_url,
+            'bKeysetPagination': self.__keyset_pagination__,
         }
 
     def db_model(self):
@@ -544,10 +767,63 @@ class DataTable(Component):
     def default_order(self):
         return self.db_model().pk
 
+    def count(self, query, filters=None, estimate=False):
+        """Count the rows of a query, looking up the count in the count cache if enabled.
+
+        :param filters: list of (column index, search string) pairs applied to the query.
+        :param estimate: flag signaling whether an estimated count is good enough.
+        :return: ``int``
+        """
+        if not cache_enabled(self.req, 'count'):
+            return self._count(query, estimate)
+
+        cache = get_cache('count', maxsize=10000)
+        key = (
+            self.__class__.__module__,
+            self.__class__.__name__,
+            self.model.__name__,
+            tuple(sorted(self.xhr_query().items())),
+            tuple(filters) if filters is not None else None,
+            estimate,
+            dataset_version())
+        res = cache.get(key)
+        if res is None:
+            res = cache.set(key, self._count(query, estimate))
+        return res
+
+    def _count(self, query, estimate):
+        with querylog.label('count') as info:
+            info['rows'] = estimate_count(query) if estimate else query.count()
+        return info['rows']
+
+    def is_fulltext_col(self, col):
+        """Whether a column is searched using the full-text index.
+
+        Only columns listed in `__fulltext__` which map an attribute of the table's model
+        and use the default search of :class:`clld.web.datatables.base.Col` qualify.
+        """
+        return bool(self.__fulltext__) and col.model_col is not None \
+            and col.model_col.class_ in (self.model, self.db_model()) \
+            and type(col).search is Col.search \
+            and col.model_col.key in self.__fulltext__
+
+    def fulltext_search(self, col, qs):
+        """Full-text search condition for columns listed in `__fulltext__`.
+
+        :return: SQL expression or `None`, if the column is not covered by a full-text index.
+        """
+        if self.is_fulltext_col(col):
+            return fts.column_search(self.db_model(), col.model_col.key, qs)
+
     def get_query(self, limit=DISPLAY_LIMIT, offset=0, undefer_cols=()):
+        """Query for the items of the table, filtered and sorted as requested.
+
+        :param limit: maximal number of items to retrieve, or `None` to retrieve all items\
+        matching the filters - ignoring paging parameters of the request.
+        """
         query = self.base_query(
             DBSession.query(self.db_model()).filter(self.db_model().active == True))
-        self.count_all = query.count()
+        self.count_all = self.count(query, estimate=self.__count_strategy__ == 'estimate')
 
         _filters = []
         for name, val in self.req.params.items():
@@ -555,7 +831,9 @@ class DataTable(Component):
                 try:
                     colindex = int(name.split('_')[1])
                     col = self.cols[colindex]
-                    clauses = col.search(val)
+                    clauses = self.fulltext_search(col, val)
+                    if clauses is None:
+                        clauses = col.search(val)
                 except (ValueError, IndexError):  # pragma: no cover
                     clauses = None
                 if clauses is not None:
@@ -568,10 +846,18 @@ class DataTable(Component):
         for colindex, coltitle, qs in sorted(set(_filters)):
             self.filters.append((coltitle, qs))
 
-        self.count_filtered = query.count()
+        if _filters or self.__count_strategy__ == 'estimate':
+            # The number of matching rows is used for paging, thus, must be exact:
+            self.count_filtered = self.count(
+                query, filters=sorted({(i, qs) for i, _, qs in _filters}))
+        else:
+            # No filters applied, so we already know the count.
+            self.count_filtered = self.count_all
+        filtered_query = query
 
         iSortingCols = type_coerce(int, self.req.params.get('iSortingCols', 0), 0)
 
+        self.order_by = []
         for index in range(min(iSortingCols, 10)):
             try:
                 col = self.cols[int(self.req.params.get('iSortCol_%s' % index))]
@@ -583,7 +869,9 @@ class DataTable(Component):
                     if not isinstance(orders, (tuple, list)):
                         orders = [orders]
                     for order in orders:
-                        if self.req.params.get('sSortDir_%s' % index) == 'desc':
+                        desc = self.req.params.get('sSortDir_%s' % index) == 'desc'
+                        self.order_by.append(order_spec(order, desc))
+                        if desc:
                             order = order.desc()
                         query = query.order_by(order)
 
@@ -591,20 +879,154 @@ class DataTable(Component):
         if not isinstance(clauses, (list, tuple)):
             clauses = (clauses,)
         query = query.order_by(*clauses)
+        self.order_by.extend(order_spec(clause) for clause in clauses)
 
-        if 'iDisplayLength' in self.req.params:
+        if limit is not None and 'iDisplayLength' in self.req.params:
             limit = type_coerce(int, self.req.params['iDisplayLength'], DISPLAY_LENGTH)
             # make sure no more than DISPLAY_LIMIT items can be selected
             limit = min(limit, DISPLAY_LIMIT)
-        query = query\
-            .limit(DISPLAY_LIMIT if limit == -1 else limit)\
-            .offset(type_coerce(int, self.req.params.get('iDisplayStart', offset), offset))
+        limit = DISPLAY_LIMIT if limit == -1 else limit
+        offset = type_coerce(int, self.req.params.get('iDisplayStart', offset), offset)
+
+        if limit is None:
+            # All matching items are requested, e.g. for an export of the table.
+            pass
+        elif self.__keyset_pagination__:
+            self._page = (filtered_query, offset)
+            query = self._seek(filtered_query, offset, limit)
+            if query is None:
+                query = filtered_query.order_by(*self._keyset_clauses()).offset(offset)
+            query = query.limit(limit)
+        else:
+            query = query.limit(limit).offset(offset)
 
+        query = query.options(*self.loader_options())
         if undefer_cols:
             query = query.options(*(undefer(c) for c in undefer_cols))
 
         return query
 
+    def loader_options(self):
+        """Eager loading options for the relationships declared by the table's columns.
+
+        :return: list of loader options.
+        """
+        paths = {}
+        for path in itertools.chain(
+                self.__relationships__, *(col.relationships for col in self.cols)):
+            path = relationship_path(self.db_model(), path)
+            paths[tuple(str(attr) for attr in path)] = path
+        # Relationships along a path are loaded with the path, so we skip prefixes:
+        return [
+            loader_option(path) for key, path in sorted(paths.items())
+            if not any(len(k) > len(key) and k[:len(key)] == key for k in paths)]
+
+    def load_only_options(self):
+        """Options restricting the attributes loaded for the rows of the table.
+
+        Primary and foreign keys, the polymorphic discriminator as well as `id` and `name`
+        are always loaded. Other attributes are only loaded if a column requires them.
+
+        :return: list of loader options - empty, if the table's columns do not declare the \
+        attributes they need.
+        """
+        if not self.__load_only__:
+            return []
+        model = self.db_model()
+        mapper = class_mapper(model)
+        keys = {'id', 'name'}
+        for col in self.cols:
+            attributes = col.load_attributes()
+            if attributes is None:
+                return []
+            keys.update(attributes)
+        for prop in mapper.column_attrs:
+            if any(c.primary_key or c.foreign_keys or c is mapper.polymorphic_on
+                   for c in prop.columns):
+                keys.add(prop.key)
+        return [Load(model).load_only(
+            *[getattr(model, k) for k in sorted(keys) if k in mapper.column_attrs])]
+
+    def _keyset_order(self):
+        """The effective sort order, made total by appending the primary key if needed."""
+        pk = self.db_model().pk
+        if any(expr is pk for expr, _ in self.order_by):
+            return self.order_by
+        return self.order_by + [(pk, False)]
+
+    def _keyset_clauses(self, reverse=False):
+        if reverse:
+            return [(e.asc() if d else e.desc()).nulls_first() for e, d in self._keyset_order()]
+        return [(e.desc() if d else e.asc()).nulls_last() for e, d in self._keyset_order()]
+
+    def _keyset_signature(self):
+        """Identify sort order and filters a keyset cursor is valid for."""
+        params = sorted(
+            (k, v) for k, v in self.req.params.items()
+            if k.startswith(('sSearch_', 'iSortCol_', 'sSortDir_', 'iSortingCols')))
+        params.append(('order', [str(expr) for expr, _ in self._keyset_order()]))
+        params.extend(sorted(self.xhr_query().items()))
+        return hashlib.md5(json.dumps(params).encode('utf8')).hexdigest()[:12]
+
+    def _seek(self, query, offset, limit):
+        """Turn the query into a keyset query, if a matching cursor was passed.
+
+        :return: ``sqlalchemy.orm.query.Query`` instance or `None`, if a regular OFFSET \
+        query must be used.
+        """
+        try:
+            signature, start, length, first, last = json.loads(
+                base64.urlsafe_b64decode(self.req.params['sCursor'].encode('ascii')))
+        except (KeyError, ValueError, TypeError):
+            return
+
+        if signature != self._keyset_signature() or not length:
+            return
+
+        order_by = self._keyset_order()
+        try:
+            first, last = [
+                [_decode_keyset_value(e, v) for (e, _), v in zip(order_by, values)]
+                for values in (first, last)]
+        except (ValueError, TypeError, NotImplementedError):
+            return
+        if offset == start + length:
+            # The next page: Rows following the last row of the cursor page.
+            return query.filter(keyset_predicate(order_by, last))\
+                .order_by(*self._keyset_clauses())
+        if offset == start - limit and offset >= 0:
+            # The previous page: We select the primary keys of the rows preceding the first
+            # row of the cursor page in reverse order, and return these in regular order.
+            pk = self.db_model().pk
+            pks = query.with_entities(pk)\
+                .filter(keyset_predicate(order_by, first, before=True))\
+                .order_by(*self._keyset_clauses(reverse=True))\
+                .limit(limit)\
+                .subquery()
+            return query.filter(pk.in_(pks.select())).order_by(*self._keyset_clauses())
+
+    def keyset_cursor(self, items):
+        """Compute a cursor for the page of items retrieved via `get_query`.
+
+        :param items: list of items returned from the query created by `get_query`.
+        :return: opaque cursor string or `None`, if keyset pagination is disabled.
+        """
+        if not (self.__keyset_pagination__ and self._page):
+            return
+        query, offset = self._page
+        order_by = self._keyset_order()
+        first, last = [], []
+        if items:
+            pk = self.db_model().pk
+            rows = {
+                r[0]: [_encode_keyset_value(v) for v in r[1:]]
+                for r in query.with_entities(pk, *[e for e, _ in order_by])
+                .filter(pk.in_([items[0].pk, items[-1].pk]))}
+            first, last = rows[items[0].pk], rows[items[-1].pk]
+        return base64.urlsafe_b64encode(json.dumps(
+            [self._keyset_signature(), offset, len(items), first, last]).encode('utf8'))\
+            .decode('ascii')
+
     def render(self):
         return Component.render(self) + self._toolbar.js()
 
@@ -9,6 +9,8 @@ class ContributorsCol(Col):
 
     __kw__ = {'bSearchable': False, 'bSortable': False}
 
+    relationships = ['contributor_assocs.contributor']
+
     def format(self, item):
         return linked_contributors(self.dt.req, item)
 
@@ -11,6 +11,8 @@ class ContributionsCol(Col):
 
     __kw__ = {'bSearchable': False, 'bSortable': False}
 
+    relationships = ['contribution_assocs.contribution']
+
     def format(self, item):
         return HTML.ul(
             *[HTML.li(link(
@@ -18,6 +20,8 @@ class ContributionsCol(Col):
 
 
 class AddressCol(Col):
+    attributes = ['address']
+
     def format(self, item):
         return text2html(item.address)
 
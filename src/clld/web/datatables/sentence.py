@@ -1,7 +1,7 @@
 """Default DataTable for Sentence objects."""
 from sqlalchemy import and_
-from sqlalchemy.orm import joinedload
 
+from clld.cache import cache_enabled
 from clld.db.util import get_distinct_values
 from clld.db.models.common import (
     Language, Sentence, Parameter, ValueSentence, Value, ValueSet, Sentence_files,
@@ -18,7 +18,9 @@ class TypeCol(Col):
 
     def __init__(self, dt, name, **kw):
         kw.setdefault('sTitle', dt.req.translate('Type'))
-        kw.setdefault('choices', get_distinct_values(Sentence.type))
+        if 'choices' not in kw:
+            kw['choices'] = get_distinct_values(
+                Sentence.type, cache=cache_enabled(dt.req, 'distinct_values'))
         super(TypeCol, self).__init__(dt, name, **kw)
 
     def search(self, qs):
@@ -37,6 +39,8 @@ class TsvCol(Col):
 
 
 class AudioCol(Col):
+    relationships = ['_files']
+
     def __init__(self, dt, name, **kw):
         kw['choices'] = ['yes']
         kw['input-size'] = 'mini'
@@ -60,6 +64,7 @@ class Sentences(DataTable):
     """Default DataTable for Sentence objects."""
 
     __constraints__ = [Parameter, Language]
+    __relationships__ = ['_files', 'language']
 
     def base_query(self, query):
         query = query\
@@ -67,13 +72,12 @@ class Sentences(DataTable):
                 Sentence_files,
                 and_(
                     Sentence_files.object_pk == Sentence.pk,
-                    Sentence_files.mime_type.contains('audio/')))\
-            .options(joinedload(Sentence._files))
+                    Sentence_files.mime_type.contains('audio/')))
 
         if self.language:
             query = query.filter(Sentence.language_pk == self.language.pk)
         else:
-            query = query.join(Language).options(joinedload(Sentence.language))
+            query = query.join(Language)
 
         if self.parameter:
             query = query.join(ValueSentence, Value, ValueSet)\
@@ -97,6 +101,7 @@ class Sentences(DataTable):
                 'language',
                 model_col=Language.name,
                 get_obj=lambda i: i.language,
+                relationships=['language'],
                 bSortable=not self.language,
                 bSearchable=not self.language),
             DetailsRowLinkCol(self, 'd'),
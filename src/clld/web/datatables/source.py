@@ -41,7 +41,11 @@ class Sources(DataTable):
         return [
             DetailsRowLinkCol(self, 'd'),
             LinkCol(self, 'name'),
-            Col(self, 'description', sTitle='Title', format=lambda i: HTML.span(i.description)),
+            Col(self,
+                'description',
+                sTitle='Title',
+                format=lambda i: HTML.span(i.description),
+                attributes=['description']),
             Col(self, 'year'),
             Col(self, 'author'),
             TypeCol(self, 'bibtex_type'),
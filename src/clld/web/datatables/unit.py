@@ -1,6 +1,4 @@
 """Default DataTable for Unit objects."""
-from sqlalchemy.orm import joinedload
-
 from clld.db.models.common import Unit, Language
 from clld.web.datatables.base import DataTable, LinkCol
 
@@ -9,6 +7,8 @@ class DescriptionLinkCol(LinkCol):
 
     """Render a link to the unit using the description as label."""
 
+    attributes = ['id', 'description']
+
     def get_attrs(self, item):
         return {'label': item.description}
 
@@ -18,9 +18,10 @@ class Units(DataTable):
     """Default DataTable for Unit objects."""
 
     __constraints__ = [Language]
+    __relationships__ = ['language']
 
     def base_query(self, query):
-        query = query.join(Language).options(joinedload(Unit.language))
+        query = query.join(Language)
 
         if self.language:
             return query.filter(Unit.language == self.language)
@@ -31,5 +32,9 @@ class Units(DataTable):
             LinkCol(self, 'name'),
             DescriptionLinkCol(self, 'description'),
             LinkCol(
-                self, 'language', model_col=Language.name, get_obj=lambda i: i.language),
+                self,
+                'language',
+                model_col=Language.name,
+                get_obj=lambda i: i.language,
+                relationships=['language']),
         ]
@@ -1,6 +1,4 @@
 """Default DataTable for UnitValue objects."""
-from sqlalchemy.orm import joinedload
-
 from clld.db.models import common
 from clld.web.datatables.base import DataTable, LinkCol
 
@@ -25,12 +23,12 @@ class Unitvalues(DataTable):
     """Default DataTable for UnitValue objects."""
 
     __constraints__ = [common.UnitParameter, common.Contribution, common.Unit]
+    __relationships__ = ['unit']
 
     def base_query(self, query):
         query = query\
             .join(common.Unit)\
-            .outerjoin(common.UnitDomainElement)\
-            .options(joinedload(common.UnitValue.unit))
+            .outerjoin(common.UnitDomainElement)
 
         if self.unit:
             return query.filter(common.UnitValue.unit_pk == self.unit.pk)
@@ -50,7 +48,12 @@ class Unitvalues(DataTable):
             name_col.choices = sorted([de.name for de in self.unitparameter.domain])
         return [
             name_col,
-            LinkCol(self, 'unit', get_obj=lambda i: i.unit, model_col=common.Unit.name),
+            LinkCol(
+                self,
+                'unit',
+                get_obj=lambda i: i.unit,
+                model_col=common.Unit.name,
+                relationships=['unit']),
         ]
 
     def toolbar(self):
@@ -1,8 +1,6 @@
 """Default DataTable for Value objects."""
-from sqlalchemy.orm import joinedload
-
 from clld.db.models.common import (
-    Value, ValueSet, Parameter, DomainElement, Language, Contribution, ValueSetReference,
+    Value, ValueSet, Parameter, DomainElement, Language, Contribution,
 )
 from clld.db.util import icontains
 from clld.web.datatables.base import (
@@ -17,6 +15,9 @@ class ValueNameCol(LinkCol):
 
     """Render the label for a Value."""
 
+    relationships = ['valueset', 'domainelement']
+    attributes = ['id', 'name']
+
     def get_obj(self, item):
         return item.valueset
 
@@ -42,6 +43,8 @@ class ValueSetCol(LinkCol):
 
     """Render a link to the corresponding ValueSet."""
 
+    relationships = ['valueset']
+
     def get_obj(self, item):
         return item.valueset
 
@@ -53,6 +56,8 @@ class RefsCol(BaseRefsCol):
 
     """Listing sources for the corresponding ValueSet."""
 
+    relationships = ['valueset.references.source']
+
     def get_obj(self, item):
         return item.valueset
 
@@ -62,17 +67,10 @@ class Values(DataTable):
     """Default DataTable for Value objects."""
 
     __constraints__ = [Parameter, Contribution, Language]
+    __relationships__ = ['valueset.references.source']
 
     def base_query(self, query):
-        query = query.join(ValueSet).options(
-            joinedload(
-                Value.valueset
-            ).joinedload(
-                ValueSet.references
-            ).joinedload(
-                ValueSetReference.source
-            )
-        )
+        query = query.join(ValueSet)
 
         if self.language:
             query = query.join(ValueSet.parameter)
@@ -80,8 +78,7 @@ class Values(DataTable):
 
         if self.parameter:
             query = query.join(ValueSet.language)
-            query = query.outerjoin(DomainElement).options(
-                joinedload(Value.domainelement))
+            query = query.outerjoin(DomainElement)
             return query.filter(ValueSet.parameter_pk == self.parameter.pk)
 
         if self.contribution:
@@ -105,10 +102,15 @@ class Values(DataTable):
                 LinkCol(self,
                         'language',
                         model_col=Language.name,
-                        get_object=lambda i: i.valueset.language),
+                        get_object=lambda i: i.valueset.language,
+                        relationships=['valueset.language']),
                 name_col,
                 RefsCol(self, 'source'),
-                LinkToMapCol(self, 'm', get_object=lambda i: i.valueset.language),
+                LinkToMapCol(
+                    self,
+                    'm',
+                    get_object=lambda i: i.valueset.language,
+                    relationships=['valueset.language']),
             ]
 
         if self.language:
@@ -118,7 +120,8 @@ class Values(DataTable):
                         'parameter',
                         sTitle=self.req.translate('Parameter'),
                         model_col=Parameter.name,
-                        get_object=lambda i: i.valueset.parameter),
+                        get_object=lambda i: i.valueset.parameter,
+                        relationships=['valueset.parameter']),
                 RefsCol(self, 'source'),
             ]
 
@@ -1,11 +1,7 @@
 """Default DataTable for ValueSet objects."""
 import functools
 
-from sqlalchemy.orm import joinedload
-
-from clld.db.models.common import (
-    ValueSet, Parameter, Language, Contribution, ValueSetReference,
-)
+from clld.db.models.common import ValueSet, Parameter, Language, Contribution
 from clld.web.datatables.base import (
     DataTable, LinkCol, DetailsRowLinkCol, LinkToMapCol, RefsCol,
 )
@@ -16,21 +12,13 @@ class Valuesets(DataTable):
     """Default DataTable for ValueSet objects."""
 
     __constraints__ = [Parameter, Contribution, Language]
+    __relationships__ = ['language', 'parameter', 'references.source']
 
     def base_query(self, query):
-        query = query.join(Language)\
-            .options(
-                joinedload(
-                    ValueSet.language
-                ),
-                joinedload(
-                    ValueSet.references
-                ).joinedload(
-                    ValueSetReference.source
-                ))
+        query = query.join(Language)
 
         if self.language:
-            query = query.join(Parameter).options(joinedload(ValueSet.parameter))
+            query = query.join(Parameter)
             return query.filter(ValueSet.language_pk == self.language.pk)
 
         if self.parameter:
@@ -43,31 +31,41 @@ class Valuesets(DataTable):
         return query
 
     def col_defs(self):
-        refs_col = RefsCol(self, 'references')
+        refs_col = RefsCol(self, 'references', relationships=['references.source'])
         res = [DetailsRowLinkCol(self, 'd')]
 
         def get(what, i):
             return getattr(i, {'p': 'parameter', 'l': 'language'}[what])
 
+        language_kw = dict(
+            model_col=Language.name,
+            get_obj=functools.partial(get, 'l'),
+            relationships=['language'])
+        parameter_kw = dict(
+            model_col=Parameter.name,
+            get_obj=functools.partial(get, 'p'),
+            relationships=['parameter'])
+
         if self.parameter:
             return res + [
-                LinkCol(self, 'language',
-                        model_col=Language.name, get_obj=functools.partial(get, 'l')),
+                LinkCol(self, 'language', **language_kw),
                 refs_col,
-                LinkToMapCol(self, 'm', get_obj=functools.partial(get, 'l')),
+                LinkToMapCol(
+                    self,
+                    'm',
+                    get_obj=functools.partial(get, 'l'),
+                    relationships=['language']),
             ]
 
         if self.language:
             return res + [
-                LinkCol(self, 'parameter',
-                        model_col=Parameter.name, get_obj=functools.partial(get, 'p')),
+                LinkCol(self, 'parameter', **parameter_kw),
                 refs_col,
             ]
 
         return res + [
-            LinkCol(self, 'language', model_col=Language.name, get_obj=functools.partial(get, 'l')),
-            LinkCol(
-                self, 'parameter', model_col=Parameter.name, get_obj=functools.partial(get, 'p')),
+            LinkCol(self, 'language', **language_kw),
+            LinkCol(self, 'parameter', **parameter_kw),
             refs_col,
         ]
 
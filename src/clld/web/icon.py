@@ -1,10 +1,19 @@
-"""Functionality to manage icons for map markers."""
+"""Functionality to manage icons for map markers.
+
+Icons are served as SVG from the route ``_icon`` - under URLs which never change, thus can
+be cached forever by clients - and referenced by host-relative URL, e.g. in the features of
+GeoJSON map data. Representations rendered for use outside of the app - e.g. downloads or
+frozen pages - embed icons as data URLs.
+"""
+import re
 import itertools
 
 from clldutils import svg
 from clldutils.color import rgb_as_hex
+from pyramid.interfaces import IRoutesMapper
 from zope.interface import implementer
 
+from clld.cache import LRUCache
 from clld.interfaces import IIcon, IMapMarker, IValue, IValueSet, IDomainElement
 
 SHAPES = [
@@ -66,6 +75,45 @@ PREFERED_COLORS = [
 ]
 SECONDARY_COLORS = [c for c in COLORS if c not in PREFERED_COLORS]
 
+#: Key in the WSGI environment flagging requests rendered for use outside of the app.
+OFFLINE = 'clld.offline'
+
+#: Icon specs are icon names, optionally followed by the opacity as two hex digits.
+ICON_SPEC = re.compile(
+    r'(?P<shape>[{0}])(?P<color>[0-9a-fA-F]{{6}})(?P<opacity>[0-9a-fA-F]{{2}})?'.format(
+        ''.join(SHAPES)))
+
+
+def svg_icon(spec):
+    """Create the SVG markup for an icon spec.
+
+    :raises ValueError: if ``spec`` is not a valid icon spec.
+    """
+    match = ICON_SPEC.fullmatch(spec)
+    if not match:
+        raise ValueError(spec)
+    opacity = match.group('opacity')
+    return svg.icon(
+        match.group('shape') + match.group('color'),
+        opacity=str(int(opacity, base=16) / 255) if opacity else None)
+
+
+def icon_url(req, spec):
+    """Retrieve the URL for an icon spec.
+
+    URLs are host-relative and memoized per script name. For requests without access to the
+    ``_icon`` route - or flagged as :data:`OFFLINE` - a data URL is returned.
+    """
+    if req is None or req.environ.get(OFFLINE) \
+            or req.registry.queryUtility(IRoutesMapper).get_route('_icon') is None:
+        return svg.data_url(svg_icon(spec))
+    urls = req.registry.__dict__.setdefault('clld_icon_urls', LRUCache(maxsize=10000))
+    key = (req.script_name, spec)
+    res = urls.get(key)
+    if res is None:
+        res = urls.set(key, req.route_path('_icon', spec=spec))
+    return res
+
 
 @implementer(IIcon)
 class Icon(object):
@@ -134,8 +182,15 @@ class Icon(object):
             res += hex(round(float(self.opacity) * 255))[2:]
         return res
 
+    @property
+    def spec(self):
+        """The icon name - with opacity appended as two hex digits, if specified."""
+        if self.opacity is None:
+            return self.name
+        return '{0}{1:02x}'.format(self.name, round(float(self.opacity) * 255))
+
     def url(self, req):
-        return svg.data_url(svg.icon(self.name, opacity=str(self.opacity)))
+        return icon_url(req, self.spec)
 
 
 #: a list of all available icons:
@@ -158,6 +213,20 @@ class MapMarker(object):
     def get_icon(self, ctx, req):
         return DEFAULT_ICON
 
+    def get_row_icon(self, rows, req):
+        """Determine the icon for rows of plain data about the values of a valueset.
+
+        This method is used when parameter maps are rendered from rows selected without
+        the ORM (see :class:`clld.web.adapters.geojson.GeoJsonParameter`). Subclasses
+        overriding `get_icon` must override this method as well, to support this.
+
+        :param rows: list of rows - one per value of the valueset, most frequent value \
+        first - with attributes as selected by \
+        :meth:`clld.web.adapters.geojson.GeoJsonParameter.get_rows`.
+        :return: icon name.
+        """
+        return DEFAULT_ICON
+
     def __call__(self, ctx, req):
         icon = self.get_icon(ctx, req) or DEFAULT_ICON
         return req.registry.getUtility(IIcon, icon).url(req)
@@ -173,6 +173,12 @@ class Map(Component):
     - resize_direction: 'e', 's' or 'se', make map resizeable.
       see https://github.com/jjimenezshaw/Leaflet.Control.Resizer#api
     - with_audioplayer: Flag indicating whether to add an AudioPlayer control on the map.
+    - viewport: Flag indicating whether GeoJSON layers loaded from URLs should be requested \
+      for the current viewport - passing bounding box and zoom level, thus getting clustered \
+      features at low zoom levels - and reloaded when the map is moved [False]
+    - tiles: Flag indicating whether layers loaded from GeoJSON URLs should be consumed as \
+      vector tiles, served at the URL of the GeoJSON with ``.geojson`` replaced by \
+      ``/tiles/{z}/{x}/{y}.mvt`` (see :func:`clld.web.views.tiles`) [False]
 
     """
 
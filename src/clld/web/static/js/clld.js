@@ -182,6 +182,13 @@ CLLD.Modal = (function(){
  */
 CLLD.DataTables = {};
 
+/**
+ * Dictionary to store the keyset pagination cursors of DataTable objects.
+ *
+ * @type {{}}
+ */
+CLLD.DataTableCursors = {};
+
 /**
  * DataTable wraps jquery DataTables objects.
  */
@@ -311,6 +318,27 @@ CLLD.DataTable = (function(){
             }
         } );
 
+        if (options.bKeysetPagination) {
+            // Pass the cursor received with the last page of data back to the server, to
+            // allow for keyset pagination.
+            options.fnServerData = function (sSource, aoData, fnCallback, oSettings) {
+                if (CLLD.DataTableCursors[eid]) {
+                    aoData.push({"name": "sCursor", "value": CLLD.DataTableCursors[eid]});
+                }
+                oSettings.jqXHR = $.ajax({
+                    "url": sSource,
+                    "data": aoData,
+                    "dataType": "json",
+                    "cache": false,
+                    "type": oSettings.sServerMethod,
+                    "success": function (json) {
+                        CLLD.DataTableCursors[eid] = json.sCursor;
+                        fnCallback(json);
+                    }
+                });
+            };
+        }
+
         CLLD.DataTables[eid] = $('#'+eid).dataTable(options);
         $('#'+eid+'_filter').hide();
         if (toolbar) {
@@ -393,19 +421,211 @@ CLLD.Maps = {};
 // Dictionary to register options for map layers (by name)
 CLLD.LayerOptions = {};
 
+// Icons are shared by all markers with the same icon URL, size and class:
+CLLD.MapIconCache = {};
+
 CLLD.MapIcons = {
     base: function(feature, size, url) {
-        return L.icon({
-            iconUrl: url == undefined ? feature.properties.icon : url,
-            iconSize: [size, size],
-            iconAnchor: [Math.floor(size/2), Math.floor(size/2)],
-            popupAnchor: [0, 0],
-            className: feature.properties['class'] == undefined ? 'clld-map-icon' : feature.properties['class']
+        var key,
+            className = feature.properties['class'] == undefined ? 'clld-map-icon' : feature.properties['class'];
+        url = url == undefined ? feature.properties.icon : url;
+        key = [url, size, className].join(' ');
+        if (!CLLD.MapIconCache.hasOwnProperty(key)) {
+            CLLD.MapIconCache[key] = L.icon({
+                iconUrl: url,
+                iconSize: [size, size],
+                iconAnchor: [Math.floor(size/2), Math.floor(size/2)],
+                popupAnchor: [0, 0],
+                className: className
+            });
+        }
+        return CLLD.MapIconCache[key];
+    }
+};
+
+
+/**
+ * Minimal decoder for Mapbox Vector Tiles containing point features, as served by clld.
+ */
+CLLD.MVT = {
+    /**
+     * Decode the point features of a vector tile.
+     *
+     * @param buffer ArrayBuffer with the protobuf encoded tile.
+     * @returns list of objects {properties: , x: , y: , extent: }.
+     */
+    decode: function(buffer) {
+        var bytes = new Uint8Array(buffer),
+            view = new DataView(buffer),
+            features = [];
+
+        function varint(state) {
+            var res = 0, shift = 1, b;
+            do {
+                b = bytes[state.pos++];
+                res += (b & 0x7f) * shift;
+                shift *= 128;
+            } while (b & 0x80);
+            return res;
+        }
+
+        function zigzag(n) {
+            return n % 2 ? -(n + 1) / 2 : n / 2;
+        }
+
+        // Call func(field, state, end) for each length-delimited field of the message
+        // between start and end, skipping other fields; varint fields are passed as value.
+        function fields(start, end, func) {
+            var state = {pos: start}, key, len;
+            while (state.pos < end) {
+                key = varint(state);
+                if ((key & 7) === 0) {
+                    func(key >> 3, varint(state));
+                } else if ((key & 7) === 1) {
+                    func(key >> 3, view.getFloat64(state.pos, true));
+                    state.pos += 8;
+                } else if ((key & 7) === 5) {
+                    func(key >> 3, view.getFloat32(state.pos, true));
+                    state.pos += 4;
+                } else {
+                    len = varint(state);
+                    func(key >> 3, {start: state.pos, end: state.pos + len});
+                    state.pos += len;
+                }
+            }
+        }
+
+        function packed(range) {
+            var state = {pos: range.start}, res = [];
+            while (state.pos < range.end) {
+                res.push(varint(state));
+            }
+            return res;
+        }
+
+        function string(range) {
+            return new TextDecoder('utf-8').decode(bytes.subarray(range.start, range.end));
+        }
+
+        fields(0, bytes.length, function(field, layer) {
+            var keys = [], values = [], raw = [], extent = 4096;
+            if (field !== 3) {
+                return;
+            }
+            fields(layer.start, layer.end, function(field, value) {
+                if (field === 2) {
+                    raw.push(value);
+                } else if (field === 3) {
+                    keys.push(string(value));
+                } else if (field === 4) {
+                    fields(value.start, value.end, function(type, v) {
+                        values.push(type === 1 ? string(v) : (type === 6 ? zigzag(v) : (type === 7 ? !!v : v)));
+                    });
+                } else if (field === 5) {
+                    extent = value;
+                }
+            });
+            raw.forEach(function(range) {
+                var feature = {properties: {}, extent: extent};
+                fields(range.start, range.end, function(field, value) {
+                    var i, geometry;
+                    if (field === 2) {
+                        value = packed(value);
+                        for (i = 0; i < value.length; i += 2) {
+                            feature.properties[keys[value[i]]] = values[value[i + 1]];
+                        }
+                    } else if (field === 4) {
+                        geometry = packed(value);
+                        feature.x = zigzag(geometry[1]);
+                        feature.y = zigzag(geometry[2]);
+                    }
+                });
+                features.push(feature);
+            });
         });
+        return features;
     }
 };
 
 
+/**
+ * A grid layer loading vector tiles, adding the features as markers to a GeoJSON layer.
+ *
+ * Tile coordinates are not wrapped, thus tiles east of the antimeridian - as needed for
+ * pacific centered maps - are requested with x >= 2^z.
+ */
+CLLD.MapTileLayer = L.GridLayer.extend({
+    initialize: function(url, geojson, options) {
+        this._url = url;
+        this._geojson = geojson;
+        this._markers = {};
+        L.GridLayer.prototype.initialize.call(this, options);
+        this.on('tileunload', function(e) {
+            var key = this._tileCoordsToKey(e.coords);
+            (this._markers[key] || []).forEach(function(marker) {
+                geojson.removeLayer(marker);
+            });
+            delete this._markers[key];
+        });
+    },
+
+    _wrapCoords: function(coords) {
+        return coords;
+    },
+
+    createTile: function(coords, done) {
+        var self = this,
+            tile = document.createElement('div'),
+            xhr = new XMLHttpRequest();
+
+        xhr.open('GET', L.Util.template(self._url, coords));
+        xhr.responseType = 'arraybuffer';
+        xhr.onload = function() {
+            var key = self._tileCoordsToKey(coords);
+            if (xhr.status === 200 && self._map) {
+                self._markers[key] = CLLD.MVT.decode(xhr.response).map(function(f) {
+                    return self._addFeature(f, coords);
+                });
+            }
+            done(null, tile);
+        };
+        xhr.onerror = function() {
+            done(new Error('tile not loaded'), tile);
+        };
+        xhr.send();
+        return tile;
+    },
+
+    _addFeature: function(f, coords) {
+        var name, marker, feature = {type: 'Feature', properties: {}},
+            size = this.getTileSize(),
+            latlng = this._map.unproject(
+                [(coords.x + f.x / f.extent) * size.x, (coords.y + f.y / f.extent) * size.y],
+                coords.z);
+
+        // Restore the language object from the flattened properties:
+        for (name in f.properties) {
+            if (f.properties.hasOwnProperty(name)) {
+                if (name.indexOf('language_') === 0) {
+                    feature.properties.language = feature.properties.language || {};
+                    feature.properties.language[name.slice(9)] = f.properties[name];
+                } else {
+                    feature.properties[name] = f.properties[name];
+                }
+            }
+        }
+        feature.geometry = {type: 'Point', coordinates: [latlng.lng, latlng.lat]};
+        marker = L.GeoJSON.geometryToLayer(feature, this._geojson.options);
+        marker.feature = feature;
+        if (this._geojson.options.onEachFeature) {
+            this._geojson.options.onEachFeature(feature, marker);
+        }
+        this._geojson.addLayer(marker);
+        return marker;
+    }
+});
+
+
 /**
  * Manager for a leaflet map
  *
@@ -449,6 +669,8 @@ CLLD.Map = function(eid, layers, options) {
     this.options.on_init = options.on_init === undefined ? function(a){} : options.on_init;
     this.options.resize_direction = options.resize_direction;
     this.options.with_audioplayer = options.with_audioplayer === undefined ? false : options.with_audioplayer;
+    this.options.viewport = options.viewport === undefined ? false : options.viewport;
+    this.options.tiles = options.tiles === undefined ? false : options.tiles;
 
     this.map = L.map(
         eid,
@@ -533,7 +755,20 @@ CLLD.Map = function(eid, layers, options) {
      * @private
      */
     var _onEachFeature = function(feature, layer) {
-        if (layer.setIcon !== undefined) {
+        if (layer.setIcon !== undefined && feature.properties.cluster) {
+            // A cluster of features - with the same icon - merged on the server - zoom in when clicked:
+            layer.setIcon(L.divIcon({
+                html: (feature.properties.icon ? '<img src="' + feature.properties.icon + '" width="20" height="20"/>' : '') +
+                    '<span class="badge badge-info">' + feature.properties.point_count + '</span>',
+                className: 'clld-map-cluster',
+                iconSize: null
+            }));
+            layer.bindTooltip(feature.properties.label);
+            layer.on('click', function() {
+                var map = CLLD.Maps[eid];
+                map.map.setView(layer.getLatLng(), Math.min(map.map.getZoom() + 2, map.map.getMaxZoom()));
+            });
+        } else if (layer.setIcon !== undefined) {
             var map = CLLD.Maps[eid],
                 size = map.options.icon_size;
             if (feature.properties.icon_size) {
@@ -630,6 +865,72 @@ CLLD.Map = function(eid, layers, options) {
         }
     };
 
+    this.layer_requests = {};
+
+    /**
+     * Load the GeoJSON data for a layer from its URL.
+     *
+     * If the map option `viewport` is set, only the data for the current viewport is
+     * requested, passing bbox and zoom level. Initially - when the map has no viewport yet -
+     * clustered data for the whole world is requested.
+     *
+     * @param name    Name of the layer.
+     * @param initial Flag signaling the initial load, after which the map is zoomed to extent.
+     * @private
+     */
+    var _loadLayer = function(name, initial) {
+        var map = CLLD.Maps[eid],
+            params = {layer: name},
+            request_id = (map.layer_requests[name] || 0) + 1;
+
+        map.layer_requests[name] = request_id;
+        if (map.options.viewport) {
+            params.z = initial ? 0 : map.map.getZoom();
+            if (!initial) {
+                params.bbox = map.map.getBounds().toBBoxString();
+            }
+        }
+        $.getJSON(map.layer_geojson[name], params, function(data) {
+            var map = CLLD.Maps[eid],
+                layer = map.layer_map[data.properties.layer];
+
+            if (map.layer_requests[data.properties.layer] !== request_id) {
+                // A more recent request for the layer is pending.
+                return;
+            }
+            if (!initial) {
+                layer.eachLayer(function(marker) {
+                    if (marker.feature.properties.language) {
+                        delete map.marker_map[marker.feature.properties.language.id];
+                    }
+                });
+                layer.clearLayers();
+            }
+            layer.addData(data);
+            if (initial) {
+                _zoomToExtent();
+            }
+            if (map.options.show_labels && !map.options.exclude_from_zoom.includes(data.properties.layer)) {
+                map.eachMarker(function(marker, lid){
+                    if (!('lids' in window) || lids.includes(lid)) {
+                        marker.openTooltip()
+                    }
+                })
+            }
+        });
+    };
+
+    if (this.options.viewport && !this.options.tiles) {
+        this.map.on('moveend', function() {
+            var map = CLLD.Maps[eid];
+            for (name in map.layer_geojson) {
+                if (map.layer_geojson.hasOwnProperty(name) && $.type(map.layer_geojson[name]) === 'string') {
+                    _loadLayer(name, false);
+                }
+            }
+        });
+    }
+
     for (name in layers) {
         if (layers.hasOwnProperty(name)) {
             opts = {onEachFeature: _onEachFeature};
@@ -642,19 +943,21 @@ CLLD.Map = function(eid, layers, options) {
             }
             this.layer_geojson[name] = layers[name];
 
-            if ($.type(layers[name]) === 'string') {
-                $.getJSON(layers[name], {layer: name}, function(data) {
-                    var map = CLLD.Maps[eid];
-                    map.layer_map[data.properties.layer].addData(data);
-                    _zoomToExtent();
-                    if (map.options.show_labels && !map.options.exclude_from_zoom.includes(data.properties.layer)) {
-                        map.eachMarker(function(marker, lid){
-                            if (!('lids' in window) || lids.includes(lid)) {
-                                marker.openTooltip()
-                            }
-                        })
+            if ($.type(layers[name]) === 'string' && this.options.tiles) {
+                // Consume vector tiles, served under the URL of the GeoJSON:
+                new CLLD.MapTileLayer(
+                    layers[name].replace(/\.geojson(\?|$)/, '/tiles/{z}/{x}/{y}.mvt$1'),
+                    this.layer_map[name]).addTo(this.map);
+                this.layer_map[name].on('layerremove', function(e) {
+                    // Markers are removed when their tile is unloaded:
+                    var map = CLLD.Maps[eid],
+                        language = e.layer.feature.properties.language;
+                    if (language && map.marker_map[language.id] === e.layer) {
+                        delete map.marker_map[language.id];
                     }
                 });
+            } else if ($.type(layers[name]) === 'string') {
+                _loadLayer(name, true);
             } else {
                 local_data = true;
                 this.layer_map[name].addData(layers[name]);
@@ -662,6 +965,11 @@ CLLD.Map = function(eid, layers, options) {
         }
     }
 
+    if (this.options.tiles && !local_data) {
+        // Without data, the map can only be zoomed to the whole world:
+        _zoomToExtent();
+    }
+
     if (local_data) {
         _zoomToExtent();
         if (this.options.show_labels) {
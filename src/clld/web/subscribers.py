@@ -1,5 +1,6 @@
 from pyramid.i18n import get_localizer, TranslationStringFactory
 
+from clld.cache import get_cache
 from clld.web.util import helpers
 from clld.web.assets import environment
 
@@ -29,24 +30,65 @@ def add_renderer_globals(module, event):
                     event[k] = v
 
 
-tsf = TranslationStringFactory('clld')
+DOMAIN = 'clld'
+tsf = TranslationStringFactory(DOMAIN)
 
 
 def add_localizer(event):
     _add_localizer(event.request)
 
 
+def _mapping_key(mapping):
+    return tuple(sorted(mapping.items())) if isinstance(mapping, dict) else mapping
+
+
+def _translation_key(locale_name, args, kwargs):
+    msgid = args[0] if args else kwargs.get('msgid')
+    return (
+        locale_name,
+        getattr(msgid, 'domain', None) or DOMAIN,
+        # TranslationStrings compare equal to plain strings, regardless of their mapping:
+        _mapping_key(getattr(msgid, 'mapping', None)),
+        getattr(msgid, 'default', None),
+        args,
+        tuple(sorted((k, _mapping_key(v)) for k, v in kwargs.items())))
+
+
+def translator(localizer):
+    """Create a translation function for a localizer.
+
+    Translations are cached across requests - per locale, keyed by domain, msgid and
+    mapping - thus, translating the same constant strings for each request does not run the
+    gettext machinery.
+    """
+    def auto_translate(*args, **kwargs):
+        try:
+            key = _translation_key(localizer.locale_name, args, kwargs)
+            hash(key)
+        except TypeError:
+            # Unhashable mapping values:
+            return localizer.translate(tsf(*args, **kwargs))
+        cache = get_cache('translations', maxsize=10000)
+        res = cache.get(key)
+        if res is None:
+            res = localizer.translate(tsf(*args, **kwargs))
+            cache.set(key, res)
+        return res
+
+    return auto_translate
+
+
 def _add_localizer(request):
     if hasattr(request, 'translate'):
         return
 
     request._LOCALE_ = request.params.get('__locale__', 'en')
     localizer = get_localizer(request)
-
-    def auto_translate(*args, **kwargs):
-        return localizer.translate(tsf(*args, **kwargs))
-
-    request._ = request.translate = auto_translate
+    # Translation functions are created once per localizer, i.e. per locale:
+    translators = request.registry.__dict__.setdefault('clld_translators', {})
+    if translators.get(localizer.locale_name, (None,))[0] is not localizer:
+        translators[localizer.locale_name] = (localizer, translator(localizer))
+    request._ = request.translate = translators[localizer.locale_name][1]
 
 
 def init_map(event):
@@ -24,7 +24,10 @@
         % endfor
 
         <link rel="unapi-server" type="application/xml" title="unAPI" href="${request.route_url('unapi')}">
-        <script src="${request.route_url('_js', _query=request.query_params)}"></script>
+        <script>
+${h.js_request_globals(request)|n}
+        </script>
+        <script src="${h.route_table_url(request)}"></script>
         <%block name="head"> </%block>
         % for name, util in request.registry.getUtilitiesFor(h.interfaces.IStaticResource):
             % if util.type == 'css':
@@ -0,0 +1,93 @@
+"""Pyramid tweens."""
+from pyramid.interfaces import IRoutesMapper
+from pyramid.response import Response, FileResponse, FileIter
+
+from clld import RESOURCES
+from clld.cache import get_response_cache, dataset_version
+from clld.lib.rdf import FORMATS as RDF_NOTATIONS
+
+__all__ = ['page_cache_tween_factory']
+
+#: Mimetypes of responses which can be cached by the page cache.
+CACHEABLE_MIMETYPES = {
+    'text/html',
+    'application/vnd.clld.snippet+xml',
+    'application/json',
+    'application/xml',
+} | {notation.mimetype for notation in RDF_NOTATIONS.values()}
+
+
+def _page_cache_key(req, route_names):
+    info = req.registry.getUtility(IRoutesMapper)(req)
+    if not info['route'] or info['route'].name not in route_names:
+        return None
+    params = sorted((k, v) for k, v in req.GET.items() if k != '_')
+    return (
+        # The pages contain absolute URLs:
+        req.host_url,
+        info['route'].name,
+        tuple(sorted(info['match'].items())),
+        req.params.get('__locale__'),
+        tuple(params),
+        # Without explicit extension, the representation is selected by content negotiation:
+        None if info['match'].get('ext') else str(req.accept),
+        dataset_version())
+
+
+def page_cache_tween_factory(handler, registry):
+    """Tween caching the rendered pages of resource and index views.
+
+    If the response cache ``page`` is enabled (see :mod:`clld.cache`), successful responses
+    to GET requests for resources or resource indexes are cached - if their mimetype is
+    listed in :data:`CACHEABLE_MIMETYPES`. Cached responses carry the header
+    ``X-Clld-Cache: hit``, otherwise ``X-Clld-Cache: miss`` is sent. If the setting
+    ``clld.page_cache_max_age`` is specified, cacheable responses can be cached by clients
+    and proxies for this number of seconds.
+
+    Only anonymous requests - i.e. requests without cookies or ``Authorization`` header -
+    are served from - and stored in - the cache, thus, output rendered for a particular
+    user is never shared.
+    """
+    route_names = set()
+    for rsc in RESOURCES:
+        for name in [rsc.name, rsc.plural]:
+            route_names.update([name, name + '_alt'])
+
+    def tween(req):
+        cache = get_response_cache(req, 'page')
+        if cache is None or req.method != 'GET' or req.is_xhr \
+                or req.cookies or 'Authorization' in req.headers:
+            return handler(req)
+        key = _page_cache_key(req, route_names)
+        if key is None:
+            return handler(req)
+
+        cached = cache.get(key)
+        if cached is not None:
+            status, headerlist, body = cached
+            res = Response(body=body, status=status, headerlist=list(headerlist))
+            res.conditional_response = True
+            res.headers['X-Clld-Cache'] = 'hit'
+            return res
+
+        res = handler(req)
+        # Responses with content encoding - e.g. precompressed files - depend on the
+        # Accept-Encoding header, which is not part of the cache key. Files - served by the
+        # app or by the web server - are not read into the cache either:
+        if res.status_int == 200 and res.content_type in CACHEABLE_MIMETYPES \
+                and not res.content_encoding \
+                and 'X-Accel-Redirect' not in res.headers \
+                and not isinstance(res, FileResponse) \
+                and not isinstance(res.app_iter, FileIter):
+            max_age = req.registry.settings.get('clld.page_cache_max_age')
+            if max_age is not None:
+                res.cache_control.public = True
+                res.cache_control.max_age = int(max_age)
+            cache.set(key, (
+                res.status,
+                [(k, v) for k, v in res.headerlist if k.lower() != 'set-cookie'],
+                res.body))
+            res.headers['X-Clld-Cache'] = 'miss'
+        return res
+
+    return tween
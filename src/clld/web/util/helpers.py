@@ -4,6 +4,8 @@
 """
 import os
 import re
+import json
+import hashlib
 from itertools import zip_longest, groupby  # we just import this to have it available in templates!
 import datetime  # we just import this to have it available in templates!
 from base64 import b64encode
@@ -21,7 +23,7 @@ from clldutils.coordinates import degminsec
 
 import clld
 from clld import interfaces
-from clld import RESOURCES
+from clld import RESOURCES, resource_for
 from clld.web.util.htmllib import HTML, literal
 from clld.web.util.downloadwidget import DownloadWidget
 from clld.db.meta import DBSession
@@ -118,6 +120,42 @@ def get_url_template(req, route, relative=True, variable_map=None):
             route.pattern)
 
 
+def route_table(registry):
+    """JavaScript code registering the URL patterns of all routes with the CLLD object.
+
+    Since the routes of an app do not change once the configuration is committed, the code
+    is computed once per registry.
+
+    :return: pair (code, fingerprint)
+    """
+    if 'clld_route_table' not in registry.__dict__:
+        param_pattern = re.compile(r'\{(?P<name>[a-z]+)(\:[^\}]+)?\}')
+        code = '\n'.join(
+            'CLLD.routes[%s] = %s;' % tuple(map(json.dumps, [
+                route.name,
+                param_pattern.sub(lambda m: '{%s}' % m.group('name'), route.pattern)]))
+            for route in registry.getUtility(IRoutesMapper).get_routes())
+        registry.__dict__['clld_route_table'] = (
+            code, hashlib.md5(code.encode('utf8')).hexdigest()[:16])
+    return registry.__dict__['clld_route_table']
+
+
+def route_table_url(req):
+    """URL path of the route table, fingerprinted, thus cacheable forever."""
+    return req.route_path('_routes', fingerprint=route_table(req.registry)[1])
+
+
+def js_request_globals(req):
+    """JavaScript code setting the request specific attributes of the CLLD object.
+
+    The code is safe to be included in an HTML script element.
+    """
+    return Markup('\n'.join(
+        'CLLD.%s = %s;' % (name, json.dumps(value).replace('<', '\\u003c'))
+        for name, value in [
+            ('base_url', req.application_url), ('query_params', req.query_params)]))
+
+
 def rdf_namespace_attrs():
     return '\n'.join('xmlns:%s="%s"' % item for item in rdf.NAMESPACES.items())
 
@@ -287,12 +325,13 @@ def link(req, obj, **kw):
         kw['class'] = kw['class_']
         del kw['class_']
 
-    rsc = None
+    rsc = resource_for(obj)
     rsc_name = kw.pop('rsc', None)
-    for _rsc in RESOURCES:
-        if _rsc.interface.providedBy(obj) or _rsc.name == rsc_name:
-            rsc = _rsc
-            break
+    if rsc_name and (rsc is None or rsc.name != rsc_name):
+        for _rsc in RESOURCES:
+            if _rsc == rsc or _rsc.name == rsc_name:
+                rsc = _rsc
+                break
     assert rsc
     href = kw.pop('href', req.resource_url(obj, rsc=rsc, **kw.pop('url_kw', {})))
     kw['class'] = ' '.join(
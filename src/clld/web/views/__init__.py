@@ -1,16 +1,27 @@
 """View logic for clld default views."""
 import re
 import json
+import hashlib
+import datetime
 import functools
 
 from pyramid.response import Response
 import pyramid.httpexceptions
-from pyramid.interfaces import IRoutesMapper
-from pyramid.renderers import render, render_to_response
-
-from clld.interfaces import IRepresentation, IIndex, IMetadata
+from pyramid.renderers import render
+from pyramid.settings import asbool
+from sqlalchemy import func
+
+from clld.cache import get_cache, get_response_cache, dataset_version
+from clld.db import querylog
+from clld.interfaces import IRepresentation, IIndex, IMetadata, IDataTable
+from clld.lib import mvt
 from clld.web.adapters import get_adapter, get_adapters
+from clld.web.adapters.geojson import flatten
 from clld.web.util.multiselect import MultiSelect
+from clld.web.util.helpers import route_table, route_table_url, js_request_globals
+from clld.web.icon import svg_icon
+from clld.web.datatables.base import type_coerce
+from clld.db.meta import DBSession
 from clld.db.models.common import Combination
 
 
@@ -42,11 +53,76 @@ def gone(ctx, req):
     raise pyramid.httpexceptions.HTTPGone()
 
 
+_MISSING = object()
+
+
+def last_modified(ctx):
+    """Determine when the data of a context object was last modified.
+
+    For DataTables, the timestamp is cached per table, constraints and
+    :func:`clld.cache.dataset_version`.
+
+    :param ctx: model instance or DataTable.
+    :return: timezone aware `datetime.datetime` or `None`.
+    """
+    if hasattr(ctx, 'base_query'):
+        cache = get_cache('last_modified', maxsize=1000)
+        key = (
+            ctx.__class__.__module__,
+            ctx.__class__.__name__,
+            ctx.model.__name__,
+            tuple(sorted(ctx.xhr_query().items())),
+            dataset_version())
+        res = cache.get(key, default=_MISSING)
+        if res is _MISSING:
+            model = ctx.db_model()
+            try:
+                res = ctx.base_query(DBSession.query(model).filter(model.active == True))\
+                    .order_by(None).with_entities(func.max(model.updated)).scalar()
+            except Exception:  # pragma: no cover
+                # Custom base queries may not allow replacing the selected entities.
+                res = None
+            cache.set(key, res)
+    else:
+        res = getattr(ctx, 'updated', None)
+    if isinstance(res, datetime.datetime):
+        if res.tzinfo is None:
+            res = res.replace(tzinfo=datetime.timezone.utc)
+        # HTTP dates have a resolution of seconds:
+        return res.replace(microsecond=0)
+
+
+def conditional_get_validators(ctx, req, adapter):
+    """Compute the validators for the representation of a context object.
+
+    The entity tag is derived from the :func:`clld.cache.dataset_version`, the adapter's
+    mimetype, the query string and the timestamp of the last modification of the data.
+
+    :return: pair (etag, last modified timestamp) or `None`, if conditional GET is not enabled.
+    """
+    if req.method not in ('GET', 'HEAD') \
+            or not asbool(req.registry.settings.get('clld.conditional_get')):
+        return None
+    modified = last_modified(ctx)
+    etag = hashlib.md5(repr((
+        dataset_version(),
+        adapter.send_mimetype or adapter.mimetype,
+        adapter.extension,
+        req.query_string,
+        modified.isoformat() if modified else None,
+    )).encode('utf8')).hexdigest()
+    return etag, modified
+
+
 def view(interface, ctx, req, getadapters=False):
     """Render a resource as pyramid response.
 
     Using the most appropriate adapter for the accept header sent.
 
+    If ``clld.conditional_get = true``, responses carry ``ETag`` and ``Last-Modified``
+    headers, and requests with matching ``If-None-Match`` or ``If-Modified-Since`` headers
+    are answered with ``304 Not Modified`` - without rendering the resource.
+
     :param getadapters: If True, the adapter used to render the response and the list of\
     all available adapters for the context are returned as well.
     """
@@ -58,12 +134,28 @@ def view(interface, ctx, req, getadapters=False):
         interface, ctx, req, ext=req.matchdict and req.matchdict.get('ext'), getall=True)
     if not adapter:
         raise pyramid.httpexceptions.HTTPNotAcceptable()
-    res = adapter.render_to_response(ctx, req)
+    validators = conditional_get_validators(ctx, req, adapter)
+    if validators and _not_modified(req, *validators):
+        res = pyramid.httpexceptions.HTTPNotModified()
+        res.vary = str('Accept')
+    else:
+        res = adapter.render_to_response(ctx, req)
+    if validators:
+        res.etag = validators[0]
+        if validators[1]:
+            res.last_modified = validators[1]
     if getadapters:
         return res, adapter, adapters
     return res  # pragma: no cover
 
 
+def _not_modified(req, etag, modified):
+    if req.if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since, see RFC 7232, Section 6
+        return etag in req.if_none_match
+    return bool(modified and req.if_modified_since and modified <= req.if_modified_since)
+
+
 def _add_link_header(response, url, adapter=None, rel="canonical", mimetype="text/html"):
     if adapter:
         rel = adapter.rel
@@ -103,9 +195,71 @@ def resource_view(ctx, req):
     return res
 
 
+#: Parameters of DataTables XHR requests which do not affect the data returned.
+XHR_IGNORED_PARAMS = re.compile(
+    r'^(sEcho|_|sCursor|iColumns|sColumns|sSearch|bRegex|'
+    r'(mDataProp|bRegex|bSearchable|bSortable)_[0-9]+)$')
+
+
+def _xhr_cache_key(ctx, req):
+    """Compute a cache key for the data requested by a DataTables XHR request."""
+    params = {k: v for k, v in req.params.items() if v and not XHR_IGNORED_PARAMS.match(k)}
+    sorting = type_coerce(int, params.get('iSortingCols', 0), 0)
+    params = sorted(
+        (k, v) for k, v in params.items()
+        if not (k.startswith(('iSortCol_', 'sSortDir_'))
+                and type_coerce(int, k.split('_')[1], sorting) >= sorting))
+    return (
+        # The data contains absolute URLs:
+        req.host_url,
+        req.matched_route.name if req.matched_route else req.path,
+        ctx.__class__.__module__,
+        ctx.__class__.__name__,
+        tuple(sorted(ctx.xhr_query().items())),
+        tuple(params),
+        req.locale_name,
+        dataset_version())
+
+
 def datatable_xhr_view(ctx, req):
+    """Render the JSON data requested by DataTables.
+
+    If the response cache ``xhr`` is enabled (see :mod:`clld.cache`), responses are cached
+    for canonicalized request parameters. If the query log is enabled, the queries executed
+    to compute a response are recorded, see :mod:`clld.db.querylog`.
+    """
+    cache = get_response_cache(req, 'xhr')
+    key = _xhr_cache_key(ctx, req) if cache else None
+    body = cache.get(key) if cache else None
+    if body is None:
+        with querylog.record(req):
+            body = _datatable_xhr_body(ctx, req)
+        if cache:
+            cache.set(key, body)
+
+    # sEcho parameter.
+    # Note that it strongly recommended for security reasons that you 'cast' this
+    # parameter to an integer in order to prevent Cross Site Scripting (XSS) attacks.
+    try:
+        echo = int(req.params['sEcho'])
+    except ValueError:
+        echo = 1
+
+    # We patch the sEcho parameter into the JSON object:
+    return Response(
+        '{"sEcho": "%s", %s' % (echo, body[1:]),
+        content_type='application/json',
+        charset='utf-8')
+
+
+def _datatable_xhr_body(ctx, req):
+    """Serialize the data of the current DataTable page, except for the sEcho parameter."""
     # call get_query, thereby - as side effect - making sure, the counts are set.
-    items = ctx.get_query()
+    # Since we only format the columns, we only need to load what the columns need.
+    query = ctx.get_query().options(*ctx.load_only_options())
+    with querylog.label('page') as info:
+        items = list(query)
+        info['rows'] = len(items)
     if hasattr(ctx, 'row_class'):
         data = []
         for item in items:
@@ -119,34 +273,103 @@ def datatable_xhr_view(ctx, req):
     else:
         data = [[col.format(item) for col in ctx.cols] for item in items]
 
-    # sEcho parameter.
-    # Note that it strongly recommended for security reasons that you 'cast' this
-    # parameter to an integer in order to prevent Cross Site Scripting (XSS) attacks.
-    try:
-        echo = int(req.params['sEcho'])
-    except ValueError:
-        echo = 1
-
     res = {
         "aaData": data,
-        "sEcho": str(echo),
         "iTotalRecords": ctx.count_all,
         "iTotalDisplayRecords": ctx.count_filtered,
     }
-    return render_to_response('json', res, request=req)
+    cursor = ctx.keyset_cursor(items)
+    if cursor:
+        res['sCursor'] = cursor
+    return render('json', res, request=req)
 
 
 def js(req):
-    param_pattern = re.compile(r'\{(?P<name>[a-z]+)(\:[^\}]+)?\}')
+    """JavaScript code initializing the CLLD object for a request.
+
+    .. note:: Templates should rather include the request specific code inline (see
+        :func:`clld.web.util.helpers.js_request_globals`) and load the cacheable route
+        table from :func:`routes`.
+    """
+    return Response(
+        '\n'.join([js_request_globals(req), route_table(req.registry)[0]]),
+        content_type="text/javascript")
+
+
+def routes(req):
+    """The route table, served with far-future caching under a fingerprinted URL."""
+    code, fingerprint = route_table(req.registry)
+    if req.matchdict['fingerprint'] != fingerprint:
+        # A stale fingerprint, e.g. from a cached page referencing a previous deployment:
+        raise pyramid.httpexceptions.HTTPFound(route_table_url(req))
+    res = Response(code, content_type="text/javascript")
+    res.cache_control = 'public, max-age=31536000, immutable'
+    return res
+
+
+def icon(req):
+    """Map marker icon as SVG.
+
+    Since the icon is fully specified by its URL, it can be cached forever.
+    """
+    try:
+        body = svg_icon(req.matchdict['spec'])
+    except ValueError:
+        raise pyramid.httpexceptions.HTTPNotFound()
+    res = Response(body, content_type='image/svg+xml', charset='utf-8')
+    res.cache_control = 'public, max-age=31536000, immutable'
+    return res
+
+
+#: Maximal zoom level for which vector tiles are served.
+TILES_MAX_ZOOM = 18
+
+
+def _tile_features(ctx, req, adapter, key):
+    cache = get_cache('tile_features', maxsize=100000)
+    features = cache.get(key)
+    if features is None:
+        features = []
+        for feature in json.loads(adapter.render(ctx, req))['features']:
+            properties = flatten(feature['properties'])
+            if 'id' in feature:
+                properties.setdefault('id', feature['id'])
+            features.append(dict(geometry=feature['geometry'], properties=properties))
+        # The cache size is measured in features:
+        cache.set(key, features, size=len(features) + 1)
+    return features
+
+
+def tiles(ctx, req):
+    """Vector tile of the GeoJSON features of a resource - or of an index of resources.
 
-    res = [
-        "CLLD.base_url = %s;" % json.dumps(req.application_url),
-        "CLLD.query_params = %s;" % json.dumps(req.query_params),
-    ]
-    for route in req.registry.getUtility(IRoutesMapper).get_routes():
-        pattern = param_pattern.sub(lambda m: '{%s}' % m.group('name'), route.pattern)
-        res.append('CLLD.routes[%s] = %s;' % tuple(map(json.dumps, [route.name, pattern])))
-    return Response('\n'.join(res), content_type="text/javascript")
+    The features are the ones served by the ``geojson`` adapter for the context, clustered
+    for the zoom level of the tile (see :mod:`clld.web.adapters.geojson`). Longitudes are
+    not wrapped, i.e. features of pacific centered maps are served in tiles with
+    ``x >= 2 ** z``. Both, the features for a zoom level and the encoded tiles are cached
+    until the database is reloaded.
+    """
+    z, x, y = [int(req.matchdict[k]) for k in 'zxy']
+    if z > TILES_MAX_ZOOM or y >= 2 ** z:
+        raise pyramid.httpexceptions.HTTPNotFound()
+    adapter = get_adapter(
+        IIndex if IDataTable.providedBy(ctx) else IRepresentation, ctx, req, ext='geojson')
+    if not adapter:
+        raise pyramid.httpexceptions.HTTPNotFound()
+
+    source = (
+        req.matched_route.name,
+        req.matchdict.get('id'),
+        tuple(sorted(req.GET.items())),
+        dataset_version(),
+        z)
+    cache = get_cache('tiles', maxsize=10000)
+    body = cache.get(source + (x, y))
+    if body is None:
+        body = cache.set(
+            source + (x, y),
+            mvt.encode(_tile_features(ctx, req, adapter, source), z, x, y))
+    return Response(body, content_type='application/vnd.mapbox-vector-tile')
 
 
 def select_combination(ctx, req):
@@ -170,6 +393,26 @@ def _ping(req):
     return {'status': 'ok'}
 
 
+#: Addresses of requests from the local host.
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+
+
+def _query_log(req):
+    """view to inspect the queries recorded for DataTable requests.
+
+    Since the recorded queries include bound parameters, only requests from the local host
+    - neither forwarded by a proxy for another host - are served.
+    """
+    addresses = [req.remote_addr] + [
+        a.strip() for a in req.headers.get('X-Forwarded-For', '').split(',') if a.strip()]
+    if not all(a in LOCAL_ADDRESSES for a in addresses):
+        raise pyramid.httpexceptions.HTTPForbidden()
+    return Response(
+        json.dumps(querylog.entries(), indent=2, default=str),
+        content_type='application/json',
+        charset='utf-8')
+
+
 def unapi(req):
     """View callable implementing the server side of the unAPI spec."""
     id_ = req.params.get('id')
@@ -147,7 +147,7 @@ describe('DataTable', function () {
 
 describe('MapWithRemoteData', function () {
     before(function () {
-        document.body.innerHTML = '<div id="map"/><div id="map2"/> <div id="map3"/>';
+        document.body.innerHTML = '<div id="map"/><div id="map2"/> <div id="map3"/> <div id="map4"/> <div id="map5"/>';
         sinon.stub($, 'getJSON').callsFake(function (url, opts, callback) {
             callback(
                 {
@@ -197,6 +197,9 @@ describe('MapWithRemoteData', function () {
         CLLD.mapShowInfoWindow('map', layer);
         CLLD.map('map2', {l: url}, {sidebar: true, zoom: 3});
         CLLD.map('map3', {l: url}, {icon_size: 15, base_layer: 'OpenTopoMap'});
+        CLLD.map('map4', {l: url}, {viewport: true, center: [5.5, 5.5], zoom: 3});
+        CLLD.mapGetMap('map4').map.setView([6.5, 6.5], 4);
+        CLLD.map('map5', {l: url}, {tiles: true, center: [5.5, 5.5], zoom: 3});
     });
 });
 
@@ -183,8 +183,21 @@ def populate_test_db(engine):
     DBSession.flush()
 
 
+@pytest.fixture(autouse=True)
+def caches():
+    from clld import cache
+
+    yield cache
+    cache.invalidate()
+
+
 @pytest.fixture
 def db(db):
+    # Bootstrapping apps or using a SessionContext in previous tests may have replaced the
+    # session - bound to another engine:
+    if DBSession.get_bind() is not db:
+        DBSession.remove()
+        DBSession.configure(bind=db)
     try:
         yield db
     finally:
@@ -0,0 +1,94 @@
+import datetime
+
+from clld.db.models import common
+from clld.cache import *
+
+
+def test_LRUCache():
+    cache = LRUCache(maxsize=2)
+    assert cache.set('a', 1) == 1
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert 'b' not in cache and 'a' in cache and len(cache) == 2
+    assert cache.get('b', 5) == 5
+    assert cache.pop('a') == 1
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_cache_enabled(env):
+    assert not cache_enabled(env['request'], 'x')
+    env['registry'].settings['clld.x_cache'] = 'true'
+    assert cache_enabled(env['request'], 'x')
+    assert cache_enabled({'clld.x_cache': True}, 'x')
+
+
+def test_get_cache_and_invalidate(data):
+    cache = get_cache('test')
+    assert get_cache('test') is cache
+    cache.set('a', 1)
+    version = dataset_version()
+    assert version == dataset_version()
+    invalidate()
+    assert 'a' not in cache
+
+
+def test_dataset_version(data, mocker):
+    from clld import cache as cache_module
+    from clld.db.meta import DBSession
+
+    cache = get_cache('test')
+    cache.set('a', 1)
+    version = dataset_version()
+    DBSession.query(common.Dataset).first().published = datetime.date(2000, 1, 1)
+    DBSession.flush()
+    # Within the TTL, the database is not checked:
+    assert dataset_version() == version and 'a' in cache
+    mocker.patch.object(cache_module, 'VERSION_TTL', -1)
+    assert dataset_version() != version
+    assert 'a' not in cache
+
+    # The version is looked up without using - i.e. starting a transaction in - the session:
+    mocker.patch.object(DBSession, 'query', side_effect=AssertionError)
+    mocker.patch.object(DBSession, 'connection', side_effect=AssertionError)
+    assert dataset_version() == dataset_version()
+
+
+def test_TieredCache(tmp_path):
+    disk = DiskCache(tmp_path / 'c')
+    cache = TieredCache(LRUCache(maxsize=1), disk)
+    cache.set('a', b'x')
+    cache.set('b', b'y')
+    assert 'a' not in cache.memory and 'a' in cache
+    assert cache.get('a') == b'x' and 'a' in cache.memory
+    assert TieredCache(LRUCache(), DiskCache(tmp_path / 'c')).get('b') == b'y'
+    cache.clear()
+    assert cache.get('b') is None and not disk.directory.exists()
+
+
+def test_get_response_cache(env):
+    assert get_response_cache(env['request'], 'resp') is None
+    env['registry'].settings['clld.resp_cache'] = 'true'
+    assert get_response_cache(env['request'], 'resp').disk is None
+
+
+def test_dataset(env):
+    from clld.db.meta import DBSession
+    from clld.web.app import ClldRequest
+
+    def request():
+        req = ClldRequest.blank('/')
+        req.registry = env['registry']
+        return req
+
+    assert request().dataset is not dataset()
+    env['registry'].settings['clld.dataset_cache'] = 'true'
+    ds = request().dataset
+    assert ds is dataset()
+    # The snapshot does not depend on the session:
+    DBSession.expunge_all()
+    assert request().dataset is ds
+    assert ds.formatted_editors() and ds.datadict() is not None and ds.updated
+    invalidate()
+    assert dataset() is not ds
@@ -23,7 +23,7 @@ def test_create(tmp_path):
 
 
 @pytest.mark.filterwarnings("ignore:No module named")
-def test_initdb(tmp_path):
+def test_initdb(tmp_path, mocker):
     tmp_path.joinpath('tests').mkdir()
     cfg = tmp_path / 'tests' / 'test.ini'
     cfg.write_text("""\
@@ -31,7 +31,114 @@ def test_initdb(tmp_path):
 use = call:testutils:main
 sqlalchemy.url = sqlite:///{}
     """.format(tmp_path / 'db.sqlite'), encoding='utf8')
-    main(['initdb', str(cfg)])
+    from clld.web.datatables.sentence import Sentences
+    from clld.web.datatables.language import Languages
+
+    log = mocker.Mock()
+    mocker.patch('clld.db.fts.create_index', side_effect=ValueError)
+    mocker.patch.object(Sentences, '__fulltext__', ['name'], create=True)
+    mocker.patch.object(Languages, 'col_defs', side_effect=KeyError('param'))
+    # Failing to create full-text indexes or to instantiate a datatable does not abort initdb:
+    main(['initdb', str(cfg)], log=log)
+    warnings = [c[0][0] for c in log.warning.call_args_list]
+    assert any('full-text' in w for w in warnings)
+    assert any('languages' in w for w in warnings)
+
+    from sqlalchemy import create_engine
+
+    with create_engine('sqlite:///{}'.format(tmp_path / 'db.sqlite')).connect() as conn:
+        keys = [r[0] for r in conn.exec_driver_sql('SELECT key FROM config')]
+    assert '__distinct_values_Sentence.type__' in keys
 
     with pytest.raises(ValueError):
         main(['initdb', str(tmp_path / 'xyz.ini')])
+
+
+@pytest.mark.filterwarnings("ignore:No module named")
+def test_create_search_indexes(tmp_path, mocker):
+    from clld.web.datatables.sentence import Sentences
+
+    # Full-text search is opt-in:
+    mocker.patch.object(Sentences, '__fulltext__', ['name', 'gloss', 'description'], create=True)
+    tmp_path.joinpath('tests').mkdir()
+    cfg = tmp_path / 'tests' / 'test.ini'
+    cfg.write_text("""\
+[app:main]
+use = call:testutils:main
+sqlalchemy.url = sqlite:///{}
+    """.format(tmp_path / 'db.sqlite'), encoding='utf8')
+    main(['initdb', str(cfg)])
+    main(['create_search_indexes', str(cfg)], log=logging.getLogger(__name__))
+
+    from sqlalchemy import create_engine, inspect
+
+    tables = inspect(
+        create_engine('sqlite:///{}'.format(tmp_path / 'db.sqlite'))).get_table_names()
+    assert 'trgm_language_name' in tables
+    assert 'fts_sentence' in tables
+    # Columns with custom search are not searched using the full-text index:
+    assert 'trgm_sentence_gloss' in tables
+    assert 'trgm_sentence_description' not in tables
+
+
+@pytest.mark.filterwarnings("ignore:No module named")
+def test_create_indexes(tmp_path):
+    from sqlalchemy import create_engine, inspect
+
+    tmp_path.joinpath('tests').mkdir()
+    cfg = tmp_path / 'tests' / 'test.ini'
+    cfg.write_text("""\
+[app:main]
+use = call:testutils:main
+sqlalchemy.url = sqlite:///{}
+    """.format(tmp_path / 'db.sqlite'), encoding='utf8')
+    main(['initdb', str(cfg)])
+    engine = create_engine('sqlite:///{}'.format(tmp_path / 'db.sqlite'))
+    with engine.begin() as conn:
+        conn.exec_driver_sql('DROP INDEX ix_config_key')
+    main(['create_indexes', str(cfg)], log=logging.getLogger(__name__))
+    assert 'ix_config_key' in [i['name'] for i in inspect(engine).get_indexes('config')]
+
+
+@pytest.mark.filterwarnings("ignore:No module named")
+def test_freeze(data, testsdir, tmp_path, persist):
+    from clld.db.models.common import Language
+
+    persist(Language(id='ä b', name='Name'))
+    main(['freeze', str(testsdir / 'test.ini'), 'example.org', str(tmp_path / 'out')],
+         log=logging.getLogger(__name__))
+    out = tmp_path / 'out'
+    # Files are stored under the decoded URL path:
+    assert out.joinpath('languages', 'ä b', 'index.html').exists()
+    assert out.joinpath('index.html').exists()
+    assert out.joinpath('languages', 'index.html').exists()
+    assert out.joinpath('languages.csv').exists()
+    assert out.joinpath('languages', 'language', 'index.html').exists()
+    assert out.joinpath('languages', 'language.json').exists()
+    assert out.joinpath('sitemap.language.0.xml.gz').exists()
+    assert 'https://example.org/languages/l2' in \
+        out.joinpath('sitemap.language.0.xml').read_text(encoding='utf8')
+    # Icons are served by the app - under host-relative URLs:
+    assert '"icon": "/_icon/' in \
+        out.joinpath('parameters', 'parameter.geojson').read_text(encoding='utf8')
+
+
+@pytest.mark.filterwarnings("ignore:No module named")
+def test_create_geojson(data, testsdir, tmp_path):
+    log = logging.getLogger(__name__)
+    assert main(['create_geojson', str(testsdir / 'test.ini'), 'example.org'], log=log) == 1
+
+    tmp_path.joinpath('tests').mkdir()
+    cfg = tmp_path / 'tests' / 'test.ini'
+    cfg.write_text(
+        testsdir.joinpath('test.ini').read_text(encoding='utf8')
+        + '\nclld.geojson_dir = {0}\n'.format(tmp_path / 'geojson'),
+        encoding='utf8')
+    tmp_path.joinpath('geojson', 'stale').mkdir(parents=True)
+    main(['create_geojson', str(cfg), 'example.org'], log=log)
+    assert [p.name for p in tmp_path.joinpath('geojson').iterdir()] != ['stale']
+    files = list(tmp_path.joinpath('geojson').glob('*/*.geojson'))
+    assert files
+    # URLs are host-relative:
+    assert all('example.org' not in p.read_text(encoding='utf8') for p in files)
+    assert all('"icon": "/_icon/' in p.read_text(encoding='utf8') for p in files)
@@ -1,5 +1,55 @@
+import pytest
+
 from clld.db import fts
+from clld.db.meta import DBSession
+from clld.db.models import common
 
 
 def test_fts():
     assert fts
+
+
+def test_fts_column_search(data):
+    assert fts.column_search(common.Sentence, 'gloss', '1sg') is None
+    assert fts.create_index(
+        common.Sentence, ['name', 'gloss', 'description'], DBSession.connection())
+    assert fts.indexed_attributes(common.Sentence, 'name') == ['name', 'gloss', 'description']
+    assert fts.column_search(common.Sentence, 'analyzed', 'a') is None
+    assert fts.column_search(common.Sentence, 'gloss', '"') is None
+    assert fts.column_search(common.Sentence, 'gloss', '^1sg') is None
+
+
+@pytest.mark.parametrize(
+    'attr,qs,count',
+    [
+        ('gloss', '1sg', 1),
+        ('gloss', 'SG2 do', 1),
+        ('gloss', 'morph', 1),
+        ('gloss', 'morphs', 0),
+        ('description', '1sg', 0),
+        ('description', 'Description sentence', 1),
+    ])
+def test_fts_column_search_count(data, attr, qs, count):
+    fts.create_index(common.Sentence, ['name', 'gloss', 'description'], DBSession.connection())
+    q = DBSession.query(common.Sentence).filter(fts.column_search(common.Sentence, attr, qs))
+    assert q.count() == count
+
+
+def test_fts_postgresql(mocker):
+    from sqlalchemy.dialects import postgresql
+
+    dialect = postgresql.dialect()
+    conn = mocker.Mock(dialect=dialect)
+    assert fts.create_index(common.Sentence, ['name', 'gloss'], conn)
+    sql = [str(c[0][0]) for c in conn.execute.call_args_list]
+    assert any("setweight(to_tsvector('simple', coalesce(\"gloss\", '')), 'B')" in s for s in sql)
+    assert any(s.startswith('CREATE INDEX "fts_sentence"') for s in sql)
+
+    mocker.patch.object(DBSession, 'get_bind', return_value=mocker.Mock(dialect=dialect))
+    mocker.patch.object(DBSession, 'execute', return_value=mocker.Mock(
+        scalar=mocker.Mock(return_value='name gloss')))
+    assert fts.indexed_attributes(common.Sentence, 'gloss') == ['name', 'gloss']
+    cond = fts.column_search(common.Sentence, 'gloss', 'mor 1sg')
+    compiled = cond.compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+    assert "to_tsquery('simple', 'mor:*B & 1sg:*B')" in str(compiled)
+    assert fts.column_search(common.Sentence, 'description', 'x') is None
@@ -9,6 +9,22 @@ def test_Config_replacement_key():
     assert common.Config.replacement_key(None, 'Y') == '__NoneType_Y__'
 
 
+def test_Config_replacements(env):
+    from clld.db.util import store_distinct_values
+
+    store_distinct_values(common.Language.name)
+    assert common.Config.get_replacement_id(
+        common.Language, 'replaced', cache=True) == 'language'
+    assert common.Config.get_replacement_id(
+        common.Language, 'gone', cache=True) == common.Config.gone
+    assert set(common.Config.replacements()) == {'__Language_replaced__', '__Language_gone__'}
+    # The mapping is not updated before the cache is invalidated:
+    common.Config.add_replacement('x', 'language', model=common.Language)
+    DBSession.flush()
+    assert common.Config.get_replacement_id(common.Language, 'x', cache=True) is None
+    assert common.Config.get_replacement_id(common.Language, 'x') == 'language'
+
+
 def test_Files(db, tmp_path, persist):
     l = common.Sentence(id='abc', name='Name')
     f = common.Sentence_files(object=l, id='abstract', mime_type='audio/mpeg')
@@ -0,0 +1,45 @@
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import aliased, column_property
+
+from clld.db.meta import DBSession
+from clld.db.models import common
+from clld.db.trigram import index_name, create_index, icontains
+
+
+def test_icontains(data, persist):
+    persist(
+        common.Language(id='trgm1', name='Bagirmi'),
+        common.Language(id='trgm2', name='Übergang'),
+        common.Language(id='trgm3', name='Irmi'))
+
+    def ids(qs):
+        return {lg.id for lg in DBSession.query(common.Language)
+                .filter(icontains(common.Language.name, qs))}
+
+    queries = ['irmi', 'IRM', 'ir', '^irmi$', '^irm', 'ang$', 'über', 'x']
+    expected = [ids(qs) for qs in queries]
+    assert 'trgm_language_name' not in str(icontains(common.Language.name, 'irmi'))
+
+    assert index_name(common.Language.name) == 'trgm_language_name'
+    assert create_index(common.Language.name, DBSession.connection())
+    assert 'trgm_language_name' in str(icontains(common.Language.name, 'irmi'))
+    assert [ids(qs) for qs in queries] == expected
+    alias = aliased(common.Language)
+    assert 'trgm_language_name' not in str(icontains(alias.name, 'irmi'))
+    assert {lg.id for lg in DBSession.query(alias).filter(icontains(alias.name, 'irm'))} \
+        == expected[1]
+
+
+def test_index_name():
+    assert index_name(aliased(common.Language).name) is None
+    assert index_name(column_property(common.Language.name + 'x')) is None
+    assert index_name(common.Language.name.label('x')) is None
+
+
+def test_create_index(mocker):
+    conn = mocker.Mock(
+        dialect=mocker.Mock(),
+        execute=mocker.Mock(side_effect=[None, OperationalError('', {}, None)]))
+    conn.dialect.name = 'sqlite'
+    assert not create_index(common.Language.name, conn)
+    assert not create_index(aliased(common.Language).name, conn)
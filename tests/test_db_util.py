@@ -21,3 +21,72 @@ def test_icontains(data):
     for qs, count in [('Se', 1), ('^d$', 0), ('^d', 1), ('setä$', 1), ('\\\\b', 0)]:
         q = DBSession.query(Dataset).filter(icontains(Dataset.name, qs))
         assert q.count() == count
+
+
+def test_estimate_count(data):
+    from clld.db.util import estimate_count
+    from clld.db.models.common import Language
+    from clld.db.meta import DBSession
+
+    q = DBSession.query(Language)
+    assert estimate_count(q) == q.count()
+    assert estimate_count(q, cap=10) == 10
+
+
+def test_estimate_count_postgresql(mocker):
+    from sqlalchemy.dialects import postgresql
+    from clld.db.util import estimate_count
+    from clld.db.models.common import Language
+    from clld.db.meta import DBSession
+
+    conn = mocker.Mock(dialect=postgresql.dialect())
+    conn.exec_driver_sql.return_value.scalar.return_value = '[{"Plan": {"Plan Rows": 5}}]'
+    mocker.patch.object(DBSession, 'connection', return_value=conn)
+    assert estimate_count(
+        DBSession.query(Language).filter(Language.id.in_(['a', 'b']), Language.pk > 1)) == 5
+    sql, params = conn.exec_driver_sql.call_args[0]
+    assert sql.startswith('EXPLAIN') and 'POSTCOMPILE' not in sql
+    assert sorted(params.values(), key=str) == [1, 'a', 'b']
+
+
+def test_get_distinct_values(data, mocker):
+    from clld.db import util
+    from clld.db.util import get_distinct_values, store_distinct_values
+    from clld.db.models.common import Language, Config
+    from clld.db.meta import DBSession
+    from clld import cache
+
+    query = mocker.spy(util, '_query_distinct_values')
+    assert get_distinct_values(Language.id) == get_distinct_values(Language.id)
+    assert query.call_count == 2
+
+    values = get_distinct_values(Language.id, cache=True)
+    assert get_distinct_values(Language.id, key=lambda v: v[::-1], cache=True) == \
+        sorted(values, key=lambda v: v[::-1])
+    assert get_distinct_values(
+        Language.id, criterion=Language.id == values[0], cache=True) == values[:1]
+    assert query.call_count == 4
+
+    store_distinct_values(Language.id)  # Computes the values once more.
+    assert DBSession.query(Config).filter(Config.key == '__distinct_values_Language.id__').one()
+    cache.invalidate()
+    assert get_distinct_values(Language.id, cache=True) == values
+    assert query.call_count == 5
+
+
+def test_streaming_session(data, tmp_path, mocker):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import QueuePool
+    from clld.db.util import streaming_session
+    from clld.db.meta import DBSession
+
+    with streaming_session() as session:
+        assert session is DBSession
+
+    engine = create_engine('sqlite:///{}'.format(tmp_path / 'db.sqlite'), poolclass=QueuePool)
+    mocker.patch.object(DBSession, 'get_bind', return_value=engine)
+    with streaming_session() as session:
+        assert session is not DBSession
+        assert session.execute(text('SELECT 1')).scalar() == 1
+        assert engine.pool.checkedout() == 1
+    assert engine.pool.checkedout() == 0
@@ -1,3 +1,5 @@
+import re
+
 import pytest
 
 from clld import RESOURCES
@@ -28,6 +30,8 @@ def test_sitemap(app):
 def test_dataset(app):
     _ = app.get('/void.md.bib')
     res = app.get_html('/?__admin__=1')
+    assert 'CLLD.query_params = {"__admin__": "1"};' in res
+    app.get(re.search(r'src="(/_routes\.[a-f0-9]+\.js)"', res.text).group(1))
     assert 'notexisting.css' in res
     assert 'notexisting.js' in res
     # Test content negotiation:
@@ -53,6 +57,8 @@ def test_resources(app, rsc):
     app.get_html('/%ss' % rsc.name)
     app.get_xml('/%ss.rdf' % rsc.name)
     app.get_dt('/%ss?iDisplayLength=5' % rsc.name)
+    res = app.get('/%ss.tsv' % rsc.name)
+    assert res.content_type == 'text/tab-separated-values'
 
 
 def test_resources_special_cases(app):
@@ -77,3 +83,104 @@ def test_source(app):
 )
 def test_replacement(app, route, status):
     app.get(route, status=status)
+
+
+def test_ctx_cache(env, app):
+    env['registry'].settings['clld.ctx_cache'] = 'true'
+    for _ in range(2):
+        for rsc in RESOURCES:
+            if rsc.with_index:
+                app.get_html('/{0}s/{0}'.format(rsc.name))
+
+
+@pytest.mark.parametrize('path', ['/languages/language', '/languages', '/languages.csv'])
+def test_conditional_get(env, app, path):
+    env['registry'].settings['clld.conditional_get'] = 'true'
+    res = app.get(path)
+    assert res.etag and res.last_modified
+    app.get(path, headers={'If-None-Match': '"{0}"'.format(res.etag)}, status=304)
+    app.get(path, headers={'If-None-Match': '"abc"'}, status=200)
+    app.get(path, headers={'If-Modified-Since': res.headers['Last-Modified']}, status=304)
+    # The representation depends on the query string:
+    assert app.get(path + '?__locale__=de').etag != res.etag
+
+
+@pytest.mark.parametrize(
+    'path,cached',
+    [
+        ('/languages/language', True),
+        ('/languages/language.snippet.html', True),
+        ('/languages/language.rdf', True),
+        ('/languages', True),
+        ('/languages.csv', False),
+        ('/_ping', False),
+    ])
+def test_page_cache(env, app, path, cached):
+    env['registry'].settings['clld.page_cache'] = 'true'
+    env['registry'].settings['clld.conditional_get'] = 'true'
+    res = app.get(path)
+    if cached:
+        assert res.headers['X-Clld-Cache'] == 'miss'
+        res2 = app.get(path)
+        assert res2.headers['X-Clld-Cache'] == 'hit' and res2.body == res.body
+        assert res2.content_type == res.content_type and res2.etag == res.etag
+        app.get(path, headers={'If-None-Match': '"{0}"'.format(res.etag)}, status=304)
+        assert app.get(path + '?__locale__=de').headers['X-Clld-Cache'] == 'miss'
+        # Pages are cached per host:
+        res3 = app.get(path, headers={'Host': 'example.org'})
+        assert res3.headers['X-Clld-Cache'] == 'miss'
+        # Only anonymous requests are cached:
+        for headers in [{'Cookie': 'session=abc'}, {'Authorization': 'Basic eDp5'}]:
+            assert 'X-Clld-Cache' not in app.get(path, headers=headers).headers
+    else:
+        assert 'X-Clld-Cache' not in res.headers
+
+
+def test_tiles(app):
+    res = app.get('/languages/tiles/0/0/0.mvt')
+    assert res.content_type == 'application/vnd.mapbox-vector-tile'
+    assert b'language_id' in res.body
+    # Tiles are cached:
+    assert app.get('/languages/tiles/0/0/0.mvt').body == res.body
+    assert b'language_id' in app.get('/parameters/parameter/tiles/3/4/3.mvt').body
+    assert app.get('/parameters/parameter/tiles/3/1/3.mvt').body == b''
+    app.get('/languages/tiles/1/0/2.mvt', status=404)
+    app.get('/languages/tiles/20/0/0.mvt', status=404)
+    app.get('/languages/language/tiles/0/0/0.mvt', status=404)
+
+
+def test_precomputed_geojson(env, app, tmp_path):
+    import gzip
+    from webob import Request
+    from clld.web.adapters.geojson import precomputed_path
+
+    path = '/parameters/parameter.geojson?layer=x'
+    env['registry'].settings['clld.geojson_dir'] = str(tmp_path)
+    live = app.get(path).body
+    fname = precomputed_path(tmp_path, Request.blank(path))
+    # The path does not depend on host or scheme:
+    assert precomputed_path(tmp_path, Request.blank(path, base_url='https://example.org')) \
+        == fname
+    fname.parent.mkdir()
+    fname.write_bytes(b'{"precomputed": 1}')
+    fname.parent.joinpath(fname.name + '.gz').write_bytes(gzip.compress(b'{"precomputed": 2}'))
+
+    env['registry'].settings['clld.page_cache'] = 'true'
+    res = app.get(path)
+    assert res.json == {'precomputed': 1} and res.content_type == 'application/json'
+    # Files are not read into the page cache:
+    assert 'X-Clld-Cache' not in res.headers
+    # The precompressed file is served - and decoded by the test client:
+    assert app.get(path, headers={'Accept-Encoding': 'gzip'}).json == {'precomputed': 2}
+    # Files are only served for the exact URL:
+    assert 'precomputed' not in app.get(path + '&z=1').json
+
+    env['registry'].settings['clld.geojson_accel_redirect'] = '/_geojson/'
+    res = app.get(path)
+    assert res.headers['X-Accel-Redirect'] == '/_geojson/{0}/{1}'.format(
+        fname.parent.name, fname.name)
+    assert 'X-Clld-Cache' not in res.headers
+    del env['registry'].settings['clld.page_cache']
+    del env['registry'].settings['clld.geojson_accel_redirect']
+    del env['registry'].settings['clld.geojson_dir']
+    assert app.get(path).body == live
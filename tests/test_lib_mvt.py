@@ -0,0 +1,95 @@
+import struct
+
+from clld.lib.mvt import EXTENT, project, encode
+
+
+def _fields(data):
+    i = 0
+    while i < len(data):
+        key, i = _varint(data, i)
+        if key & 7 == 0:
+            value, i = _varint(data, i)
+        elif key & 7 == 1:
+            value, i = data[i:i + 8], i + 8
+        else:
+            n, i = _varint(data, i)
+            value, i = data[i:i + n], i + n
+        yield key >> 3, value
+
+
+def _varint(data, i):
+    res, shift = 0, 0
+    while True:
+        res |= (data[i] & 0x7f) << shift
+        shift += 7
+        i += 1
+        if not data[i - 1] & 0x80:
+            return res, i
+
+
+def _packed(data):
+    i, res = 0, []
+    while i < len(data):
+        n, i = _varint(data, i)
+        res.append(n)
+    return res
+
+
+def _value(data):
+    field, value = list(_fields(data))[0]
+    return {
+        1: lambda v: v.decode('utf8'),
+        3: lambda v: struct.unpack('<d', v)[0],
+        5: lambda v: v,
+        6: lambda v: (v >> 1) ^ -(v & 1),
+        7: bool}[field](value)
+
+
+def decode(tile):
+    layer = dict(features=[], keys=[], values=[])
+    for field, value in _fields(dict(_fields(tile))[3]):
+        if field == 1:
+            layer['name'] = value.decode('utf8')
+        elif field == 2:
+            layer['features'].append({k: _packed(v) if k != 3 else v for k, v in _fields(value)})
+        elif field == 3:
+            layer['keys'].append(value.decode('utf8'))
+        elif field == 4:
+            layer['values'].append(_value(value))
+        elif field == 5:
+            layer['extent'] = value
+    return layer
+
+
+def test_project():
+    assert project((-180, 85.06), 0, 0, 0) == (0, 0)
+    assert project((0, 0), 1, 1, 1) == (0, 0)
+    assert project((0, 0), 1, 0, 0) == (EXTENT, EXTENT)
+    # Longitudes greater than 180 are located in tiles with x >= 2 ** z:
+    assert project((200, 0), 0, 1, 0)[0] == EXTENT * 20 // 360
+
+
+def test_encode():
+    features = [
+        {
+            'geometry': {'coordinates': [90, 45]},
+            'properties': {
+                'name': 'äö', 'count': 3, 'n': -3, 'x': 1.5, 'b': True, 'l': [], 'none': None}},
+        {
+            'geometry': {'coordinates': [-90, 45]},
+            'properties': {'name': 'other'}},
+    ]
+    assert encode(features, 1, 1, 1) == b''
+
+    layer = decode(encode(features, 1, 1, 0, name='languages'))
+    assert layer['name'] == 'languages' and layer['extent'] == EXTENT
+    assert len(layer['features']) == 1
+    feature = layer['features'][0]
+    assert feature[3] == 1
+    tags = feature[2]
+    properties = {
+        layer['keys'][tags[i]]: layer['values'][tags[i + 1]] for i in range(0, len(tags), 2)}
+    assert properties == {'name': 'äö', 'count': 3, 'n': -3, 'x': 1.5, 'b': True}
+    command, x, y = feature[4]
+    assert command == 9
+    assert (x >> 1, y >> 1) == project((90, 45), 1, 1, 0)
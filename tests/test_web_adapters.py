@@ -1,4 +1,9 @@
+import io
+import csv
+import json
+
 from clld.interfaces import IIndex, IRepresentation
+from clld.db.meta import DBSession
 from clld.db.models.common import Contribution, Language, Dataset
 
 
@@ -38,7 +43,53 @@ def test_get_adapter(env):
     assert get_adapter(IIndex, Language, env['request'], name='text/html') is None
 
 
+def test_get_adapter_memoized(env, mocker):
+    from clld.web.adapters import get_adapter, get_adapters
+    from clld.web.adapters.rdf import Rdf
+
+    req, lang = env['request'], Language.first()
+    lookup = mocker.spy(req.registry.adapters, 'lookupAll')
+    adapter = get_adapter(IRepresentation, lang, req, ext='rdf')
+    assert isinstance(adapter, Rdf) and adapter.obj is lang
+    assert get_adapter(IRepresentation, Language.first(), req, ext='rdf').__class__ is \
+        adapter.__class__
+    assert get_adapter(IRepresentation, lang, req, ext='xyz') is None
+    assert lookup.call_count == 1
+    assert dict(get_adapters(IRepresentation, lang, req))['application/rdf+xml']
+
+    req.registry.registerAdapter(
+        type('X', (Rdf,), {'extension': 'xyz'}), (Language,), IRepresentation, name='x/y')
+    assert get_adapter(IRepresentation, lang, req, ext='xyz')
+    res, adapters = get_adapter(IRepresentation, lang, req, name='x/y', getall=True)
+    assert res.extension == 'xyz' and len(adapters) > 1
+
+
 def test_adapter_factory(env):
     from clld.web.adapters.base import adapter_factory
 
     assert IRepresentation.implementedBy(adapter_factory('template.mako'))
+
+
+def test_TableIndex(request_factory, mocker):
+    from clld.web.adapters import table
+    from clld.web.datatables.language import Languages
+
+    # Make sure rows are written in more than one chunk:
+    mocker.patch.object(table, 'BATCH_SIZE', 2)
+    params = {'iDisplayLength': '1', 'iSortingCols': '1', 'iSortCol_0': '1', 'sSortDir_0': 'desc'}
+    with request_factory(params=params) as req:
+        dt = Languages(req, Language)
+        res = table.CsvIndex(None).render_to_response(dt, req)
+        assert res.content_disposition == 'attachment; filename="Languages.csv"'
+        chunks = list(res.app_iter)
+        assert len(chunks) > 1
+        rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf8'))))
+        assert rows[0] == [col.js_args['sTitle'] for col in dt.cols if col.exportable]
+        assert len(rows) == DBSession.query(Language).filter_by(active=True).count() + 1
+        assert [r[1] for r in rows[1:]] == sorted([r[1] for r in rows[1:]], reverse=True)
+
+    with request_factory(params={'sSearch_0': 'l2'}) as req:
+        dt = Languages(req, Language)
+        res = table.JsonLinesIndex(None).render_to_response(dt, req)
+        rows = [json.loads(line) for line in b''.join(res.app_iter).decode('utf8').splitlines()]
+        assert rows and all(r['Id'].startswith('l2') for r in rows)
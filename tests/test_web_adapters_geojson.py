@@ -5,6 +5,8 @@ import pytest
 from clld.db.models.common import Parameter, Language
 from clld.web.adapters import geojson
 from clld.web.datatables.base import DataTable
+from clld.web.icon import MapMarker
+from clld.interfaces import IMapMarker
 
 geojson.pacific_centered()
 
@@ -26,6 +28,60 @@ def test_GeoJsonParameter(env, request_factory):
         assert 'label' in res['features'][0]['properties']
 
 
+def test_GeoJsonParameter_streaming(env, mocker):
+    class Legacy(geojson.GeoJsonParameter):
+        __streaming__ = False
+
+    class Props(geojson.GeoJsonParameter):
+        def row_properties(self, ctx, req, rows):
+            return {'n': len(rows)}
+
+    param = Parameter.get('parameter')
+    adapter = geojson.GeoJsonParameter(None)
+    # Streaming is opt-in:
+    assert not adapter.streaming(env['request'])
+    mocker.patch.dict(env['registry'].settings, {'clld.geojson_streaming': 'true'})
+    assert adapter.streaming(env['request'])
+    res = json.loads(b''.join(adapter.render_to_response(param, env['request']).app_iter))
+    legacy = Legacy(None).render(param, env['request'], dump=False)
+    assert len(res['features']) == len(legacy['features']) > 0
+    for key in ['icon', 'label', 'name']:
+        assert res['features'][0]['properties'][key] == \
+            legacy['features'][0]['properties'][key]
+    assert res['features'][0]['properties']['language']['id'] == \
+        legacy['features'][0]['properties']['language'].id
+    assert res['properties'] == legacy['properties']
+    assert Props(None).render(param, env['request'], dump=False)['features'][0]['properties']['n']
+
+    assert not geojson.GeoJsonParameterMultipleValueSets(None).streaming(env['request'])
+
+    class CallMarker(MapMarker):
+        def __call__(self, ctx, req):
+            return 'custom'
+
+    class RowMarker(CallMarker):
+        def get_row_icon(self, rows, req):
+            # The icon can be computed from all values of a valueset:
+            return 'c{0:06x}'.format(len(rows))
+
+    for marker, streaming in [(CallMarker(), False), (RowMarker(), True)]:
+        mocker.patch.object(env['registry'], 'getUtility', mocker.Mock(return_value=marker))
+        assert adapter.streaming(env['request']) is streaming
+    mocker.stopall()
+    mocker.patch.dict(env['registry'].settings, {'clld.geojson_streaming': 'true'})
+    marker = env['registry'].getUtility(IMapMarker)
+    env['registry'].registerUtility(RowMarker(), IMapMarker)
+    try:
+        res = adapter.render(param, env['request'], dump=False)
+        assert all(
+            f['properties']['icon'].endswith('c{0:06x}.svg'.format(len(f['properties']['values'])))
+            for f in res['features'])
+    finally:
+        env['registry'].registerUtility(marker, IMapMarker)
+    mocker.patch.object(env['registry'], 'getUtility', mocker.Mock(return_value=mocker.Mock()))
+    assert not adapter.streaming(env['request'])
+
+
 def test_GeoJsonParameterMultipleValueSets(env):
     adapter = geojson.GeoJsonParameterMultipleValueSets(None)
     assert '{' in adapter.render(Parameter.get('no-domain'), env['request'])
@@ -47,6 +103,55 @@ def test_GeoJsonLanguages(env):
             MockLanguages(env['request'], Language), env['request'])
 
 
+def test_GeoJsonLanguages_viewport(env, request_factory):
+    from clld.web.datatables.language import Languages
+
+    adapter = geojson.GeoJsonLanguages(None)
+    with request_factory(params=dict(bbox='0,0,1,11')) as req:
+        res = adapter.render(Languages(req, Language), req, dump=False)
+        assert [f['id'] for f in res['features']] == ['language']
+
+    with request_factory(params=dict(z='0')) as req:
+        res = adapter.render(Languages(req, Language), req, dump=False)
+        assert len(res['features']) == 1
+        assert 'cluster' not in res['features'][0]['properties']
+
+    with request_factory(params=dict(z='x', bbox='1,2')) as req:
+        assert geojson.get_zoom(req) is None and geojson.get_bbox(req) is None
+
+
+def test_GeoJsonParameter_viewport(env, request_factory):
+    adapter = geojson.GeoJsonParameter(None)
+    with request_factory(params=dict(bbox='-10,-10,10,11', z='10')) as req:
+        res = json.loads(adapter.render(Parameter.get('parameter'), req))
+        assert len(res['features']) == 1
+    with request_factory(params=dict(bbox='20,20,30,30')) as req:
+        assert json.loads(adapter.render(Parameter.get('parameter'), req))['features'] == []
+
+
+def test_cluster():
+    def feature(lon, lat, icon=None):
+        return {'geometry': {'coordinates': [lon, lat]}, 'properties': {'icon': icon}}
+
+    features = [feature(0, 0), feature(0.1, 0.1), feature(100, 50)]
+    assert len(geojson.cluster(features, None)) == 3
+    assert len(geojson.cluster(features, geojson.CLUSTER_MAX_ZOOM)) == 3
+    res = geojson.cluster(features, 2)
+    assert len(res) == 2
+    assert res[0]['properties']['point_count'] == 2
+    assert res[0]['geometry']['coordinates'] == [pytest.approx(0.05), pytest.approx(0.05)]
+
+    # Features with different icons are clustered separately:
+    res = geojson.cluster(
+        [feature(0, 0, 'a'), feature(0.1, 0.1, 'b'), feature(0.2, 0.2, 'a')], 2)
+    assert [f['properties']['point_count'] for f in res if 'cluster' in f['properties']] == [2]
+    assert res[0]['properties']['icon'] == 'a'
+
+    # Cells are computed in web mercator, i.e. span fewer degrees latitude towards the poles:
+    assert len(geojson.cluster([feature(0.5, -2), feature(0.5, 3)], 3)) == 1
+    assert len(geojson.cluster([feature(0.5, 71), feature(0.5, 72)], 3)) == 2
+
+
 def test_get_lonlat(mocker):
     assert geojson.get_lonlat(None) is None
     assert geojson.get_lonlat((None, 5)) is None
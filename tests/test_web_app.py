@@ -36,6 +36,26 @@ def test_CLLDRequest(env):
     assert env['request'].contact_email_address.startswith('from.settings')
 
 
+@pytest.mark.parametrize('params', [{}, {'__locale__': 'de'}])
+def test_CLLDRequest_resource_url(request_factory, params):
+    from clld import RESOURCES
+    from clld.web.app import compile_route_pattern
+
+    assert compile_route_pattern('/files/*path') is None
+    with request_factory(params=params) as req:
+        for rsc in RESOURCES:
+            obj = req.db.query(rsc.model).first() if rsc.name != 'combination' else None
+            if obj is not None:
+                for kw in [{}, {'ext': 'json'}]:
+                    route = rsc.name + ('_alt' if kw else '')
+                    assert req.resource_url(obj, **kw) == \
+                        req.route_url(route, id=obj.id, **kw)
+                    assert req.resource_path(obj, **kw) == \
+                        req.route_path(route, id=obj.id, **kw)
+        assert req.resource_url('a b', rsc=RESOURCES[3], _anchor='x') == \
+            req.route_url('language', id='a b', _anchor='x')
+
+
 def test_menu_item(env):
     from clld.web.app import menu_item
 
@@ -61,6 +81,29 @@ def test_ctx_factory(request_factory):
             ctx_factory(Contribution, 'rsc', req)
 
 
+def test_ctx_factory_cache(env, request_factory, mocker):
+    from clld.db.meta import DBSession
+    from clld.web.app import ctx_factory, CtxFactoryQuery
+
+    env['registry'].settings['clld.ctx_cache'] = 'true'
+    query = mocker.spy(CtxFactoryQuery, '__call__')
+    contrib = Contribution.first()
+    n = len(contrib.valuesets)
+    for _ in range(2):
+        DBSession.expunge_all()
+        with request_factory(matchdict={'id': contrib.id}) as req:
+            ctx = ctx_factory(Contribution, 'rsc', req)
+            assert ctx in DBSession and len(ctx.valuesets) == n
+            # Relationships which were not eager loaded can still be accessed:
+            assert ctx.primary_contributors is not None
+    assert query.call_count == 1
+
+    env['registry'].settings['pyramid.reload_templates'] = 'true'
+    with request_factory(matchdict={'id': contrib.id}) as req:
+        ctx_factory(Contribution, 'rsc', req)
+    assert query.call_count == 2
+
+
 def test_MapMarker(env):
     marker = env['request'].registry.getUtility(IMapMarker)
     assert marker(None, env['request'])
@@ -102,6 +145,28 @@ def test_no_overwrite_registration(config):
     assert config.registry.queryUtility(IDataTable, name='route') == 1
 
 
+def test_tiles_routes():
+    from pyramid.interfaces import IRoutesMapper
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            'ignore', category=DeprecationWarning, module='importlib._bootstrap')
+        config = Configurator(
+            root_package=importlib.import_module('clld.web'),
+            settings={
+                'sqlalchemy.url': 'sqlite://',
+                'route_patterns': {'parameter': '/p/{id}', 'languages': '/langs'}})
+        config.include('clld.web.app')
+    config.commit()
+    routes = {r.name: r.pattern for r in config.registry.getUtility(IRoutesMapper).get_routes()}
+    # Tile routes are added below the overridden patterns ...
+    assert routes['parameter_tiles'].startswith('/p/{id}/tiles/')
+    assert routes['languages_tiles'].startswith('/langs/tiles/')
+    # ... and only for resources with GeoJSON representations:
+    assert 'language_tiles' not in routes
+    assert 'contributions_tiles' not in routes
+
+
 def test_includeme_error(tmp_path, capsys):
     import sys
     sys.path.append(str(tmp_path))
@@ -3,6 +3,7 @@ from sqlalchemy.sql.expression import cast
 from sqlalchemy.types import Integer
 from zope.interface import Interface, classImplements
 
+from clld.db.meta import DBSession
 from clld.db.models import common
 from clld.web.datatables.base import (
     DataTable, Col, LinkCol, DetailsRowLinkCol, LinkToMapCol, IntegerIdCol, IdCol,
@@ -34,6 +35,8 @@ class Table(DataTable):
 
 def test_DataTable(env, request_factory):
     dt = Table(env['request'], common.Contributor)
+    assert dt.options['language'] == Table(env['request'], common.Contributor).options['language']
+    assert dt.options['language']['paginate']['next'] == 'Next'
     assert 'exclude' in dt._toolbar.options
     assert str(dt) == 'Contributors'
     assert repr(dt) == 'Contributors'
@@ -105,3 +108,176 @@ def test_DataTable_for_custom_class(env):
     classImplements(A, ILanguage)
     dt = DataTable(env['request'], A)
     assert 'languages' in dt.options['sAjaxSource']
+
+
+@pytest.mark.parametrize('sort', [
+    {},
+    {'iSortingCols': '1', 'iSortCol_0': '0', 'sSortDir_0': 'desc'},
+    {'iSortingCols': '2', 'iSortCol_0': '1', 'sSortDir_0': 'desc', 'iSortCol_1': '0'},
+])
+def test_DataTable_keyset_pagination(request_factory, sort):
+    class TestTable(DataTable):
+        __keyset_pagination__ = True
+
+        def col_defs(self):
+            return [Col(self, 'name'), Col(self, 'latitude')]
+
+    def page(start, cursor=None):
+        params = dict(sort, iDisplayStart=str(start), iDisplayLength='10')
+        if cursor:
+            params['sCursor'] = cursor
+        with request_factory(params=params) as req:
+            dt = TestTable(req, common.Language)
+            assert dt.options['bKeysetPagination']
+            items = dt.get_query().all()
+            return [i.pk for i in items], dt.keyset_cursor(items)
+
+    expected, cursor = page(30)
+    for start, ref_start in [(40, 30), (20, 30), (50, 30), (30, 30)]:
+        _, ref_cursor = page(ref_start)
+        assert page(start)[0] == page(start, cursor=ref_cursor)[0]
+
+    pks, cursor = page(20, cursor=cursor)
+    assert page(30, cursor=cursor)[0] == expected
+    assert page(30, cursor='invalid')[0] == expected
+
+
+def test_DataTable_keyset_pagination_date(request_factory, persist, mocker):
+    import datetime
+    from clld.web.datatables import base
+
+    class TestTable(DataTable):
+        __keyset_pagination__ = True
+
+        def col_defs(self):
+            return [Col(self, 'date'), Col(self, 'name')]
+
+    for i in range(25):
+        persist(common.Contribution(
+            id='date{0}'.format(i), date=datetime.date(2000 + i % 7, 1, 1 + i)))
+
+    def page(start, cursor=None):
+        params = dict(
+            iDisplayStart=str(start), iDisplayLength='10', iSortingCols='1', iSortCol_0='0')
+        if cursor:
+            params['sCursor'] = cursor
+        with request_factory(params=params) as req:
+            dt = TestTable(req, common.Contribution)
+            items = dt.get_query().all()
+            return [i.pk for i in items], dt.keyset_cursor(items)
+
+    expected, cursor = page(10)
+    predicate = mocker.spy(base, 'keyset_predicate')
+    assert page(20, cursor=cursor)[0] == page(20)[0]
+    assert page(0, cursor=cursor)[0] == page(0)[0]
+    # Dates are passed into the query as dates - not as strings:
+    assert predicate.call_count == 2
+    assert all(isinstance(call[0][1][0], datetime.date) for call in predicate.call_args_list)
+
+
+def test_DataTable_count_cache(env, request_factory, persist, mocker):
+    class TestTable(DataTable):
+        __count_strategy__ = 'estimate'
+
+        def col_defs(self):
+            return [Col(self, 'name')]
+
+    env['registry'].settings['clld.count_cache'] = 'true'
+    with request_factory(params={'sSearch_0': 'Language 1'}) as req:
+        dt = TestTable(req, common.Language)
+        dt.get_query()
+        count_all, count_filtered = dt.count_all, dt.count_filtered
+
+    persist(common.Language(id='new', name='Language 1000'))
+    with request_factory(params={'sSearch_0': 'Language 1'}) as req:
+        dt = TestTable(req, common.Language)
+        dt.get_query()
+        assert (dt.count_all, dt.count_filtered) == (count_all, count_filtered)
+
+    with request_factory(params={'sSearch_0': 'Language 10'}) as req:
+        dt = TestTable(req, common.Language)
+        dt.get_query()
+        assert dt.count_filtered < count_filtered
+
+
+@pytest.mark.parametrize('strategy', ['exact', 'estimate'])
+def test_DataTable_count_unfiltered(env, mocker, strategy):
+    import functools
+    from clld.db import util
+
+    dt = Table(env['request'], common.Contributor)
+    dt.__count_strategy__ = strategy
+    count = mocker.spy(dt, 'count')
+    dt.get_query()
+    assert [c[1].get('estimate', False) for c in count.call_args_list] == \
+        ([False] if strategy == 'exact' else [True, False])
+    assert dt.count_all == dt.count_filtered
+
+    # The number of rows used for paging is exact, even if the estimate is capped:
+    mocker.patch(
+        'clld.web.datatables.base.estimate_count',
+        functools.partial(util.estimate_count, cap=1))
+    dt = Table(env['request'], common.Language)
+    dt.__count_strategy__ = strategy
+    dt.get_query()
+    assert dt.count_filtered == DBSession.query(common.Language).filter_by(active=True).count()
+
+
+def test_DataTable_loader_options(env):
+    from clld.web.datatables.base import relationship_path
+
+    class TestTable(DataTable):
+        def col_defs(self):
+            return [
+                Col(self, 'a', relationships=['valueset', 'valueset.references.source']),
+                Col(self, 'b', relationships=[common.Value.domainelement]),
+                Col(self, 'c', relationships=['valueset.language']),
+            ]
+
+    dt = TestTable(env['request'], common.Value)
+    assert len(dt.loader_options()) == 3
+    assert relationship_path(common.Value, 'valueset.references') == (
+        common.Value.valueset, common.ValueSet.references)
+    query = dt.get_query()
+    # Eager loading of collections does not require wrapping the paginated query:
+    assert 'anon_1' not in str(query)
+    for item in query:
+        assert item.valueset.references
+
+
+def test_DataTable_default_relationships(env):
+    from sqlalchemy import inspect
+    from clld.web.datatables.value import Values
+
+    class TestTable(Values):
+        def col_defs(self):
+            return [Col(self, 'x', format=lambda i: i.valueset.references[0].source.name)]
+
+    dt = TestTable(env['request'], common.Value)
+    assert len(dt.loader_options()) == 1
+    for item in dt.get_query():
+        # The relationships are loaded without further queries:
+        assert 'valueset' not in inspect(item).unloaded
+
+
+def test_DataTable_load_only_options(env):
+    # The description column has a custom format function without declared attributes:
+    assert Table(env['request'], common.Contributor).load_only_options() == []
+
+    class TestTable(DataTable):
+        def col_defs(self):
+            return [
+                LinkCol(self, 'name'),
+                Col(self, 'address', format=lambda i: i.address, attributes=['address']),
+                ExternalLinkCol(self, 'url'),
+            ]
+
+    dt = TestTable(env['request'], common.Contributor)
+    DBSession.expunge_all()
+    item = dt.get_query().options(*dt.load_only_options()).first()
+    assert {'pk', 'id', 'name', 'address', 'url'}.issubset(item.__dict__)
+    assert 'jsondata' not in item.__dict__
+    assert 'description' not in item.__dict__
+
+    dt.__load_only__ = False
+    assert dt.load_only_options() == []
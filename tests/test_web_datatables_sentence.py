@@ -36,3 +36,27 @@ def test_AudioCol(env, mocker):
     col.order()
     col.search('yes')
     col.format(mocker.Mock())
+
+
+def test_fulltext(request_factory):
+    from clld.db.meta import DBSession
+    from clld.db.fts import create_index
+
+    class FulltextSentences(Sentences):
+        __fulltext__ = ['name', 'analyzed', 'gloss', 'description']
+
+    create_index(common.Sentence, FulltextSentences.__fulltext__, DBSession.connection())
+    with request_factory(params={'sSearch_4': 'descr'}) as req:
+        dt = handle_dt(req, Sentences, common.Sentence)
+        # Full-text search is opt-in:
+        assert 'fts_sentence' not in str(dt.get_query())
+        dt = handle_dt(req, FulltextSentences, common.Sentence)
+        assert 'fts_sentence' in str(dt.get_query())
+        assert dt.count_filtered == 1
+
+    # Anchored searches, columns with custom search and columns of related models are
+    # searched without full-text index:
+    for params in [{'sSearch_4': '^sent'}, {'sSearch_3': '1sg'}, {'sSearch_6': 'x'}]:
+        with request_factory(params=params) as req:
+            dt = handle_dt(req, FulltextSentences, common.Sentence)
+            assert 'fts_sentence' not in str(dt.get_query())
@@ -5,3 +5,30 @@ def test_add_renderer_globals(env, mocker):
     ctx = {'renderer_name': 'path/base.ext.mako', 'request': None}
     add_renderer_globals(mocker.Mock(path_base_ext=lambda **kw: {'a': 3}), ctx)
     assert ctx['a'] == 3
+
+
+def test_add_localizer(env, mocker):
+    from pyramid.request import Request
+    from pyramid.i18n import TranslationString
+    from clld.web.subscribers import _add_localizer
+
+    req1, req2 = Request.blank('/?__locale__=de'), Request.blank('/?__locale__=de')
+    req1.registry = req2.registry = env['registry']
+    _add_localizer(req1)
+    _add_localizer(req2)
+    assert req1.translate is req2.translate
+    assert req1.translate('Next') == 'Next'
+    # Translation strings with the same msgid but different mapping or default:
+    assert req1.translate(TranslationString('a ${x}', mapping={'x': 1})) == 'a 1'
+    assert req1.translate(TranslationString('a ${x}', mapping={'x': 2})) == 'a 2'
+    assert req1.translate(TranslationString('x', default='y')) == 'y'
+    assert req1.translate(TranslationString('x', default='z')) == 'z'
+
+    localizer = mocker.Mock(locale_name='xy', translate=lambda ts: 'translated')
+    mocker.patch('clld.web.subscribers.get_localizer', return_value=localizer)
+    req = Request.blank('/?__locale__=xy')
+    req.registry = env['registry']
+    _add_localizer(req)
+    assert req.translate('Next') == req.translate('Next') == 'translated'
+    assert req.translate('a ${x}', mapping={'x': 1}) == 'translated'
+    assert req.translate('a ${x}', mapping={'x': []}) == 'translated'
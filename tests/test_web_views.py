@@ -1,6 +1,8 @@
 import pytest
 from pyramid.response import Response
-from pyramid.httpexceptions import HTTPNotAcceptable, HTTPNotFound, HTTPGone, HTTPFound
+from pyramid.httpexceptions import (
+    HTTPNotAcceptable, HTTPNotFound, HTTPGone, HTTPFound, HTTPForbidden,
+)
 
 from clld.db.models import common
 from clld.interfaces import IDataTable
@@ -94,7 +96,45 @@ def test__ping(env):
 def test_js(env):
     from clld.web.views import js
 
-    js(env['request'])
+    assert 'CLLD.routes["language"] = "/languages/{id}";' in js(env['request']).text
+
+
+def test_routes(env):
+    from pyramid.httpexceptions import HTTPFound
+    from clld.web.views import routes
+    from clld.web.util.helpers import route_table, route_table_url
+
+    code, fingerprint = route_table(env['registry'])
+    assert route_table(env['registry'])[0] is code
+    req = env['request']
+    req.matchdict = {'fingerprint': fingerprint}
+    res = routes(req)
+    assert res.text == code and res.cache_control.max_age == 31536000
+    req.matchdict = {'fingerprint': 'x'}
+    with pytest.raises(HTTPFound):
+        routes(req)
+    assert route_table_url(req) == '/_routes.{0}.js'.format(fingerprint)
+
+
+def test_icon(env):
+    from pyramid.httpexceptions import HTTPNotFound
+    from clld.web.views import icon
+    from clld.web.icon import Icon, icon_url, OFFLINE
+
+    req = env['request']
+    assert Icon('cff6600').url(req) == '/_icon/cff6600.svg'
+    assert Icon('cff6600', opacity=0.5).url(req) == '/_icon/cff660080.svg'
+    assert icon_url(None, 'cff6600').startswith('data:image/svg+xml')
+    req.environ[OFFLINE] = True
+    assert icon_url(req, 'cff6600').startswith('data:image/svg+xml')
+    del req.environ[OFFLINE]
+    req.matchdict = {'spec': 'cff660080'}
+    res = icon(req)
+    assert res.content_type == 'image/svg+xml' and 'opacity:0.50' in res.text
+    assert 'immutable' in res.headers['Cache-Control']
+    req.matchdict = {'spec': 'xff6600'}
+    with pytest.raises(HTTPNotFound):
+        icon(req)
 
 
 def test_gone(env):
@@ -128,3 +168,75 @@ def test_unapi(env, request_factory, params, assertion):
 
     with request_factory(params=params) as req:
         assert assertion(unapi(req))
+
+
+@pytest.mark.parametrize('cache_dir', [False, True])
+def test_datatable_xhr_view_cache(env, request_factory, mocker, tmp_path, cache_dir):
+    from clld.web.views import datatable_xhr_view
+
+    env['registry'].settings['clld.xhr_cache'] = 'true'
+    if cache_dir:
+        env['registry'].settings['clld.xhr_cache_dir'] = str(tmp_path)
+    dt_cls = env['registry'].getUtility(IDataTable, name='contributors')
+
+    def get(**params):
+        with request_factory(is_xhr=True, params=params) as req:
+            dt = dt_cls(req, common.Contributor)
+            get_query = mocker.spy(dt, 'get_query')
+            res = datatable_xhr_view(dt, req)
+            return res.json, get_query.call_count
+
+    res, calls = get(sEcho='1', _='123', iSortingCols='0', iSortCol_0='1')
+    assert res['sEcho'] == '1' and calls == 1
+    res2, calls = get(sEcho='2', _='456', iSortingCols='0')
+    assert res2['sEcho'] == '2' and calls == 0
+    assert res2['aaData'] == res['aaData']
+    _, calls = get(sEcho='3', sSearch_1='a')
+    assert calls == 1
+    # Responses are cached per host, since they contain absolute URLs:
+    mocker.patch.dict(env['request'].environ, {'HTTP_HOST': 'example.org'})
+    _, calls = get(sEcho='4', iSortingCols='0')
+    assert calls == 1
+    mocker.stopall()
+    if cache_dir:
+        assert list(tmp_path.glob('*/*'))
+
+
+def test_datatable_xhr_view_query_log(env, request_factory, mocker):
+    from clld.db import querylog
+    from clld.web.views import datatable_xhr_view, _query_log
+
+    env['registry'].settings['clld.query_log'] = 'true'
+    env['registry'].settings['clld.query_log_threshold'] = '0'
+    dt_cls = env['registry'].getUtility(IDataTable, name='contributors')
+    with request_factory(is_xhr=True, params={'sEcho': '1', 'sSearch_0': 'a'}) as req:
+        dt = dt_cls(req, common.Contributor)
+        res = datatable_xhr_view(dt, req).json
+        queries = querylog.entries()[0]['queries']
+        assert [q['rows'] for q in queries if q['label'] == 'count'] == \
+            [dt.count_all, dt.count_filtered]
+        page = [q for q in queries if q['label'] == 'page'][0]
+        assert page['rows'] == len(res['aaData']) and page['explain']
+        with pytest.raises(HTTPForbidden):
+            _query_log(req)
+        mocker.patch.dict(req.environ, {'REMOTE_ADDR': '127.0.0.1'})
+        assert _query_log(req).json[0]['queries']
+        req.environ['HTTP_X_FORWARDED_FOR'] = '192.0.2.1, 127.0.0.1'
+        with pytest.raises(HTTPForbidden):
+            _query_log(req)
+        mocker.stopall()
+
+
+def test_last_modified(env, request_factory, mocker):
+    from clld.web.views import last_modified
+    from clld.web.datatables.value import Values
+
+    with request_factory() as req:
+        res = last_modified(Values(req, common.Value))
+        assert res is not None
+        base_query = mocker.spy(Values, 'base_query')
+        assert last_modified(Values(req, common.Value)) == res
+        assert base_query.call_count == 0
+        # The timestamp depends on the constraints of the table:
+        last_modified(Values(req, common.Value, parameter=common.Parameter.first()))
+        assert base_query.call_count == 1